@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+
+def normalize_question(question: str) -> str:
+    """
+    캐시 키로 사용할 수 있도록 질문을 정규화
+
+    유니코드 정규화(NFKC), 소문자 변환, 문장부호 제거, 공백 정리를 수행한다.
+    """
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+class SemanticAnswerCache:
+    """
+    정규화된 질문 임베딩 기반 답변 캐시
+
+    - 정규화된 문자열이 같으면 임베딩 계산 없이 바로 반환
+    - 그 외에는 코사인 유사도가 threshold 이상인 가장 가까운 항목을 반환
+    - LRU + TTL 로 메모리 내 항목 수를 제한하고 SQLite 파일에 영구 저장
+    - version_fn 이 주어지면 항목마다 데이터 버전을 저장하고, 현재 버전과 다른 항목은 제거
+    - slot_fn 이 주어지면 유사도 적중은 슬롯(숫자, 영양소, 식품 등)이 정확히 같은 항목만 허용
+      ("비타민C 많은 음식 5개" 와 "비타민D 많은 음식 3개" 는 임베딩이 거의 같아도 다른 질문)
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], List[float]],
+        db_path: Optional[str] = None,
+        threshold: float = 0.95,
+        max_entries: int = 1000,
+        ttl: float = 24 * 60 * 60,
+        version_fn: Optional[Callable[[], str]] = None,
+        slot_fn: Optional[Callable[[str], List]] = None,
+    ):
+        """
+        Args:
+            embed_fn: 문자열을 임베딩 벡터로 변환하는 함수
+            db_path: 디스크 저장소(SQLite) 경로, None 이면 메모리에만 저장
+            threshold: 캐시 적중으로 판단할 최소 코사인 유사도
+            max_entries: 최대 항목 수 (초과 시 가장 오래 사용되지 않은 항목 제거)
+            ttl: 항목 유효 시간(초)
+            version_fn: 현재 데이터 버전을 반환하는 함수 (DB 가 다시 만들어지면 이전 답변을 사용하지 않도록)
+            slot_fn: 정규화된 질문에서 반드시 일치해야 하는 슬롯 목록을 추출하는 함수 (JSON 직렬화 가능)
+        """
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_fn = version_fn
+        self.slot_fn = slot_fn
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.slot_mismatches = 0
+
+        # key -> {"vector": np.ndarray, "payload": dict, "created_at": float, "version": str, "slots": list}
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 조회 시 계산한 임베딩을 저장 시 재사용하기 위한 메모
+        self._embedding_memo: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+        self._conn = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            create = ("CREATE TABLE IF NOT EXISTS answer_cache ("
+                      "key TEXT PRIMARY KEY, vector TEXT, payload TEXT, created_at REAL, version TEXT, slots TEXT)")
+            self._conn.execute(create)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(answer_cache)")}
+            if not {"version", "slots"} <= columns:
+                # 버전/슬롯 컬럼이 없던 캐시 파일의 항목은 검증할 수 없으므로 버림
+                self._conn.execute("DROP TABLE answer_cache")
+                self._conn.execute(create)
+            self._conn.commit()
+            self._load()
+
+    def _load(self):
+        """디스크에 저장된 유효한 항목(만료되지 않고 현재 데이터 버전과 같은 항목)을 메모리로 로드"""
+        expire_before = time.time() - self.ttl
+        self._conn.execute("DELETE FROM answer_cache WHERE created_at < ?", (expire_before,))
+        version = self._version()
+        if version is not None:
+            self._conn.execute("DELETE FROM answer_cache WHERE version IS NOT ?", (version,))
+        self._conn.commit()
+
+        rows = self._conn.execute(
+            "SELECT key, vector, payload, created_at, version, slots FROM answer_cache "
+            "ORDER BY created_at DESC LIMIT ?",
+            (self.max_entries,),
+        ).fetchall()
+
+        for key, vector, payload, created_at, entry_version, slots in reversed(rows):
+            self._entries[key] = {
+                "vector": np.asarray(json.loads(vector), dtype=np.float32),
+                "payload": json.loads(payload),
+                "created_at": created_at,
+                "version": entry_version,
+                "slots": json.loads(slots) if slots else None,
+            }
+
+    def _version(self) -> Optional[str]:
+        return self.version_fn() if self.version_fn is not None else None
+
+    def _slots(self, key: str) -> Optional[List]:
+        """정규화된 질문의 슬롯 (JSON 으로 저장했다 읽어도 같은 값이 되도록 변환)"""
+        return json.loads(json.dumps(self.slot_fn(key), ensure_ascii=False)) if self.slot_fn is not None else None
+
+    def _embed(self, key: str) -> np.ndarray:
+        """정규화된 질문의 단위 벡터 임베딩 반환"""
+        vector = self._embedding_memo.get(key)
+        if vector is None:
+            vector = np.asarray(self.embed_fn(key), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm:
+                vector = vector / norm
+            with self._lock:
+                self._embedding_memo[key] = vector
+                while len(self._embedding_memo) > 256:
+                    self._embedding_memo.popitem(last=False)
+        return vector
+
+    def _expired(self, entry: Dict, now: float, version: Optional[str]) -> bool:
+        """TTL 이 지났거나 다른 데이터 버전에서 만든 항목인지 확인"""
+        if version is not None and entry.get("version") != version:
+            self.invalidations += 1
+            return True
+        return now - entry["created_at"] > self.ttl
+
+    def _remove(self, key: str):
+        """항목 제거 (lock 을 잡은 상태에서 호출)"""
+        self._entries.pop(key, None)
+        if self._conn:
+            self._conn.execute("DELETE FROM answer_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def lookup(self, question: str) -> Optional[Dict]:
+        """
+        캐시에서 질문에 대한 답변 조회
+
+        Returns:
+            저장된 payload (query, result, answer 등), 없으면 None
+        """
+        key = normalize_question(question)
+        now = time.time()
+        version = self._version()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now, version):
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["payload"]
+            has_entries = bool(self._entries)
+
+        if not has_entries:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        vector = self._embed(key)
+        slots = self._slots(key)
+
+        with self._lock:
+            best_key, best_score = None, -1.0
+            rejected = False
+            for entry_key, entry in list(self._entries.items()):
+                if self._expired(entry, now, version):
+                    self._remove(entry_key)
+                    continue
+                score = float(np.dot(vector, entry["vector"]))
+                if score <= best_score:
+                    continue
+                if self.slot_fn is not None and entry.get("slots") != slots:
+                    rejected = rejected or score >= self.threshold
+                    continue
+                best_key, best_score = entry_key, score
+
+            if best_key is not None and best_score >= self.threshold:
+                self._entries.move_to_end(best_key)
+                self.hits += 1
+                return self._entries[best_key]["payload"]
+
+            if rejected:
+                self.slot_mismatches += 1
+            self.misses += 1
+            return None
+
+    def store(self, question: str, payload: Dict):
+        """질문과 답변(payload)을 캐시에 저장"""
+        key = normalize_question(question)
+        vector = self._embed(key)
+        created_at = time.time()
+        version = self._version()
+        slots = self._slots(key)
+
+        with self._lock:
+            self._entries[key] = {
+                "vector": vector, "payload": payload, "created_at": created_at, "version": version, "slots": slots
+            }
+            self._entries.move_to_end(key)
+            if self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO answer_cache (key, vector, payload, created_at, version, slots) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, json.dumps(vector.tolist()), json.dumps(payload, ensure_ascii=False), created_at, version,
+                     None if slots is None else json.dumps(slots, ensure_ascii=False)),
+                )
+                self._conn.commit()
+
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """적중/미스/제거 카운터 반환"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "slot_mismatches": self.slot_mismatches,
+            }
@@ -1,22 +1,21 @@
-from typing import Annotated, TypedDict, Literal, List, Generator, Tuple
-import ast
-import re
 import time
-from pprint import pprint
-
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_core.vectorstores import InMemoryVectorStore
+_import_started = time.perf_counter()
 
-from langchain_community.tools import QuerySQLDatabaseTool
-from langchain_community.utilities import SQLDatabase
-from langchain.agents.agent_toolkits import create_retriever_tool
+from typing import Annotated, TypedDict, Literal, List, Dict, Optional, Generator, AsyncGenerator, Tuple
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pprint import pprint
 
-from langchain.chains import create_sql_query_chain
-from langchain.chains.sql_database.prompt import SQLITE_PROMPT
+# LangChain OpenAI/Gradio/LangGraph StateGraph 등 무거운 모듈은 처음 사용할 때 import (AppContext, create_graph 참고)
+from langchain_core.runnables import RunnableConfig, RunnableLambda, RunnablePassthrough
+from langchain_core.output_parsers import StrOutputParser
 
-from langgraph.graph import START, END, StateGraph 
+from langgraph.constants import START, END
 
-import gradio as gr
 import logging
 import sys
 
@@ -26,6 +25,25 @@ import sys
 from dotenv import load_dotenv
 load_dotenv()
 
+# import/리소스 초기화 단계별 소요 시간(초), format_startup_report() 참고
+startup_timings: Dict[str, float] = {"import:framework": time.perf_counter() - _import_started}
+
+from answer_cache import SemanticAnswerCache, normalize_question
+from result_cache import SQLResultCache, current_data_version
+from schema_index import SchemaIndex
+from column_retriever import ColumnRetriever
+from columnar_store import ColumnarStore
+from sql_validator import validate_sql, extract_sql, VALID, INVALID
+from readonly_sql import ReadOnlyConnectionPool, format_rows, QueryBudgetExceeded
+from result_shaper import shape_result, split_label_unit
+from food_resolver import FoodNameResolver, FoodMatch, format_food_hint, extract_terms
+from question_router import QuestionRouter
+from llm_policy import CallPolicy
+from request_gate import SingleFlight, AsyncSingleFlight, AdmissionController, AdmissionRejected
+from metrics import registry, instrument_node, TokenUsageCallback, dump_trace, start_metrics_server
+
+startup_timings["import:modules"] = time.perf_counter() - _import_started - startup_timings["import:framework"]
+
 logger = logging.getLogger("nutrition_assistant")
 logger.setLevel(logging.INFO)
 logger.propagate = False
@@ -56,19 +74,343 @@ if not logger.handlers:  # 핸들러 중복 추가 방지
     h.setFormatter(formatter)
     logger.addHandler(h)
 
-db = SQLDatabase.from_uri("sqlite:///data/nutrition_data.db")
+DB_PATH = "data/nutrition_data.db"
+TABLE_NAME = "nutrition_data"
+
+# 질문과 관련된 컬럼만 SQL 생성 프롬프트에 포함 (NUTRITION_SCHEMA_PRUNING=0 이면 항상 전체 스키마)
+SCHEMA_PRUNING = os.getenv("NUTRITION_SCHEMA_PRUNING", "1") == "1"
+SCHEMA_TOP_K = int(os.getenv("NUTRITION_SCHEMA_TOP_K", "8"))
+
+# 질문에 언급된 식품명을 SQL 생성 전에 rowid/식품군으로 해석 (NUTRITION_FOOD_RESOLVER=0 이면 생략)
+FOOD_RESOLVER = os.getenv("NUTRITION_FOOD_RESOLVER", "1") == "1"
+FOOD_NAME_COLUMN = "가식부_100g_당_식품명"
+FOOD_GROUP_COLUMN = "식품군"
+
+# 자주 묻는 형식의 질문은 LLM 없이 템플릿 SQL/답변으로 처리 (NUTRITION_TEMPLATE_ROUTER=0 이면 생략)
+TEMPLATE_ROUTER = os.getenv("NUTRITION_TEMPLATE_ROUTER", "1") == "1"
+
+# SQL 실행 제한 및 결과 정리 (NUTRITION_RESULT_SHAPING=0 이면 기존 tuple 목록 형식)
+SQL_MAX_ROWS = int(os.getenv("NUTRITION_SQL_MAX_ROWS", "10000"))
+SQL_TIMEOUT = float(os.getenv("NUTRITION_SQL_TIMEOUT", "30.0"))
+RESULT_SHAPING = os.getenv("NUTRITION_RESULT_SHAPING", "1") == "1"
+RESULT_MAX_ROWS = int(os.getenv("NUTRITION_RESULT_MAX_ROWS", "50"))
+RESULT_MAX_BYTES = int(os.getenv("NUTRITION_RESULT_MAX_BYTES", "4000"))
+
+# 평가와 동시에 읽기 전용 샌드박스에서 쿼리를 미리 실행 (NUTRITION_SPECULATIVE=1)
+SPECULATIVE_EXECUTION = os.getenv("NUTRITION_SPECULATIVE", "0") == "1"
+SPECULATIVE_MAX_ROWS = int(os.getenv("NUTRITION_SPECULATIVE_MAX_ROWS", "1000"))
+SPECULATIVE_TIMEOUT = float(os.getenv("NUTRITION_SPECULATIVE_TIMEOUT", "2.0"))
+_speculative_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculative")
+
+# 단순 조회/집계 쿼리를 메모리 매핑된 컬럼형 저장소에서 처리 (NUTRITION_COLUMNAR=1, 그 외는 SQLite)
+COLUMNAR_ENGINE = os.getenv("NUTRITION_COLUMNAR", "0") == "1"
+
+# LLM 요청 속도 제한 (NUTRITION_LLM_RPS > 0 이면 초당 요청 수 제한, 배치/동시 세션 공통)
+LLM_REQUESTS_PER_SECOND = float(os.getenv("NUTRITION_LLM_RPS", "0"))
+
+# LLM 호출 정책: 노드별 제한 시간(초), p95 지연 기반 hedged request, 지터 재시도 (NUTRITION_LLM_POLICY=0 이면 그대로 호출)
+LLM_POLICY = os.getenv("NUTRITION_LLM_POLICY", "1") == "1"
+LLM_DEADLINES = {
+    "write_query": float(os.getenv("NUTRITION_WRITE_QUERY_DEADLINE", "30")),
+    "evaluate_query": float(os.getenv("NUTRITION_EVALUATE_QUERY_DEADLINE", "20")),
+    "generate_answer": float(os.getenv("NUTRITION_GENERATE_ANSWER_DEADLINE", "60")),
+    # 답변 캐시 조회용 질문 임베딩 (요청 경로에서 실행되므로 짧게, 초과 시 캐시 미스로 처리)
+    "answer_cache": float(os.getenv("NUTRITION_ANSWER_CACHE_DEADLINE", "2")),
+}
+LLM_HEDGE = os.getenv("NUTRITION_LLM_HEDGE", "1") == "1"
+LLM_HEDGE_QUANTILE = float(os.getenv("NUTRITION_LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("NUTRITION_LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_MAX_HEDGE_RATIO = float(os.getenv("NUTRITION_LLM_MAX_HEDGE_RATIO", "0.1"))
+LLM_MAX_ATTEMPTS = int(os.getenv("NUTRITION_LLM_MAX_ATTEMPTS", "3"))
+LLM_RETRY_BACKOFF = float(os.getenv("NUTRITION_LLM_RETRY_BACKOFF", "0.5"))
+_llm_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm")
+
+def _create_call_policy(node_name: str) -> CallPolicy:
+    """노드별 LLM 호출 정책 (비활성화 시 재시도/hedge/제한 시간 없이 그대로 호출)"""
+    if not LLM_POLICY:
+        return CallPolicy(node_name, hedge=False, max_attempts=1)
+    return CallPolicy(
+        node_name,
+        deadline=LLM_DEADLINES[node_name],
+        hedge=LLM_HEDGE,
+        hedge_quantile=LLM_HEDGE_QUANTILE,
+        hedge_min_samples=LLM_HEDGE_MIN_SAMPLES,
+        max_hedge_ratio=LLM_MAX_HEDGE_RATIO,
+        max_attempts=LLM_MAX_ATTEMPTS,
+        backoff=LLM_RETRY_BACKOFF,
+        executor=_llm_executor,
+    )
 
-# 사용 가능한 테이블 목록 출력
-tables = db.get_usable_table_names()
-logger.info(f"Available tables in the database: {tables}")
+# 노드 이름 -> 호출 정책 (지연 시간 표본과 hedge/재시도 통계는 노드별로 유지)
+llm_policies: Dict[str, CallPolicy] = {name: _create_call_policy(name) for name in LLM_DEADLINES}
 
-columns_result = db.run("SELECT c.name FROM PRAGMA_TABLE_INFO('nutrition_data') c")
-logger.info(f"Columns in 'nutrition_data' table: {columns_result}")
+# 1이면 SQLite 프롬프트로 구조화 출력 모델을 한 번만 호출, 0이면 gpt_sql 결과를 다시 구조화 (LLM 2회)
+SINGLE_PASS_SQL = os.getenv("NUTRITION_SINGLE_PASS_SQL", "1") == "1"
 
-data_count = db.run("SELECT COUNT(*) FROM nutrition_data")
-logger.info(f"Total records in 'nutrition_data' table: {data_count}")
+# 의미 기반 답변 캐시 (NUTRITION_ANSWER_CACHE=0 이면 비활성화)
+ANSWER_CACHE = os.getenv("NUTRITION_ANSWER_CACHE", "1") == "1"
 
-execute_query_tool = QuerySQLDatabaseTool(db=db)
+# 비동기 실행 모드 사용 여부
+ASYNC_MODE = os.getenv("NUTRITION_ASYNC", "0") == "1"
+
+##################################################################
+# 애플리케이션 컨텍스트 (리소스 지연 초기화)
+##################################################################
+
+class AppContext:
+    """
+    요청 처리에 필요한 리소스(스키마 인덱스, SQLite 연결 풀, LLM, 그래프 등)를 처음 사용할 때 생성하는 컨텍스트
+
+    `context.<이름>` 에 처음 접근하면 `_create_<이름>()` 으로 한 번만 생성하고 생성 시간을
+    startup_timings 에 기록한다. 모듈 import 시에는 DB/모델/그래프를 만들지 않으며,
+    서버 시작 시 prewarm() 으로 미리 생성할 수 있다.
+    벤치마크/테스트는 `context.llm = fake` 처럼 속성을 직접 지정하여 리소스를 교체한다.
+    """
+
+    # prewarm() 생성 순서 (뒤의 리소스가 앞의 리소스를 사용)
+    RESOURCES = (
+        "schema_index", "column_retriever", "food_resolver", "question_router",
+        "result_cache", "sql_pool", "columnar_store",
+        "llm_rate_limiter", "llm", "structured_query_llm", "structured_evaluate_llm", "sql_prompt", "gpt_sql",
+        "answer_cache", "graph", "async_graph",
+    )
+
+    def __init__(self, timings: Dict[str, float]):
+        """
+        Args:
+            timings: 리소스별 생성 시간을 기록할 dict ("init:<이름>" 키)
+        """
+        self._timings = timings
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def __getattr__(self, name: str):
+        # 생성(또는 지정)된 리소스는 인스턴스 속성이므로 처음 접근할 때만 호출됨
+        if name.startswith("_") or name not in self.RESOURCES:
+            raise AttributeError(name)
+        with self._locks_guard:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name in self.__dict__:
+                return self.__dict__[name]
+            started = time.perf_counter()
+            value = getattr(self, f"_create_{name}")()
+            # 의존 리소스를 처음 생성한 경우 그 시간도 포함됨
+            self._timings[f"init:{name}"] = time.perf_counter() - started
+            setattr(self, name, value)
+            return value
+
+    def is_ready(self, name: str) -> bool:
+        """리소스가 이미 생성(또는 지정)되었는지 확인"""
+        return name in self.__dict__
+
+    # ------------------------------------------------------------------
+    # 데이터베이스
+    # ------------------------------------------------------------------
+
+    def _create_schema_index(self):
+        # 컬럼 목록/타입, 프롬프트용 테이블 설명을 DB 변경 시에만 다시 계산
+        return SchemaIndex(DB_PATH, TABLE_NAME)
+
+    def _create_column_retriever(self):
+        if not SCHEMA_PRUNING:
+            return None
+        return ColumnRetriever(self.schema_index, top_k=SCHEMA_TOP_K)
+
+    def _create_food_resolver(self):
+        if not FOOD_RESOLVER:
+            return None
+        return FoodNameResolver(
+            DB_PATH, TABLE_NAME, FOOD_NAME_COLUMN, FOOD_GROUP_COLUMN,
+            # 영양소 이름은 식품명으로 해석하지 않음 ("비타민C", "식이섬유" 등)
+            exclude_terms=[split_label_unit(name)[0] for name in self.schema_index.column_names()]
+        )
+
+    def _create_question_router(self):
+        if not TEMPLATE_ROUTER:
+            return None
+        return QuestionRouter(DB_PATH, TABLE_NAME, FOOD_NAME_COLUMN, FOOD_GROUP_COLUMN)
+
+    def _create_result_cache(self):
+        # SQL 실행 결과 캐시 (DB 파일이 변경되면 자동 무효화)
+        return SQLResultCache(
+            DB_PATH,
+            max_bytes=int(os.getenv("NUTRITION_RESULT_CACHE_BYTES", str(16 * 1024 * 1024)))
+        )
+
+    def _create_sql_pool(self):
+        # 스레드별 읽기 전용 연결 풀 (동시 세션이 하나의 연결을 공유하지 않도록)
+        return ReadOnlyConnectionPool(
+            DB_PATH,
+            mmap_size=int(os.getenv("NUTRITION_SQLITE_MMAP_BYTES", str(64 * 1024 * 1024))),
+            cache_size_kb=int(os.getenv("NUTRITION_SQLITE_CACHE_KB", str(16 * 1024)))
+        )
+
+    def _create_columnar_store(self):
+        if not COLUMNAR_ENGINE:
+            return None
+        store = ColumnarStore(DB_PATH, TABLE_NAME, os.getenv("NUTRITION_COLUMNAR_DIR", "data/columnar"))
+        logger.info("Columnar store loaded: %d rows", store.row_count)
+        return store
+
+    # ------------------------------------------------------------------
+    # 모델 및 체인
+    # ------------------------------------------------------------------
+
+    def _create_llm_rate_limiter(self):
+        if LLM_REQUESTS_PER_SECOND <= 0:
+            return None
+        from langchain_core.rate_limiters import InMemoryRateLimiter
+        return InMemoryRateLimiter(
+            requests_per_second=LLM_REQUESTS_PER_SECOND,
+            max_bucket_size=max(1.0, LLM_REQUESTS_PER_SECOND)
+        )
+
+    def _create_llm(self):
+        from langchain_openai import ChatOpenAI
+        # 호출 정책을 사용하면 재시도는 llm_policies 에서 처리하고, HTTP 요청은 가장 긴 노드 제한 시간에 끊음
+        options = {"timeout": max(LLM_DEADLINES.values()), "max_retries": 0} if LLM_POLICY else {}
+        # stream_usage: 스트리밍 응답에서도 토큰 사용량을 받아 메트릭에 기록
+        return ChatOpenAI(model="gpt-4.1-mini", stream_usage=True, rate_limiter=self.llm_rate_limiter, **options)
+
+    def _create_structured_query_llm(self):
+        # include_raw: 구조화 출력 파싱에 실패해도 원본 응답에서 SQL 을 추출할 수 있도록 함
+        return self.llm.with_structured_output(QueryOutput, include_raw=True)
+
+    def _create_structured_evaluate_llm(self):
+        return self.llm.with_structured_output(EvaluateOutput)
+
+    def _create_sql_prompt(self):
+        # SQL 생성 프롬프트 (최대 10개의 데이터를 가져오는 쿼리 생성)
+        return create_query_prompt(k=10)
+
+    def _create_gpt_sql(self):
+        # NUTRITION_SINGLE_PASS_SQL=0 일 때 구조화 출력 전에 SQL 텍스트를 먼저 생성하는 chain
+        return create_query_chain(self.llm, k=10)
+
+    def _create_answer_cache(self):
+        if not ANSWER_CACHE:
+            return None
+        from langchain_openai import OpenAIEmbeddings
+        # 호출 정책을 끄더라도 임베딩 HTTP 요청은 답변 캐시 제한 시간에 끊음
+        deadline = LLM_DEADLINES["answer_cache"]
+        embeddings = OpenAIEmbeddings(model="text-embedding-3-small", timeout=deadline,
+                                      **({"max_retries": 0} if LLM_POLICY else {}))
+        embed_query = RunnableLambda(embeddings.embed_query, name="embed_question")
+        policy = llm_policies["answer_cache"]
+        return SemanticAnswerCache(
+            embed_fn=lambda text: policy.invoke(embed_query, text),
+            db_path=os.getenv("NUTRITION_ANSWER_CACHE_PATH", "data/answer_cache.db"),
+            threshold=float(os.getenv("NUTRITION_ANSWER_CACHE_THRESHOLD", "0.95")),
+            max_entries=int(os.getenv("NUTRITION_ANSWER_CACHE_SIZE", "1000")),
+            ttl=float(os.getenv("NUTRITION_ANSWER_CACHE_TTL", "86400")),
+            # csv_converter 로 DB 를 다시 만들면 이전 답변은 사용하지 않음
+            version_fn=lambda: current_data_version(DB_PATH),
+            slot_fn=self._question_slots,
+        )
+
+    def _question_slots(self, question: str) -> List[List[str]]:
+        """
+        답변 캐시 유사도 적중 시 정확히 일치해야 하는 질문 슬롯
+
+        숫자("5개", "오메가3"), 언급된 영양소 컬럼, 식품/식품군 해석 결과 (식품명 해석을 끄면 질문 단어)
+        """
+        numbers = sorted(re.findall(r"\d+(?:\.\d+)?", question))
+        column_retriever = self.column_retriever or ColumnRetriever(self.schema_index)
+        columns = column_retriever.mentioned_columns(question)
+        if self.food_resolver is not None:
+            foods = sorted(
+                f"group:{match['group']}" if match["group"] is not None else "rows:" + ",".join(map(str, match["rowids"]))
+                for match in self.food_resolver.resolve(question)
+            )
+        else:
+            foods = sorted(extract_terms(question))
+        return [numbers, columns, foods]
+
+    # ------------------------------------------------------------------
+    # 그래프 (컴파일된 그래프는 상태를 갖지 않으므로 모든 요청에서 공유)
+    # ------------------------------------------------------------------
+
+    def _create_graph(self):
+        return create_graph(use_async=False)
+
+    def _create_async_graph(self):
+        return create_graph(use_async=True)
+
+
+context = AppContext(startup_timings)
+
+
+def __getattr__(name: str):
+    """app.sql_pool 처럼 모듈 속성으로 읽던 리소스는 컨텍스트에서 가져옴 (교체는 app.context 속성으로)"""
+    if name in AppContext.RESOURCES:
+        return getattr(context, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def execute_sql(query: str, max_rows: int = SQL_MAX_ROWS, timeout: float = SQL_TIMEOUT) -> str:
+    """
+    읽기 전용 연결에서 쿼리를 실행하고 결과를 프롬프트용 문자열로 변환
+
+    Raises:
+        QueryBudgetExceeded: 시간 또는 행 수 제한 초과
+        sqlite3.Error: SQL 오류
+    """
+    started = time.perf_counter()
+    columnar_store = context.columnar_store
+    executed = columnar_store.execute(query) if columnar_store is not None else None
+    if executed is not None:
+        engine, (columns, rows) = "columnar", executed
+        if len(rows) > max_rows:
+            raise QueryBudgetExceeded(f"query returned more than {max_rows} rows")
+    else:
+        engine = "sqlite"
+        columns, rows = context.sql_pool.query(query, max_rows=max_rows, timeout=timeout)
+    duration = time.perf_counter() - started
+    if RESULT_SHAPING:
+        result = shape_result(columns, rows, max_rows=RESULT_MAX_ROWS, max_bytes=RESULT_MAX_BYTES)
+    else:
+        result = format_rows(columns, rows)
+    _record_sql_metrics(engine, len(rows), result, duration)
+    return result
+
+def speculative_query(query: str):
+    """샌드박스에서 쿼리 실행 (제한 초과나 오류 시 None, 이후 execute_query 에서 정상 실행)"""
+    result = context.result_cache.get(query)
+    if result is not None:
+        registry.inc("nutrition_cache_events_total", cache="sql_result", event="hit")
+        return result
+    registry.inc("nutrition_cache_events_total", cache="sql_result", event="miss")
+    try:
+        result = execute_sql(query, max_rows=SPECULATIVE_MAX_ROWS, timeout=SPECULATIVE_TIMEOUT)
+    except Exception as e:
+        logger.info("<speculative_query> Discarded: %s", e)
+        return None
+    context.result_cache.put(query, result)
+    return result
+
+def _record_sql_metrics(engine: str, row_count: int, result: str, duration: float):
+    """SQL 실행 시간, 반환 행 수, 결과 크기 기록"""
+    registry.observe("nutrition_sql_duration_seconds", duration, engine=engine)
+    registry.observe("nutrition_sql_rows", row_count)
+    registry.observe("nutrition_sql_result_bytes", len(result.encode("utf-8")))
+
+def run_query(query: str) -> str:
+    """SQL 실행 (동일한 쿼리는 캐시된 결과 반환)"""
+    result = context.result_cache.get(query)
+    if result is not None:
+        registry.inc("nutrition_cache_events_total", cache="sql_result", event="hit")
+        logger.info("<run_query> Result cache hit, stats: %s", context.result_cache.stats())
+        return result
+    registry.inc("nutrition_cache_events_total", cache="sql_result", event="miss")
+
+    try:
+        result = execute_sql(query)
+    except (sqlite3.Error, QueryBudgetExceeded) as e:
+        # 오류는 LLM 이 답변에 반영할 수 있도록 문자열로 전달하고 캐시하지 않음
+        logger.warning("<run_query> Query failed: %s", e)
+        return f"Error: {e}"
+    context.result_cache.put(query, result)
+    return result
 
 ##################################################################
 # 상태 정보 타입 정의
@@ -83,6 +425,7 @@ class NutritionState(TypedDict):
     answer: str
     current_node: str
     status: str
+    foods: List[FoodMatch]
 
 
 # SQL 쿼리 생성 Structured Output
@@ -102,68 +445,110 @@ class EvaluateOutput(TypedDict):
 ##################################################################
 # 모델 및 체인 생성
 ##################################################################
-llm = ChatOpenAI(model="gpt-4.1-mini")
+def create_query_prompt(k: int = 10):
+    """
+    create_sql_query_chain 과 같은 SQLite 프롬프트를 만드는 chain
+
+    테이블 설명은 입력의 columns 로 줄인 스키마를 사용 (columns 가 없거나 None 이면 전체 스키마)
+    """
+    from langchain.chains.sql_database.prompt import SQLITE_PROMPT
+
+    return (
+        RunnablePassthrough.assign(
+            input=lambda x: x["question"] + "\nSQLQuery: ",
+            table_info=lambda x: context.schema_index.get_table_info(x.get("columns")),
+        )
+        | (lambda x: {"input": x["input"], "table_info": x["table_info"]})
+        | SQLITE_PROMPT.partial(top_k=str(k))
+    )
+
+def create_query_chain(model, k: int = 10):
+    """create_sql_query_chain 과 같은 SQL 생성 chain (SQL 텍스트 반환)"""
+    return (
+        create_query_prompt(k)
+        | model.bind(stop=["\nSQLResult:"])
+        | StrOutputParser()
+        | (lambda text: text.strip())
+    )
+
+def cache_lookup(question: str):
+    """답변 캐시 조회 (오류 시 캐시 미스로 처리)"""
+    answer_cache = context.answer_cache
+    if answer_cache is None:
+        return None
+    try:
+        cached = answer_cache.lookup(question)
+    except Exception as e:
+        logger.warning("<cache_lookup> Answer cache lookup failed: %s", e)
+        return None
+    registry.inc("nutrition_cache_events_total", cache="answer", event="hit" if cached else "miss")
+    logger.info("<cache_lookup> %s, stats: %s", "hit" if cached else "miss", answer_cache.stats())
+    return cached
+
+def cache_store(question: str, final_state: NutritionState):
+    """정상적으로 답변이 생성된 경우에만 캐시에 저장"""
+    answer_cache = context.answer_cache
+    if answer_cache is None or not final_state or final_state.get("current_node") != "generate_answer":
+        return
+    try:
+        answer_cache.store(question, {
+            "query": final_state["query"],
+            "score": final_state["score"],
+            "result": final_state["result"],
+            "answer": final_state["answer"],
+        })
+    except Exception as e:
+        logger.warning("<cache_store> Answer cache store failed: %s", e)
 
-structured_query_llm = llm.with_structured_output(QueryOutput)
-structured_evaluate_llm = llm.with_structured_output(EvaluateOutput)
 
-# SQL 쿼리 생성 chain (최대 10개의 데이터를 가져오는 쿼리 생성)
-gpt_sql = create_sql_query_chain(llm=llm, db=db, k=10, prompt=SQLITE_PROMPT)
+# 동시에 처리할 수 있는 요청 수 (입장 제어의 동시 실행 수, 입장 제어를 끄면 Gradio 이벤트 concurrency_limit)
+CONCURRENCY_LIMIT = int(os.getenv("NUTRITION_CONCURRENCY_LIMIT", "8"))
 
+# 같은 질문(normalize_question 기준: 유니코드·대소문자·문장부호·공백 정규화)의 동시 요청은 한 번만 실행하고 진행 상황/결과를 함께 받음
+SINGLE_FLIGHT = os.getenv("NUTRITION_SINGLE_FLIGHT", "1") == "1"
 
-# 전역 상태 업데이트 콜백
-status_callback = None
+# 입장 제어: 실행 중인 요청이 CONCURRENCY_LIMIT 개면 최대 QUEUE_DEPTH 개까지 대기,
+# 대기열이 가득 차거나 클라이언트별 제한을 넘으면 즉시 거절, QUEUE_TIMEOUT 초 넘게 기다리면 거절
+ADMISSION_CONTROL = os.getenv("NUTRITION_ADMISSION", "1") == "1"
+QUEUE_DEPTH = int(os.getenv("NUTRITION_QUEUE_DEPTH", "32"))
+QUEUE_TIMEOUT = float(os.getenv("NUTRITION_QUEUE_TIMEOUT", "30"))
+PER_CLIENT_LIMIT = int(os.getenv("NUTRITION_PER_CLIENT_LIMIT", "2"))
+# 앞단의 신뢰할 수 있는 프록시 수 (0 이면 X-Forwarded-For 를 무시하고 접속 주소 사용,
+# N 이면 X-Forwarded-For 의 뒤에서 N 번째 주소 = 가장 바깥 프록시가 기록한 클라이언트 주소 사용)
+TRUSTED_PROXY_HOPS = int(os.getenv("NUTRITION_TRUSTED_PROXY_HOPS", "0"))
 
-def set_status_callback(callback):
-    """상태 업데이트 콜백 함수 설정"""
-    global status_callback
-    status_callback = callback
+single_flight = SingleFlight() if SINGLE_FLIGHT else None
+async_single_flight = AsyncSingleFlight() if SINGLE_FLIGHT else None
+admission = AdmissionController(
+    max_active=CONCURRENCY_LIMIT, max_queue=QUEUE_DEPTH, per_client=PER_CLIENT_LIMIT, timeout=QUEUE_TIMEOUT
+) if ADMISSION_CONTROL else None
 
-def update_status(node_name: str, description: str, progress: int):
-    """상태 업데이트 함수"""
-    if status_callback:
-        status_callback(node_name, description, progress)
+
+def update_status(config: RunnableConfig, node_name: str, description: str, progress: int):
+    """상태 업데이트 함수 (요청별 콜백은 graph config 로 전달됨)"""
+    callback = (config or {}).get("configurable", {}).get("status_callback")
+    if callback:
+        callback(node_name, description, progress)
 
 
 ##################################################################
 # SQL 쿼리 생성
 ##################################################################
 
-def write_query(state: NutritionState) -> NutritionState:
-    """Generate SQL query to fetch information."""
-    update_status("write_query", "🔍 질문을 분석하고 SQL 쿼리를 생성하고 있습니다...", 25)
-    
-    logger.info("<write_query> Question: %s", state["question"])
-    prompt = gpt_sql.invoke({"question": state["question"]})
-    result = structured_query_llm.invoke(prompt)    
-    logger.info("<write_query> Generated query: %s", result["query"])
-    
-    return {
-        **state,
-        "query": result["query"],
-        "current_node": "write_query",
-        "status": "SQL 쿼리 생성 완료"
-    }
-
-def evaluate_query(state: NutritionState) -> NutritionState:
-    """Evaluate SQL query."""
-    update_status("evaluate_query", "📊 생성된 쿼리의 정합성을 평가하고 있습니다...", 50)
-    
-    # 실제 구현 부분 (예시)
-    prompt = f"""
+def _evaluate_prompt(state: NutritionState) -> str:
+    """쿼리 평가 프롬프트 생성"""
+    return f"""
         아래 질문과 쿼리의 정합성에 대해 평가해주세요. 점수(0~1)로만 평가해주고 사용된 컬럼 이름을 반환해주세요.
 
         Question: {state["question"]}
         SQLQuery: {state["query"]}
         """
-    
-    logger.info("<evaluate_query> Prompt: %s", prompt)
-    result = structured_evaluate_llm.invoke(prompt)
-    logger.info("<evaluate_query> Result: %s", result)
 
+def _evaluate_result(state: NutritionState, result: EvaluateOutput) -> NutritionState:
+    """평가 결과의 컬럼 유효성을 확인하여 상태 생성"""
     columns = result["columns"]
     for column in columns:
-        if column not in db.get_table_info():
+        if column != "*" and not context.schema_index.has_column(column):
             logger.error(f"사용된 컬럼 {column}이 실제 테이블에 존재하지 않습니다.")
             return {
                 **state,
@@ -179,20 +564,215 @@ def evaluate_query(state: NutritionState) -> NutritionState:
         "status": "쿼리 평가 완료"
     }
 
+# LLM 평가 전에 로컬 정적 검증 수행 여부
+STATIC_VALIDATION = os.getenv("NUTRITION_STATIC_VALIDATION", "1") == "1"
+
+def _static_evaluate(state: NutritionState):
+    """정적 검증으로 판단 가능하면 평가 결과 상태 반환, 판단 보류면 None"""
+    if not STATIC_VALIDATION:
+        return None
+
+    validation = validate_sql(state["query"], DB_PATH, TABLE_NAME, context.schema_index.text_columns())
+    logger.info("<evaluate_query> Static validation: %s (%s)", validation["verdict"], validation["reason"])
+
+    if validation["verdict"] == VALID:
+        return {
+            **state,
+            "score": 1.0,
+            "current_node": "evaluate_query",
+            "status": "쿼리 평가 완료 (정적 검증)"
+        }
+    if validation["verdict"] == INVALID:
+        return {
+            **state,
+            "score": 0,
+            "current_node": "evaluate_query",
+            "status": f"쿼리 평가 실패 - {validation['reason']}"
+        }
+    return None
+
+def _attach_speculative_result(evaluated: NutritionState, speculative) -> NutritionState:
+    """쿼리를 실행할 상태이면 미리 실행한 결과를 붙이고, 아니면 버림"""
+    if speculative is None:
+        return evaluated
+    if evaluated["score"] <= SCORE_THRESHOLD:
+        speculative.cancel()
+        return evaluated
+
+    result = speculative.result()
+    if result is None:
+        return evaluated
+    logger.info("<evaluate_query> Speculative result kept")
+    return {**evaluated, "result": result}
+
+def _answer_prompt(state: NutritionState) -> str:
+    """답변 생성 프롬프트 생성"""
+    return (
+        "Given the following user question, corresponding SQL query, "
+        "and SQL result, answer the user question.\n\n"
+        f'Question: {state["question"]}\n'
+        f'SQL Query: {state["query"]}\n'
+        f'SQL Result:\n{state["result"]}'
+    )
+
+def _match_template(state: NutritionState) -> NutritionState:
+    """템플릿 매칭, 템플릿 SQL 실행 및 답변 생성 (일치하지 않으면 answer 가 빈 상태)"""
+    question_router = context.question_router
+    match = question_router.match(state["question"]) if question_router is not None else None
+    registry.inc("nutrition_template_routes_total", template=match["template"] if match else "none")
+    if match is None:
+        return {**state, "current_node": "match_template", "status": "템플릿 없음"}
+
+    query = question_router.display_sql(match)
+    logger.info("<match_template> Matched %s: %s", match["template"], query)
+    started = time.perf_counter()
+    try:
+        columns, rows = context.sql_pool.query(match["sql"], max_rows=SQL_MAX_ROWS, timeout=SQL_TIMEOUT, params=match["params"])
+    except (sqlite3.Error, QueryBudgetExceeded) as e:
+        # 템플릿 쿼리가 실패하면 LLM 경로로 처리
+        logger.warning("<match_template> Query failed, falling back: %s", e)
+        return {**state, "current_node": "match_template", "status": "템플릿 없음"}
+    duration = time.perf_counter() - started
+
+    if RESULT_SHAPING:
+        result = shape_result(columns, rows, max_rows=RESULT_MAX_ROWS, max_bytes=RESULT_MAX_BYTES)
+    else:
+        result = format_rows(columns, rows)
+    _record_sql_metrics("sqlite", len(rows), result, duration)
+
+    return {
+        **state,
+        "query": query,
+        "score": 1.0,
+        "result": result,
+        "answer": question_router.render_answer(match, columns, rows),
+        "current_node": "match_template",
+        "status": "템플릿 답변 완료"
+    }
+
+def match_template(state: NutritionState, config: RunnableConfig) -> NutritionState:
+    """템플릿과 일치하는 질문은 LLM 없이 SQL 실행 및 답변 생성"""
+    update_status(config, "match_template", "🧭 질문 형식을 확인하고 있습니다...", 5)
+    return _match_template(state)
+
+def decide_route(state: NutritionState) -> Literal["resolve_foods", "__end__"]:
+    """템플릿으로 답변했으면 종료, 아니면 LLM 경로"""
+    return END if state["answer"] else "resolve_foods"
+
+def _resolve_foods(state: NutritionState) -> NutritionState:
+    """식품명 해석 결과를 담은 상태 생성"""
+    food_resolver = context.food_resolver
+    foods = food_resolver.resolve(state["question"]) if food_resolver is not None else []
+    logger.info("<resolve_foods> Resolved: %s", [(food["term"], food["group"] or food["total"]) for food in foods])
+
+    return {
+        **state,
+        "foods": foods,
+        "current_node": "resolve_foods",
+        "status": "식품명 해석 완료"
+    }
+
+def resolve_foods(state: NutritionState, config: RunnableConfig) -> NutritionState:
+    """질문에 언급된 식품을 rowid/식품군으로 해석"""
+    update_status(config, "resolve_foods", "🥗 질문에 언급된 식품을 찾고 있습니다...", 10)
+    return _resolve_foods(state)
+
+def _sql_question(state: NutritionState) -> str:
+    """SQL 생성에 사용할 질문 (식품명 해석 결과를 참고 문장으로 덧붙임)"""
+    hint = format_food_hint(state.get("foods") or [], TABLE_NAME, FOOD_NAME_COLUMN, FOOD_GROUP_COLUMN)
+    return state["question"] + hint
+
+def _sql_chain_input(state: NutritionState, node_name: str) -> dict:
+    """gpt_sql 입력 (질문 + 질문과 관련된 컬럼, 관련 컬럼이 없으면 전체 스키마)"""
+    column_retriever = context.column_retriever
+    columns = column_retriever.retrieve(state["question"]) if column_retriever is not None else None
+    registry.inc("nutrition_schema_pruning_total", result="full" if columns is None else "pruned")
+    logger.info("<%s> Schema columns: %s", node_name, "all" if columns is None else len(columns))
+    return {"question": _sql_question(state), "columns": columns}
+
+def _query_from_output(output: dict, node_name: str) -> str:
+    """
+    구조화 출력에서 SQL 추출
+
+    include_raw 출력({"raw", "parsed", "parsing_error"})의 파싱에 실패했거나 query 가
+    SELECT/WITH 로 시작하지 않으면 원본 응답 텍스트에서 로컬 파서로 SQL 을 찾는다.
+    """
+    parsed = output.get("parsed") if "raw" in output else output
+    query = (parsed or {}).get("query") or ""
+    if re.match(r"\s*(?:SELECT|WITH)\b", query, re.IGNORECASE):
+        return query.strip()
+
+    text = query
+    if not text and output.get("raw") is not None:
+        raw = output["raw"]
+        text = raw.content if isinstance(raw.content, str) else str(raw.content)
+    extracted = extract_sql(text)
+    registry.inc("nutrition_query_parse_fallback_total", result="extracted" if extracted else "failed")
+    logger.warning("<%s> Structured output unusable (%s), extracted: %s",
+                   node_name, output.get("parsing_error") or "no SELECT", extracted or "-")
+    return extracted or query
+
+def write_query(state: NutritionState, config: RunnableConfig) -> NutritionState:
+    """Generate SQL query to fetch information."""
+    update_status(config, "write_query", "🔍 질문을 분석하고 SQL 쿼리를 생성하고 있습니다...", 25)
+    
+    logger.info("<write_query> Question: %s", state["question"])
+    inputs = _sql_chain_input(state, "write_query")
+    policy = llm_policies["write_query"]
+    # 2회 호출(SINGLE_PASS_SQL=0)이어도 노드 전체에 같은 제한 시각 적용
+    deadline_at = policy.node_deadline()
+    prompt = (context.sql_prompt.invoke(inputs) if SINGLE_PASS_SQL
+              else policy.invoke(context.gpt_sql, inputs, deadline_at=deadline_at))
+    query = _query_from_output(policy.invoke(context.structured_query_llm, prompt, deadline_at=deadline_at), "write_query")
+    logger.info("<write_query> Generated query: %s", query)
+    
+    return {
+        **state,
+        "query": query,
+        "current_node": "write_query",
+        "status": "SQL 쿼리 생성 완료"
+    }
+
+def evaluate_query(state: NutritionState, config: RunnableConfig) -> NutritionState:
+    """Evaluate SQL query."""
+    update_status(config, "evaluate_query", "📊 생성된 쿼리의 정합성을 평가하고 있습니다...", 50)
+    
+    evaluated = _static_evaluate(state)
+    if evaluated is not None:
+        return evaluated
+    
+    # LLM 평가가 진행되는 동안 쿼리를 미리 실행
+    speculative = _speculative_executor.submit(speculative_query, state["query"]) if SPECULATIVE_EXECUTION else None
+    
+    prompt = _evaluate_prompt(state)
+    logger.info("<evaluate_query> Prompt: %s", prompt)
+    result = llm_policies["evaluate_query"].invoke(context.structured_evaluate_llm, prompt)
+    logger.info("<evaluate_query> Result: %s", result)
+
+    return _attach_speculative_result(_evaluate_result(state, result), speculative)
+
+# 쿼리 실행 여부를 결정하는 평가 점수 기준
+SCORE_THRESHOLD = 0.3
+
 def decide_next_step(state: NutritionState) -> Literal["execute_query", "unsupported_data"]:
     """점수가 0.3 이상이면 쿼리 실행, 아니면 지원하지 않는 데이터"""
     logger.info("<decide_next_step> score: %s", state['score'])
-    if state["score"] > 0.3:
+    if state["score"] > SCORE_THRESHOLD:
         return "execute_query"
     else:
         return "unsupported_data"
 
-def execute_query(state: NutritionState) -> NutritionState:
+def execute_query(state: NutritionState, config: RunnableConfig) -> NutritionState:
     """SQL쿼리 실행"""
-    update_status("execute_query", "🧬 데이터베이스에서 영양소 정보를 검색하고 있습니다...", 75)
+    update_status(config, "execute_query", "🧬 데이터베이스에서 영양소 정보를 검색하고 있습니다...", 75)
     
-    logger.info("<execute_query> Executing query: %s", state["query"])
-    result = execute_query_tool.invoke(state["query"])
+    if state["result"]:
+        # evaluate_query 단계에서 미리 실행한 결과 사용
+        result = state["result"]
+        logger.info("<execute_query> Using speculative result for query: %s", state["query"])
+    else:
+        logger.info("<execute_query> Executing query: %s", state["query"])
+        result = run_query(state["query"])
     logger.info("<execute_query> Query result: %s", result)
 
     return {
@@ -202,32 +782,26 @@ def execute_query(state: NutritionState) -> NutritionState:
         "status": "데이터베이스 검색 완료"
     }
 
-def generate_answer(state: NutritionState) -> NutritionState:
+def generate_answer(state: NutritionState, config: RunnableConfig) -> NutritionState:
     """주어진 질문, 쿼리, 결과를 바탕으로 답변 생성"""
-    update_status("generate_answer", "⚡ 검색 결과를 바탕으로 답변을 생성하고 있습니다...", 90)
-    
-    prompt = (
-        "Given the following user question, corresponding SQL query, "
-        "and SQL result, answer the user question.\n\n"
-        f'Question: {state["question"]}\n'
-        f'SQL Query: {state["query"]}\n'
-        f'SQL Result: {state["result"]}'
-    )
+    update_status(config, "generate_answer", "⚡ 검색 결과를 바탕으로 답변을 생성하고 있습니다...", 90)
     
+    prompt = _answer_prompt(state)
     logger.info("<generate_answer> Prompt: %s", prompt)
-    response = llm.invoke(prompt)
-    logger.info("<generate_answer> Generated answer: %s", response.content)
+    # 토큰 단위로 스트리밍 (stream_mode="messages" 로 UI 에 바로 전달됨)
+    answer = "".join(chunk.content for chunk in llm_policies["generate_answer"].stream(context.llm, prompt))
+    logger.info("<generate_answer> Generated answer: %s", answer)
 
     return {
         **state,
-        "answer": response.content,
+        "answer": answer,
         "current_node": "generate_answer",
         "status": "답변 생성 완료"
     }
 
-def unsupported_data(state: NutritionState) -> NutritionState:
+def unsupported_data(state: NutritionState, config: RunnableConfig) -> NutritionState:
     """지원하지 않는 데이터에 대한 응답"""
-    update_status("unsupported_data", "❌ 지원하지 않는 데이터입니다", 100)
+    update_status(config, "unsupported_data", "❌ 지원하지 않는 데이터입니다", 100)
     
     logger.info("<unsupported_data> Unsupported data for question: %s", state["question"])
 
@@ -238,21 +812,134 @@ def unsupported_data(state: NutritionState) -> NutritionState:
         "status": "지원하지 않는 데이터"
     }
 
+##################################################################
+# 비동기 노드 (NUTRITION_ASYNC=1)
+##################################################################
+
+async def amatch_template(state: NutritionState, config: RunnableConfig) -> NutritionState:
+    """match_template 의 비동기 버전 (템플릿 SQL 실행과 라우터 테이블 생성은 스레드에서 실행)"""
+    update_status(config, "match_template", "🧭 질문 형식을 확인하고 있습니다...", 5)
+    return await asyncio.to_thread(_match_template, state)
+
+async def aresolve_foods(state: NutritionState, config: RunnableConfig) -> NutritionState:
+    """resolve_foods 의 비동기 버전 (FTS 검색과 퍼지 인덱스 생성은 스레드에서 실행)"""
+    update_status(config, "resolve_foods", "🥗 질문에 언급된 식품을 찾고 있습니다...", 10)
+    return await asyncio.to_thread(_resolve_foods, state)
+
+async def awrite_query(state: NutritionState, config: RunnableConfig) -> NutritionState:
+    """write_query 의 비동기 버전"""
+    update_status(config, "write_query", "🔍 질문을 분석하고 SQL 쿼리를 생성하고 있습니다...", 25)
+
+    logger.info("<awrite_query> Question: %s", state["question"])
+    inputs = _sql_chain_input(state, "awrite_query")
+    policy = llm_policies["write_query"]
+    deadline_at = policy.node_deadline()
+    prompt = await (context.sql_prompt.ainvoke(inputs) if SINGLE_PASS_SQL
+                    else policy.ainvoke(context.gpt_sql, inputs, deadline_at=deadline_at))
+    query = _query_from_output(
+        await policy.ainvoke(context.structured_query_llm, prompt, deadline_at=deadline_at), "awrite_query"
+    )
+    logger.info("<awrite_query> Generated query: %s", query)
+
+    return {
+        **state,
+        "query": query,
+        "current_node": "write_query",
+        "status": "SQL 쿼리 생성 완료"
+    }
+
+async def aevaluate_query(state: NutritionState, config: RunnableConfig) -> NutritionState:
+    """evaluate_query 의 비동기 버전"""
+    update_status(config, "evaluate_query", "📊 생성된 쿼리의 정합성을 평가하고 있습니다...", 50)
+
+    # 정적 검증은 SQL 파싱/EXPLAIN 을 포함하므로 이벤트 루프를 막지 않도록 스레드에서 실행
+    evaluated = await asyncio.to_thread(_static_evaluate, state)
+    if evaluated is not None:
+        return evaluated
+
+    speculative = asyncio.ensure_future(asyncio.to_thread(speculative_query, state["query"])) if SPECULATIVE_EXECUTION else None
+
+    prompt = _evaluate_prompt(state)
+    logger.info("<aevaluate_query> Prompt: %s", prompt)
+    result = await llm_policies["evaluate_query"].ainvoke(context.structured_evaluate_llm, prompt)
+    logger.info("<aevaluate_query> Result: %s", result)
+
+    evaluated = _evaluate_result(state, result)
+    if speculative is None or evaluated["score"] <= SCORE_THRESHOLD:
+        if speculative is not None:
+            speculative.cancel()
+        return evaluated
+
+    speculative_result = await speculative
+    if speculative_result is None:
+        return evaluated
+    logger.info("<aevaluate_query> Speculative result kept")
+    return {**evaluated, "result": speculative_result}
+
+async def aexecute_query(state: NutritionState, config: RunnableConfig) -> NutritionState:
+    """execute_query 의 비동기 버전 (SQLite 는 스레드풀에서 실행)"""
+    update_status(config, "execute_query", "🧬 데이터베이스에서 영양소 정보를 검색하고 있습니다...", 75)
+
+    if state["result"]:
+        result = state["result"]
+        logger.info("<aexecute_query> Using speculative result for query: %s", state["query"])
+    else:
+        logger.info("<aexecute_query> Executing query: %s", state["query"])
+        result = await asyncio.to_thread(run_query, state["query"])
+    logger.info("<aexecute_query> Query result: %s", result)
+
+    return {
+        **state,
+        "result": result,
+        "current_node": "execute_query",
+        "status": "데이터베이스 검색 완료"
+    }
+
+async def agenerate_answer(state: NutritionState, config: RunnableConfig) -> NutritionState:
+    """generate_answer 의 비동기 버전"""
+    update_status(config, "generate_answer", "⚡ 검색 결과를 바탕으로 답변을 생성하고 있습니다...", 90)
+
+    prompt = _answer_prompt(state)
+    logger.info("<agenerate_answer> Prompt: %s", prompt)
+    answer = "".join([chunk.content async for chunk in llm_policies["generate_answer"].astream(context.llm, prompt)])
+    logger.info("<agenerate_answer> Generated answer: %s", answer)
+
+    return {
+        **state,
+        "answer": answer,
+        "current_node": "generate_answer",
+        "status": "답변 생성 완료"
+    }
+
 ##################################################################
 # 상태 그래프 생성
 ##################################################################
 
-def create_graph():
-    """StateGraph 생성"""
-    graph_builder = StateGraph(NutritionState)
+def create_graph(use_async: bool = False):
+    """StateGraph 생성 (use_async=True 이면 비동기 노드 사용)"""
+    from langgraph.graph import StateGraph
 
-    graph_builder.add_node("write_query", write_query)
-    graph_builder.add_node("evaluate_query", evaluate_query)
-    graph_builder.add_node("execute_query", execute_query)
-    graph_builder.add_node("generate_answer", generate_answer)
-    graph_builder.add_node("unsupported_data", unsupported_data)
+    graph_builder = StateGraph(NutritionState)
 
-    graph_builder.add_edge(START, "write_query")
+    if use_async:
+        graph_builder.add_node("match_template", instrument_node("match_template", amatch_template))
+        graph_builder.add_node("resolve_foods", instrument_node("resolve_foods", aresolve_foods))
+        graph_builder.add_node("write_query", instrument_node("write_query", awrite_query))
+        graph_builder.add_node("evaluate_query", instrument_node("evaluate_query", aevaluate_query))
+        graph_builder.add_node("execute_query", instrument_node("execute_query", aexecute_query))
+        graph_builder.add_node("generate_answer", instrument_node("generate_answer", agenerate_answer))
+    else:
+        graph_builder.add_node("match_template", instrument_node("match_template", match_template))
+        graph_builder.add_node("resolve_foods", instrument_node("resolve_foods", resolve_foods))
+        graph_builder.add_node("write_query", instrument_node("write_query", write_query))
+        graph_builder.add_node("evaluate_query", instrument_node("evaluate_query", evaluate_query))
+        graph_builder.add_node("execute_query", instrument_node("execute_query", execute_query))
+        graph_builder.add_node("generate_answer", instrument_node("generate_answer", generate_answer))
+    graph_builder.add_node("unsupported_data", instrument_node("unsupported_data", unsupported_data))
+
+    graph_builder.add_edge(START, "match_template")
+    graph_builder.add_conditional_edges("match_template", decide_route)
+    graph_builder.add_edge("resolve_foods", "write_query")
     graph_builder.add_edge("write_query", "evaluate_query")
 
     graph_builder.add_conditional_edges(
@@ -266,59 +953,150 @@ def create_graph():
 
     return graph_builder.compile()
 
+
+def get_graph(use_async: bool = False):
+    """컴파일된 그래프 반환 (모드별 최초 1회만 생성)"""
+    return context.async_graph if use_async else context.graph
+
+def warmup_graph():
+    """LLM 호출 없이 그래프/DB 경로를 미리 실행하여 첫 요청의 지연을 줄임"""
+    started = time.perf_counter()
+    graph = get_graph(ASYNC_MODE)
+    graph.get_graph()  # 그래프 구조 생성 (lazy import 포함)
+    context.sql_pool.query("SELECT 1")
+    if context.food_resolver is not None:
+        context.food_resolver.warmup()
+    logger.info("<warmup_graph> Warmup done in %.3fs", time.perf_counter() - started)
+
+##################################################################
+# 시작 시간 리포트 / 리소스 미리 생성
+##################################################################
+
+# 서버 시작 시 리소스 미리 생성: background(기본, 별도 스레드) / sync(UI 시작 전 완료) / off(첫 요청 시 생성)
+PREWARM_MODE = os.getenv("NUTRITION_PREWARM", "background")
+
+def format_startup_report() -> str:
+    """import 및 리소스 초기화 단계별 소요 시간 표"""
+    lines = [f"{'phase':<32}{'ms':>10}"]
+    for phase, seconds in list(startup_timings.items()):
+        lines.append(f"{phase:<32}{seconds * 1000:>10.1f}")
+    return "\n".join(lines)
+
+def prewarm(background: bool = True) -> Optional[threading.Thread]:
+    """
+    요청 경로의 리소스(DB 인덱스, 모델 클라이언트, 그래프)를 미리 생성
+
+    NUTRITION_WARMUP=1 이면 LLM 호출 없는 dry run(warmup_graph) 까지 수행한다.
+    실패한 리소스는 경고만 남기고 첫 요청 시 다시 생성을 시도한다.
+
+    Returns:
+        background=True 이면 실행 중인 스레드, 아니면 None
+    """
+    unused_graph = "graph" if ASYNC_MODE else "async_graph"
+
+    def run():
+        started = time.perf_counter()
+        for name in AppContext.RESOURCES:
+            if name == unused_graph:
+                continue
+            try:
+                getattr(context, name)
+            except Exception as e:
+                logger.warning("<prewarm> Failed to initialize %s: %s", name, e)
+        if os.getenv("NUTRITION_WARMUP", "0") == "1":
+            warmup_graph()
+        startup_timings["prewarm"] = time.perf_counter() - started
+        logger.info("<prewarm> Done in %.3fs\n%s", startup_timings["prewarm"], format_startup_report())
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def _collect_cache_stats(metrics_registry):
+    """캐시 통계와 시작 시간을 gauge 로 노출 (아직 생성되지 않은 리소스는 생략)"""
+    if context.is_ready("result_cache"):
+        for name, value in context.result_cache.stats().items():
+            if isinstance(value, (int, float)):
+                metrics_registry.set_gauge("nutrition_cache_state", value, cache="sql_result", field=name)
+    if context.is_ready("answer_cache") and context.answer_cache is not None:
+        for name, value in context.answer_cache.stats().items():
+            metrics_registry.set_gauge("nutrition_cache_state", value, cache="answer", field=name)
+    if context.is_ready("sql_pool"):
+        for name, value in context.sql_pool.stats().items():
+            if isinstance(value, (int, float)):
+                metrics_registry.set_gauge("nutrition_sqlite_pool_state", value, field=name)
+    for phase, seconds in list(startup_timings.items()):
+        metrics_registry.set_gauge("nutrition_startup_seconds", seconds, phase=phase)
+    for node_name, policy in llm_policies.items():
+        for name, value in policy.stats().items():
+            metrics_registry.set_gauge("nutrition_llm_policy_state", value, node=node_name, field=name)
+    if admission is not None:
+        for name, value in admission.stats().items():
+            metrics_registry.set_gauge("nutrition_admission_state", value, field=name)
+    for mode, flights in (("sync", single_flight), ("async", async_single_flight)):
+        if flights is not None:
+            for name, value in flights.stats().items():
+                metrics_registry.set_gauge("nutrition_single_flight_state", value, mode=mode, field=name)
+
+registry.describe("nutrition_cache_state", "gauge", "Cache sizes and cumulative counters")
+registry.describe("nutrition_template_routes_total", "counter", "Questions answered by a template (template=none: LLM path)")
+registry.describe("nutrition_sqlite_pool_state", "gauge", "Read-only SQLite pool connections and query counters")
+registry.describe("nutrition_query_parse_fallback_total", "counter", "Generated SQL recovered from free text by the local parser (result=failed: nothing found)")
+registry.describe("nutrition_schema_pruning_total", "counter", "SQL prompts built from a pruned schema (result=full: no relevant column found)")
+registry.describe("nutrition_startup_seconds", "gauge", "Import and lazy resource initialization time by phase")
+registry.describe("nutrition_llm_policy_state", "gauge", "LLM call policy counters (retries, hedges, deadline_exceeded) and current hedge delay by node")
+registry.describe("nutrition_admission_total", "counter", "Pipeline runs admitted or rejected by admission control (result=queue_full/client_limit/timeout: rejected)")
+registry.describe("nutrition_admission_state", "gauge", "Admission control active/queued requests and cumulative counters")
+registry.describe("nutrition_single_flight_state", "gauge", "Coalesced questions in flight and cumulative leader/follower counts")
+registry.register_collector(_collect_cache_stats)
+
+# NUTRITION_METRICS_PORT 가 설정되면 Gradio 옆에 Prometheus /metrics 엔드포인트 제공
+if os.getenv("NUTRITION_METRICS_PORT"):
+    start_metrics_server(int(os.getenv("NUTRITION_METRICS_PORT")))
+    logger.info("Metrics endpoint: http://0.0.0.0:%s/metrics", os.getenv("NUTRITION_METRICS_PORT"))
+
 ##################################################################
 # Gradio 인터페이스 - 실시간 상태 표시
 ##################################################################
 
-def nutrition_assistant_with_status(question: str) -> Generator[Tuple[str, str], None, None]:
-    """실시간 상태 업데이트가 포함된 영양소 분석 함수"""
-    
-    if not question.strip():
-        yield "질문을 입력해주세요.", "❌ 빈 질문입니다."
-        return
-    
-    # 현재 상태를 저장할 변수들
-    current_status = {"node": "", "description": "", "progress": 0}
-    
-    def status_update_callback(node_name: str, description: str, progress: int):
-        """상태 업데이트 콜백"""
-        current_status.update({
-            "node": node_name,
-            "description": description,
-            "progress": progress
-        })
-    
-    # 콜백 설정
-    set_status_callback(status_update_callback)
-    
-    try:
-        # 그래프 생성 및 초기 상태 설정
-        graph = create_graph()
-        initial_state = {
-            "question": question,
-            "query": "",
-            "score": 0.0,
-            "result": "",
-            "answer": "",
-            "current_node": "",
-            "status": ""
-        }
-        
-        # 그래프 스트리밍 실행
-        final_state = None
-        
-        for state in graph.stream(initial_state):
-            # state는 {node_name: updated_state} 형태
-            node_name = list(state.keys())[0]
-            node_state = state[node_name]
-            final_state = node_state
-            
-            # 진행률 계산
-            progress = current_status["progress"]
-            progress_bar = "█" * (progress // 25) + "░" * (4 - progress // 25)
-            
-            # 중간 결과 표시
-            temp_result = f"""
+def _initial_state(question: str) -> NutritionState:
+    """그래프 초기 상태 생성"""
+    return {
+        "question": question,
+        "query": "",
+        "score": 0.0,
+        "result": "",
+        "answer": "",
+        "current_node": "",
+        "status": "",
+        "foods": []
+    }
+
+# 노드 완료 이벤트와 답변 토큰을 함께 받기 위한 스트림 모드
+STREAM_MODES = ["updates", "messages"]
+
+def _answer_token(chunk: tuple) -> str:
+    """messages 스트림 이벤트에서 generate_answer 노드의 토큰만 추출"""
+    message, metadata = chunk
+    if metadata.get("langgraph_node") != "generate_answer":
+        return ""
+    return message.content if isinstance(message.content, str) else ""
+
+def _progress_bar(current_status: dict) -> str:
+    progress = current_status["progress"]
+    return "█" * (progress // 25) + "░" * (4 - progress // 25)
+
+def _render_progress(current_status: dict, node_state: NutritionState) -> Tuple[str, str]:
+    """중간 결과 markdown 및 상태 텍스트 생성"""
+    # 진행률 계산
+    progress = current_status["progress"]
+    progress_bar = _progress_bar(current_status)
+
+    temp_result = f"""
 ### 🔄 처리 중입니다...
 
 **현재 단계:** {current_status["description"]}
@@ -337,18 +1115,36 @@ def nutrition_assistant_with_status(question: str) -> Generator[Tuple[str, str],
 
 잠시만 기다려주세요...
             """
-            
-            status_text = f"{current_status['description']}\n\n진행률: [{progress_bar}] {progress}%"
-            
-            yield temp_result, status_text
-#            time.sleep(0.5)  # 시각적 효과
-        
-        # 최종 완료 상태 업데이트
-        update_status("completed", "✅ 분석 완료!", 100)
-        
-        # 최종 결과 생성
-        if final_state:
-            final_result = f"""
+
+    status_text = f"{current_status['description']}\n\n진행률: [{progress_bar}] {progress}%"
+    return temp_result, status_text
+
+def _render_partial_answer(question: str, current_status: dict, node_state: NutritionState, partial_answer: str) -> Tuple[str, str]:
+    """답변 생성 중 markdown 및 상태 텍스트 생성"""
+    progress = current_status["progress"]
+    progress_bar = _progress_bar(current_status)
+
+    temp_result = f"""
+### ✍️ 답변을 작성하고 있습니다...
+
+**질문:** {question}
+
+**생성된 SQL 쿼리:**
+```sql
+{node_state.get('query', 'N/A')}
+```
+
+**최종 답변:**
+{partial_answer}▌
+            """
+
+    status_text = f"{current_status['description']}\n\n진행률: [{progress_bar}] {progress}%"
+    return temp_result, status_text
+
+def _render_final(question: str, final_state: NutritionState) -> str:
+    """최종 결과 markdown 생성"""
+    if final_state:
+        return f"""
 ### 🍎 영양소 분석 결과
 
 **질문:** {question}
@@ -371,19 +1167,17 @@ def nutrition_assistant_with_status(question: str) -> Generator[Tuple[str, str],
 ---
 ✅ **분석 완료** | 국가표준 식품성분표 기준
             """
-        else:
-            final_result = """
+
+    return """
 ### ❌ 처리 실패
 
 분석 과정에서 오류가 발생했습니다.
 다시 시도해주세요.
             """
-        
-        final_status = "✅ 분석 완료!"
-        yield final_result, final_status
-        
-    except Exception as e:
-        error_result = f"""
+
+def _render_error(question: str, e: Exception) -> Tuple[str, str]:
+    """오류 markdown 및 상태 텍스트 생성"""
+    error_result = f"""
 ### ❌ 처리 중 오류 발생
 
 **오류 메시지:** {str(e)}
@@ -393,19 +1187,300 @@ def nutrition_assistant_with_status(question: str) -> Generator[Tuple[str, str],
 죄송합니다. 처리 중 오류가 발생했습니다.
 다른 질문으로 다시 시도해주세요.
         """
+    return error_result, f"❌ 오류 발생: {str(e)}"
+
+# 요청별 trace 를 JSON 으로 저장할 디렉토리 (비어 있으면 저장하지 않음)
+TRACE_DIR = os.getenv("NUTRITION_TRACE_DIR", "")
+
+def _status_tracker(request_started: Optional[float] = None) -> Tuple[dict, dict]:
+    """
+    요청별 진행 상태 저장소와 graph config 생성
+
+    Args:
+        request_started: 요청 도착 시각 (perf_counter, 입장 대기 시간을 대기/처리 시간에 포함하기 위해 전달)
+    """
+    current_status = {"node": "", "description": "", "progress": 0}
+    if request_started is None:
+        request_started = time.perf_counter()
+
+    def status_update_callback(node_name: str, description: str, progress: int):
+        """상태 업데이트 콜백"""
+        if not current_status["node"]:
+            # 첫 노드가 시작되기까지의 대기 시간
+            registry.observe("nutrition_queue_wait_seconds", time.perf_counter() - request_started)
+        current_status.update({
+            "node": node_name,
+            "description": description,
+            "progress": progress
+        })
+
+    trace = [] if TRACE_DIR else None
+
+    # 요청별 콜백은 전역 변수 대신 graph config 로 전달
+    config = {
+        "configurable": {
+            "status_callback": status_update_callback,
+            "trace": trace,
+            "request_started": request_started,
+        },
+        "callbacks": [TokenUsageCallback(trace)],
+    }
+    return current_status, config
+
+def _finish_request(question: str, config: dict, outcome: str):
+    """요청 처리 시간 기록 및 trace 저장"""
+    configurable = config["configurable"]
+    total = time.perf_counter() - configurable["request_started"]
+    registry.observe("nutrition_request_duration_seconds", total, outcome=outcome)
+    if configurable["trace"] is not None:
+        try:
+            path = dump_trace(TRACE_DIR, question, configurable["trace"], total)
+            logger.info("<finish_request> Trace saved: %s", path)
+        except OSError as e:
+            logger.warning("<finish_request> Failed to save trace: %s", e)
+
+def _render_queued(question: str, position: int) -> Tuple[str, str]:
+    """대기열 안내 markdown 및 상태 텍스트 생성"""
+    queued_result = f"""
+### ⏳ 대기 중입니다...
+
+**질문:** {question}
+
+요청이 많아 잠시 대기하고 있습니다. 순서가 되면 자동으로 분석을 시작합니다.
+        """
+    return queued_result, f"⏳ 대기 중... (앞선 요청 {position}개)"
+
+def _render_rejected(question: str, reason: str) -> Tuple[str, str]:
+    """입장 거절 markdown 및 상태 텍스트 생성"""
+    if reason == "client_limit":
+        message = "이전 질문의 분석이 아직 진행 중입니다. 완료된 뒤 다시 시도해주세요."
+    else:
+        message = "지금은 요청이 많아 질문을 처리할 수 없습니다. 잠시 후 다시 시도해주세요."
+    rejected_result = f"""
+### 🚦 요청이 많습니다
+
+**질문:** {question}
+
+{message}
+        """
+    return rejected_result, "🚦 요청이 많아 처리하지 못했습니다."
+
+def _admission_rejected(question: str, e: AdmissionRejected, request_started: float) -> Tuple[str, str]:
+    """입장 거절 기록 및 화면 출력 생성"""
+    logger.info("<admission> Rejected (%s): %s", e.reason, question)
+    registry.inc("nutrition_admission_total", result=e.reason)
+    registry.observe("nutrition_request_duration_seconds", time.perf_counter() - request_started, outcome="rejected")
+    return _render_rejected(question, e.reason)
+
+def _run_graph(question: str, request_started: float) -> Generator[Tuple[str, str], None, None]:
+    """그래프를 실행하며 진행 상태와 최종 결과를 차례로 생성"""
+    current_status, config = _status_tracker(request_started)
+    
+    try:
+        # 그래프 스트리밍 실행
+        final_state = None
+        partial_answer = ""
+        
+        for mode, chunk in get_graph().stream(_initial_state(question), config=config, stream_mode=STREAM_MODES):
+            if mode == "messages":
+                # 답변 토큰은 도착하는 즉시 표시
+                token = _answer_token(chunk)
+                if token:
+                    partial_answer += token
+                    yield _render_partial_answer(question, current_status, final_state or {}, partial_answer)
+                continue
+            
+            # chunk는 {node_name: updated_state} 형태
+            node_name = list(chunk.keys())[0]
+            final_state = chunk[node_name]
+            if not partial_answer:
+                yield _render_progress(current_status, final_state)
         
-        yield error_result, f"❌ 오류 발생: {str(e)}"
+        # 최종 완료 상태 업데이트
+        update_status(config, "completed", "✅ 분석 완료!", 100)
+        cache_store(question, final_state)
+        _finish_request(question, config, "ok")
+        yield _render_final(question, final_state), "✅ 분석 완료!"
+        
+    except Exception as e:
+        _finish_request(question, config, "error")
+        yield _render_error(question, e)
+
+def _answer_question(question: str, client: str) -> Generator[Tuple[str, str], None, None]:
+    """캐시 조회 -> 입장 제어 -> 그래프 실행 (같은 질문의 동시 요청은 이 함수를 한 번만 실행)"""
+    # 입장 대기 시간도 nutrition_queue_wait_seconds / 요청 처리 시간에 포함
+    request_started = time.perf_counter()
+    cached = cache_lookup(question)
+    if cached:
+        yield _render_final(question, {**_initial_state(question), **cached}), "✅ 분석 완료! (캐시)"
+        return
+
+    if admission is None:
+        yield from _run_graph(question, request_started)
+        return
+
+    try:
+        ticket = admission.enter(client)
+    except AdmissionRejected as e:
+        yield _admission_rejected(question, e, request_started)
+        return
+    try:
+        if not ticket.admitted:
+            yield _render_queued(question, ticket.position)
+            ticket.wait()
+        registry.inc("nutrition_admission_total", result="admitted")
+        yield from _run_graph(question, request_started)
+    except AdmissionRejected as e:
+        yield _admission_rejected(question, e, request_started)
+    finally:
+        ticket.release()
+
+def nutrition_assistant_with_status(question: str, client: str = "") -> Generator[Tuple[str, str], None, None]:
+    """
+    실시간 상태 업데이트가 포함된 영양소 분석 함수
+
+    Args:
+        question: 사용자 질문
+        client: 입장 제어에서 클라이언트를 구분하는 키 (Gradio 요청의 접속 주소)
+    """
+    
+    if not question.strip():
+        yield "질문을 입력해주세요.", "❌ 빈 질문입니다."
+        return
+    
+    if single_flight is None:
+        yield from _answer_question(question, client)
+        return
     
+    # 같은 질문이 이미 처리 중이면 새로 실행하지 않고 그 진행 상황과 결과를 함께 받음
+    yield from single_flight.run(normalize_question(question), lambda: _answer_question(question, client))
+
+async def _run_graph_async(question: str, request_started: float) -> AsyncGenerator[Tuple[str, str], None]:
+    """_run_graph 의 비동기 버전 (graph.astream 사용)"""
+    current_status, config = _status_tracker(request_started)
+
+    try:
+        final_state = None
+        partial_answer = ""
+
+        async for mode, chunk in get_graph(use_async=True).astream(_initial_state(question), config=config, stream_mode=STREAM_MODES):
+            if mode == "messages":
+                token = _answer_token(chunk)
+                if token:
+                    partial_answer += token
+                    yield _render_partial_answer(question, current_status, final_state or {}, partial_answer)
+                continue
+
+            node_name = list(chunk.keys())[0]
+            final_state = chunk[node_name]
+            if not partial_answer:
+                yield _render_progress(current_status, final_state)
+
+        update_status(config, "completed", "✅ 분석 완료!", 100)
+        await asyncio.to_thread(cache_store, question, final_state)
+        _finish_request(question, config, "ok")
+        yield _render_final(question, final_state), "✅ 분석 완료!"
+
+    except Exception as e:
+        _finish_request(question, config, "error")
+        yield _render_error(question, e)
+
+async def _answer_question_async(question: str, client: str) -> AsyncGenerator[Tuple[str, str], None]:
+    """_answer_question 의 비동기 버전"""
+    request_started = time.perf_counter()
+    cached = await asyncio.to_thread(cache_lookup, question)
+    if cached:
+        yield _render_final(question, {**_initial_state(question), **cached}), "✅ 분석 완료! (캐시)"
+        return
+
+    if admission is None:
+        async for output in _run_graph_async(question, request_started):
+            yield output
+        return
+
+    try:
+        ticket = admission.enter(client)
+    except AdmissionRejected as e:
+        yield _admission_rejected(question, e, request_started)
+        return
+    try:
+        if not ticket.admitted:
+            yield _render_queued(question, ticket.position)
+            await ticket.wait_async()
+        registry.inc("nutrition_admission_total", result="admitted")
+        async for output in _run_graph_async(question, request_started):
+            yield output
+    except AdmissionRejected as e:
+        yield _admission_rejected(question, e, request_started)
     finally:
-        # 콜백 정리
-        set_status_callback(None)
+        ticket.release()
+
+async def nutrition_assistant_with_status_async(question: str, client: str = "") -> AsyncGenerator[Tuple[str, str], None]:
+    """nutrition_assistant_with_status 의 비동기 버전 (graph.astream 사용)"""
+
+    if not question.strip():
+        yield "질문을 입력해주세요.", "❌ 빈 질문입니다."
+        return
+
+    if async_single_flight is None:
+        outputs = _answer_question_async(question, client)
+    else:
+        outputs = async_single_flight.run(normalize_question(question), lambda: _answer_question_async(question, client))
+    async for output in outputs:
+        yield output
 
 ##################################################################
 # Gradio 인터페이스
 ##################################################################
 
+def _handler_concurrency_limit() -> Optional[int]:
+    """
+    질문 처리 이벤트의 Gradio concurrency_limit
+
+    - 입장 제어 없음: CONCURRENCY_LIMIT
+    - 입장 제어 + async 핸들러: 대기(wait_async)가 이벤트 루프에서 이루어지므로 제한 없음
+      (같은 질문에 합류한 요청과 대기 중인 요청도 바로 진행 상황을 받을 수 있도록)
+    - 입장 제어 + sync 핸들러: 대기 중에도 Gradio 작업 스레드를 점유하므로 실행+대기 수로 제한
+      (그 이상은 어차피 AdmissionController 가 거절하므로 Gradio 큐에서 대기)
+    """
+    if admission is None:
+        return CONCURRENCY_LIMIT
+    if ASYNC_MODE:
+        return None
+    return CONCURRENCY_LIMIT + QUEUE_DEPTH
+
 def create_gradio_interface():
     """Gradio 인터페이스 생성"""
+    import gradio as gr
+
+    def client_key(request: gr.Request) -> str:
+        """
+        입장 제어용 클라이언트 키
+
+        X-Forwarded-For 의 앞쪽 주소는 클라이언트가 임의로 넣을 수 있으므로 사용하지 않고,
+        TRUSTED_PROXY_HOPS 개의 프록시 뒤에서는 가장 바깥 프록시가 덧붙인 주소를 사용
+        """
+        if request is None:
+            return ""
+        if TRUSTED_PROXY_HOPS > 0:
+            hops = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+            if len(hops) >= TRUSTED_PROXY_HOPS:
+                return hops[-TRUSTED_PROXY_HOPS]
+        if request.client is not None and request.client.host:
+            return request.client.host
+        return request.session_hash or ""
+
+    def sync_handler(question: str, request: gr.Request):
+        yield from nutrition_assistant_with_status(question, client_key(request))
+
+    async def async_handler(question: str, request: gr.Request):
+        async for output in nutrition_assistant_with_status_async(question, client_key(request)):
+            yield output
+
+    # NUTRITION_ASYNC=1 이면 async generator 핸들러 사용
+    handler = async_handler if ASYNC_MODE else sync_handler
+    concurrency_limit = _handler_concurrency_limit()
+
     with gr.Blocks(
         title="🍎 식품성분 영양소 조회 어시스턴트",
         theme=gr.themes.Soft()
@@ -476,24 +1551,36 @@ def create_gradio_interface():
         
         # 버튼 클릭 이벤트 - Generator 함수 연결
         analyze_btn.click(
-            fn=nutrition_assistant_with_status,
+            fn=handler,
             inputs=question_input,
-            outputs=[result_output, status_display]
+            outputs=[result_output, status_display],
+            concurrency_limit=concurrency_limit,
+            concurrency_id="analyze"
         )
         
         # Enter 키 지원
         question_input.submit(
-            fn=nutrition_assistant_with_status,
+            fn=handler,
             inputs=question_input,
-            outputs=[result_output, status_display]
+            outputs=[result_output, status_display],
+            concurrency_limit=concurrency_limit,
+            concurrency_id="analyze"
         )
     
     return demo
 
+# 모듈 import 시간 (리소스는 AppContext 에서 처음 사용할 때 생성)
+startup_timings["import:total"] = time.perf_counter() - _import_started
+
 if __name__ == "__main__":
+    if PREWARM_MODE != "off":
+        prewarm(background=PREWARM_MODE == "background")
     demo = create_gradio_interface()
+    # sync 핸들러의 실행+대기 요청이 작업 스레드를 모두 차지하지 않도록 여유 스레드 확보
+    handler_limit = _handler_concurrency_limit() or 0
     demo.launch(
         server_name="0.0.0.0",
         server_port=7860,
-        share=False
+        share=False,
+        max_threads=max(40, handler_limit + 8)
     )
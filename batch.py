@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+영양소 질문 일괄 처리
+
+JSONL 파일의 질문들을 컴파일된 그래프로 동시에 처리하고, 끝나는 순서대로 결과를 JSONL 로 기록한다.
+같은 질문은 한 번만 실행하며, 동시에 실행되는 그래프 수(= 동시 LLM 요청 수)는 --concurrency 로 제한된다.
+초당 LLM 요청 수 제한이 필요하면 NUTRITION_LLM_RPS 를 함께 설정한다.
+
+입력 형식 (한 줄에 하나): {"id": "q1", "question": "비타민C가 가장 많은 식품 5개는?"} 또는 "질문 문자열"
+출력 형식: 입력 필드 + question, status(ok/unsupported/error), answer, query, score, result, cached, error
+
+사용법: python batch.py questions.jsonl [-o answers.jsonl] [--concurrency 8] [--async]
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+import app
+from answer_cache import normalize_question
+from metrics import TokenUsageCallback
+
+# 동시에 실행할 기본 그래프 수
+DEFAULT_CONCURRENCY = 8
+
+##################################################################
+# 입력 처리
+##################################################################
+
+def load_questions(path: str) -> List[Dict]:
+    """
+    JSONL 파일에서 질문 레코드 읽기
+
+    Returns:
+        {"id": ..., "question": ..., (기타 입력 필드)} 목록 (id 가 없으면 줄 번호)
+    """
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            record = {"question": item} if isinstance(item, str) else dict(item)
+            if not isinstance(record.get("question"), str):
+                raise ValueError(f"{path}:{line_no}: question 필드가 없습니다")
+            record.setdefault("id", line_no)
+            records.append(record)
+    return records
+
+
+def _group_records(records: List[Dict]) -> Dict[str, List[Dict]]:
+    """정규화된 질문별 레코드 목록 (입력 순서 유지)"""
+    groups: Dict[str, List[Dict]] = {}
+    for record in records:
+        groups.setdefault(normalize_question(record["question"]), []).append(record)
+    return groups
+
+##################################################################
+# 결과 생성
+##################################################################
+
+def _make_result(record: Dict, state: Optional[Dict], cached: bool = False, error: Optional[Exception] = None) -> Dict:
+    """입력 레코드와 그래프 최종 상태로 출력 레코드 생성"""
+    state = state or {}
+    if error is not None:
+        status = "error"
+    elif state.get("current_node") == "unsupported_data":
+        status = "unsupported"
+    else:
+        status = "ok"
+    return {
+        **record,
+        "status": status,
+        "answer": state.get("answer", ""),
+        "query": state.get("query", ""),
+        "score": state.get("score", 0.0),
+        "result": state.get("result", ""),
+        "cached": cached,
+        "error": str(error) if error is not None else None,
+    }
+
+
+def _graph_config(concurrency: int) -> Dict:
+    """배치 실행용 graph config (max_concurrency 로 동시 실행 그래프 수 제한)"""
+    return {
+        "configurable": {},
+        "callbacks": [TokenUsageCallback()],
+        "max_concurrency": concurrency,
+    }
+
+##################################################################
+# 배치 실행
+##################################################################
+
+def run_batch(records: List[Dict], concurrency: int = DEFAULT_CONCURRENCY) -> Iterator[Dict]:
+    """
+    질문 레코드를 동기 그래프로 일괄 처리 (Runnable.batch_as_completed)
+
+    Args:
+        records: load_questions() 형식의 질문 레코드 목록
+        concurrency: 동시에 실행할 최대 그래프 수
+
+    Returns:
+        끝나는 순서대로 출력 레코드를 반환하는 iterator (중복 질문은 같은 결과를 각 레코드에 기록)
+    """
+    groups = _group_records(records)
+    questions = list(groups)
+
+    # 답변 캐시 조회 (캐시 미사용 시 바로 None)
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch-cache") as executor:
+        cached = list(executor.map(app.cache_lookup, questions))
+
+    pending = []
+    for question, hit in zip(questions, cached):
+        if hit:
+            state = {**app._initial_state(question), **hit}
+            for record in groups[question]:
+                yield _make_result(record, state, cached=True)
+        else:
+            pending.append(question)
+
+    if not pending:
+        return
+    inputs = [app._initial_state(question) for question in pending]
+    outputs = app.get_graph().batch_as_completed(inputs, config=_graph_config(concurrency), return_exceptions=True)
+    for index, output in outputs:
+        question = pending[index]
+        if isinstance(output, Exception):
+            app.logger.warning("<run_batch> Question failed: %s (%s)", question, output)
+            results = [_make_result(record, None, error=output) for record in groups[question]]
+        else:
+            app.cache_store(question, output)
+            results = [_make_result(record, output) for record in groups[question]]
+        yield from results
+
+
+async def arun_batch(records: List[Dict], concurrency: int = DEFAULT_CONCURRENCY) -> AsyncIterator[Dict]:
+    """run_batch 의 비동기 버전 (비동기 그래프의 Runnable.abatch_as_completed 사용)"""
+    groups = _group_records(records)
+    questions = list(groups)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def lookup(question):
+        async with semaphore:
+            return await asyncio.to_thread(app.cache_lookup, question)
+
+    cached = await asyncio.gather(*(lookup(question) for question in questions))
+
+    pending = []
+    for question, hit in zip(questions, cached):
+        if hit:
+            state = {**app._initial_state(question), **hit}
+            for record in groups[question]:
+                yield _make_result(record, state, cached=True)
+        else:
+            pending.append(question)
+
+    if not pending:
+        return
+    inputs = [app._initial_state(question) for question in pending]
+    outputs = app.get_graph(use_async=True).abatch_as_completed(
+        inputs, config=_graph_config(concurrency), return_exceptions=True
+    )
+    async for index, output in outputs:
+        question = pending[index]
+        if isinstance(output, Exception):
+            app.logger.warning("<arun_batch> Question failed: %s (%s)", question, output)
+            results = [_make_result(record, None, error=output) for record in groups[question]]
+        else:
+            await asyncio.to_thread(app.cache_store, question, output)
+            results = [_make_result(record, output) for record in groups[question]]
+        for result in results:
+            yield result
+
+##################################################################
+# 메인
+##################################################################
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="영양소 질문 일괄 처리")
+    parser.add_argument("input", help="질문 JSONL 파일")
+    parser.add_argument("-o", "--output", help="결과 JSONL 파일 (기본값: <input>.answers.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="동시에 실행할 최대 질문 수")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="비동기 그래프(abatch) 사용")
+    parser.add_argument("--log-level", default="WARNING", help="nutrition_assistant 로그 레벨")
+    args = parser.parse_args()
+
+    app.logger.setLevel(args.log_level)
+    output_path = args.output or re.sub(r"\.jsonl$", "", args.input) + ".answers.jsonl"
+
+    records = load_questions(args.input)
+    unique = len(_group_records(records))
+    print(f"질문 {len(records)}개 (중복 제외 {unique}개), 동시 실행 {args.concurrency}")
+
+    started = time.perf_counter()
+    counts: Dict[str, int] = {}
+    with open(output_path, "w", encoding="utf-8") as f:
+        def write(result):
+            # 끝나는 즉시 기록하여 중간에 중단되어도 완료된 결과는 남도록 함
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            f.flush()
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+
+        if args.use_async:
+            async def consume():
+                async for result in arun_batch(records, args.concurrency):
+                    write(result)
+            asyncio.run(consume())
+        else:
+            for result in run_batch(records, args.concurrency):
+                write(result)
+
+    elapsed = time.perf_counter() - started
+    print(f"완료: {counts} ({elapsed:.1f}초, {unique / elapsed if elapsed else 0.0:.2f} questions/s)")
+    print(f"결과: {output_path}")
+    return 1 if counts.get("error") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+텍스트-SQL 파이프라인 오프라인 벤치마크
+
+FakeChatModel 로 LLM 호출을 대체하여 네트워크 없이 노드별 지연 시간(p50/p95/p99)과
+동시 세션 수에 따른 처리량을 측정한다.
+
+사용법: python benchmark.py [--requests 50] [--concurrency 1,4,16] [--latency 0.05] [--async]
+        [--slow-rate 0.05 --slow-latency 1.0] [--failure-rate 0.02]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+# app 모듈이 외부 서비스 없이 로드되도록 설정
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+os.environ.setdefault("NUTRITION_ANSWER_CACHE", "0")
+# 코퍼스 질문 대부분이 템플릿과 일치하므로 기본값은 LLM 경로 측정 (템플릿 경로는 =1 로 측정)
+os.environ.setdefault("NUTRITION_TEMPLATE_ROUTER", "0")
+
+##################################################################
+# 질문 코퍼스 (create_gradio_interface 의 gr.Examples 기반)
+##################################################################
+
+CORPUS = {
+    "조리가공식품 중 칼로리가 가장 높은 식품 5개는?": {
+        "query": 'SELECT "가식부_100g_당_식품명", "일반성분_Proximates_에너지_kcal" FROM nutrition_data '
+                 "WHERE \"식품군\" = '조리가공식품류' ORDER BY \"일반성분_Proximates_에너지_kcal\" DESC LIMIT 5",
+        "columns": ["가식부_100g_당_식품명", "일반성분_Proximates_에너지_kcal"],
+    },
+    "짜장라면과 볶음라면의 당류 함량과 에너지 함량은?": {
+        "query": 'SELECT "가식부_100g_당_식품명", "일반성분_Proximates_당류_g", "일반성분_Proximates_에너지_kcal" '
+                 "FROM nutrition_data WHERE \"가식부_100g_당_식품명\" LIKE '%짜장라면%' "
+                 "OR \"가식부_100g_당_식품명\" LIKE '%볶음라면%' LIMIT 10",
+        "columns": ["가식부_100g_당_식품명", "일반성분_Proximates_당류_g", "일반성분_Proximates_에너지_kcal"],
+    },
+    "연잎밥에 들어있는 모든 영양소는?": {
+        "query": "SELECT * FROM nutrition_data WHERE \"가식부_100g_당_식품명\" = '연잎밥' LIMIT 10",
+        "columns": ["가식부_100g_당_식품명"],
+    },
+    "비타민C가 가장 많은 식품 5개는?": {
+        "query": 'SELECT "가식부_100g_당_식품명", "비타민_Vitamins_비타민_C_mg" FROM nutrition_data '
+                 'ORDER BY "비타민_Vitamins_비타민_C_mg" DESC LIMIT 5',
+        "columns": ["가식부_100g_당_식품명", "비타민_Vitamins_비타민_C_mg"],
+    },
+    "오메가3가 가장 많은 식품 5개는?": {
+        "query": 'SELECT "가식부_100g_당_식품명", "지방산_Fatty_acids_오메가3_지방산_g" FROM nutrition_data '
+                 'ORDER BY "지방산_Fatty_acids_오메가3_지방산_g" DESC LIMIT 5',
+        "columns": ["가식부_100g_당_식품명", "지방산_Fatty_acids_오메가3_지방산_g"],
+    },
+    "상위 5개 요오드가 높은 식품은?": {
+        "query": 'SELECT "가식부_100g_당_식품명", "무기질_Minerals_요오드_μg" FROM nutrition_data '
+                 'ORDER BY "무기질_Minerals_요오드_μg" DESC LIMIT 5',
+        "columns": ["가식부_100g_당_식품명", "무기질_Minerals_요오드_μg"],
+    },
+    "칼슘이 풍부한 유제품 종류는?": {
+        "query": 'SELECT "가식부_100g_당_식품명", "무기질_Minerals_칼슘_mg" FROM nutrition_data '
+                 "WHERE \"식품군\" = '우유 및 그 제품' ORDER BY \"무기질_Minerals_칼슘_mg\" DESC LIMIT 10",
+        "columns": ["가식부_100g_당_식품명", "무기질_Minerals_칼슘_mg"],
+    },
+    "채소류 중 식이섬유가 가장 많은 식품은?": {
+        "query": 'SELECT "가식부_100g_당_식품명", "일반성분_Proximates_총_식이섬유_g" FROM nutrition_data '
+                 "WHERE \"식품군\" = '채소류' ORDER BY \"일반성분_Proximates_총_식이섬유_g\" DESC LIMIT 1",
+        "columns": ["가식부_100g_당_식품명", "일반성분_Proximates_총_식이섬유_g"],
+    },
+    "통풍에 가장 안좋은 식품은?": {
+        "query": 'SELECT "가식부_100g_당_식품명", "일반성분_Proximates_푸린_mg" FROM nutrition_data '
+                 'ORDER BY "일반성분_Proximates_푸린_mg" DESC LIMIT 10',
+        "score": 0.1,
+        "columns": ["가식부_100g_당_식품명", "일반성분_Proximates_푸린_mg"],
+    },
+}
+
+##################################################################
+# 통계 유틸리티
+##################################################################
+
+def percentile(values: List[float], p: float) -> float:
+    """nearest-rank 방식 백분위수"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(p / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def format_table(title: str, samples: Dict[str, List[float]]) -> str:
+    """이름별 지연 시간(ms) p50/p95/p99 표 생성"""
+    lines = [f"\n=== {title} ===", f"{'name':<24}{'n':>6}{'p50(ms)':>12}{'p95(ms)':>12}{'p99(ms)':>12}"]
+    for name, values in samples.items():
+        lines.append(
+            f"{name:<24}{len(values):>6}"
+            f"{percentile(values, 50) * 1000:>12.2f}"
+            f"{percentile(values, 95) * 1000:>12.2f}"
+            f"{percentile(values, 99) * 1000:>12.2f}"
+        )
+    return "\n".join(lines)
+
+##################################################################
+# 파이프라인 준비
+##################################################################
+
+def install_fake_llm(app, latency: float, jitter: float, seed: int,
+                     slow_rate: float = 0.0, slow_latency: float = 0.0, failure_rate: float = 0.0):
+    """app 컨텍스트의 LLM 과 체인을 FakeChatModel 로 교체 (slow_rate/failure_rate: 지연 호출/일시적 오류 주입)"""
+    from fake_llm import FakeChatModel
+
+    fake = FakeChatModel(canned=CORPUS, latency=latency, jitter=jitter, seed=seed,
+                         slow_rate=slow_rate, slow_latency=slow_latency, failure_rate=failure_rate)
+    context = app.context
+    context.llm = fake
+    context.structured_query_llm = fake.with_structured_output(app.QueryOutput, include_raw=True)
+    context.structured_evaluate_llm = fake.with_structured_output(app.EvaluateOutput)
+    context.gpt_sql = app.create_query_chain(fake, k=10)  # NUTRITION_SINGLE_PASS_SQL=0 일 때만 사용
+    return fake
+
+
+def bench_setup(app, repeat: int = 20) -> Dict[str, List[float]]:
+    """그래프 컴파일, 스키마 읽기, SQL 실행, 결과 포맷 등 LLM 외 구간 측정"""
+    samples = defaultdict(list)
+    queries = [item["query"] for item in CORPUS.values()]
+    for _ in range(repeat):
+        started = time.perf_counter()
+        app.create_graph()
+        samples["graph_compile"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        app.schema_index._load()
+        samples["schema_reflection"].append(time.perf_counter() - started)
+
+        for query in queries:
+            started = time.perf_counter()
+            result = app.execute_sql(query)
+            samples["sql_execute"].append(time.perf_counter() - started)
+
+            state = {**app._initial_state("benchmark"), "query": query, "result": result, "answer": "-"}
+            started = time.perf_counter()
+            app._render_final("benchmark", state)
+            samples["result_format"].append(time.perf_counter() - started)
+    return samples
+
+##################################################################
+# 세션 실행
+##################################################################
+
+def _run_session_sync(app, question: str, samples: Dict[str, List[float]]):
+    """그래프를 한 번 실행하며 노드별 소요 시간 기록 (노드 완료 이벤트 간격)"""
+    config = {"configurable": {}}
+    started = last = time.perf_counter()
+    for update in app.get_graph().stream(app._initial_state(question), config=config):
+        now = time.perf_counter()
+        samples[list(update.keys())[0]].append(now - last)
+        last = now
+    samples["end_to_end"].append(time.perf_counter() - started)
+
+
+async def _run_session_async(app, question: str, samples: Dict[str, List[float]]):
+    config = {"configurable": {}}
+    started = last = time.perf_counter()
+    async for update in app.get_graph(use_async=True).astream(app._initial_state(question), config=config):
+        now = time.perf_counter()
+        samples[list(update.keys())[0]].append(now - last)
+        last = now
+    samples["end_to_end"].append(time.perf_counter() - started)
+
+
+def run_sessions(app, questions: List[str], concurrency: int, use_async: bool):
+    """
+    concurrency 개의 동시 세션으로 질문 목록 실행
+
+    Returns:
+        (노드별 지연 시간, 초당 처리 질문 수)
+    """
+    samples = defaultdict(list)
+    started = time.perf_counter()
+
+    if use_async:
+        async def main():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one(question):
+                async with semaphore:
+                    await _run_session_async(app, question, samples)
+
+            await asyncio.gather(*(one(question) for question in questions))
+
+        asyncio.run(main())
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda question: _run_session_sync(app, question, samples), questions))
+
+    elapsed = time.perf_counter() - started
+    return samples, len(questions) / elapsed if elapsed else 0.0
+
+##################################################################
+# 메인
+##################################################################
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="텍스트-SQL 파이프라인 오프라인 벤치마크")
+    parser.add_argument("--requests", type=int, default=45, help="동시성 단계별 실행할 질문 수")
+    parser.add_argument("--concurrency", default="1,4,16", help="동시 세션 수 목록 (쉼표 구분)")
+    parser.add_argument("--latency", type=float, default=0.05, help="LLM 호출 지연 시간 중앙값(초)")
+    parser.add_argument("--jitter", type=float, default=0.3, help="지연 시간 로그정규 sigma")
+    parser.add_argument("--seed", type=int, default=0, help="지연 시간 난수 seed")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="slow-latency 만큼 늦게 응답하는 LLM 호출 비율")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="늦은 LLM 호출의 지연 시간(초)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="일시적 오류로 실패하는 LLM 호출 비율")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="비동기 그래프(astream) 사용")
+    parser.add_argument("--setup-repeat", type=int, default=20, help="LLM 외 구간 반복 측정 횟수")
+    parser.add_argument("--log-level", default="WARNING", help="nutrition_assistant 로그 레벨")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    import app
+    import_time = time.perf_counter() - started
+    print(f"app import: {import_time * 1000:.1f} ms")
+    logging.getLogger("nutrition_assistant").setLevel(args.log_level)
+
+    install_fake_llm(app, args.latency, args.jitter, args.seed, args.slow_rate, args.slow_latency, args.failure_rate)
+    app.prewarm(background=False)
+    print("\n=== startup (import / lazy init) ===")
+    print(app.format_startup_report())
+    print(format_table("setup / non-LLM stages", bench_setup(app, args.setup_repeat)))
+
+    corpus = list(CORPUS)
+    questions = [corpus[i % len(corpus)] for i in range(args.requests)]
+    for concurrency in [int(value) for value in args.concurrency.split(",") if value]:
+        # 단계마다 결과 캐시를 비워 SQL 실행 비용이 포함되도록 함
+        app.result_cache.clear()
+        samples, throughput = run_sessions(app, questions, concurrency, args.use_async)
+        mode = "async" if args.use_async else "sync"
+        print(format_table(f"{mode} sessions, concurrency={concurrency}", samples))
+        print(f"throughput: {throughput:.2f} questions/s")
+    print("\n=== LLM call policy ===")
+    for node_name, policy in app.llm_policies.items():
+        print(f"{node_name:<24}{policy.stats()}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from question_router import build_nutrient_aliases
+from schema_index import SchemaIndex
+
+# 질문 단어 끝에 붙는 조사 (긴 것부터 제거, 한 글자 영양소 이름 비교용)
+_PARTICLES = sorted(["에는", "으로", "이", "가", "은", "는", "을", "를", "의", "에", "도", "만", "과", "와"],
+                    key=len, reverse=True)
+
+_WORD_PATTERN = re.compile(r"[0-9A-Za-z가-힣]+")
+
+# "비타민_Vitamins_..." 같은 컬럼 카테고리 접두어 (한국어, 영어)
+_CATEGORY_PATTERN = re.compile(r"^([가-힣]+)_([A-Z][a-z]+(?:_[a-z]+)?)_")
+
+
+def _normalize(text: str) -> str:
+    """별칭 비교용 정규화 (공백/하이픈 제거, 소문자)"""
+    return re.sub(r"[\s\-]+", "", text).lower()
+
+
+def _words(question: str) -> List[str]:
+    """조사를 제거한 질문 단어 목록 ("철이" -> "철")"""
+    words = []
+    for word in _WORD_PATTERN.findall(question.lower()):
+        for particle in _PARTICLES:
+            if word.endswith(particle) and len(word) > len(particle):
+                word = word[: -len(particle)]
+                break
+        words.append(word)
+    return words
+
+
+class ColumnRetriever:
+    """
+    질문과 관련된 컬럼만 골라 SQL 생성 프롬프트의 스키마를 줄이는 검색기
+
+    스키마의 컬럼 이름(라벨, 단위 제외)과 카테고리로 별칭 인덱스를 한 번 만들고 (DB 변경 시 다시 생성),
+    질문에 언급된 영양소 컬럼 상위 top_k 개와 텍스트 컬럼(식품군/식품명/출처)을 선택한다.
+    관련 컬럼을 하나도 찾지 못한 질문("모든 영양소", "통풍에 안좋은" 등)은 None 을 반환하여
+    전체 스키마를 그대로 사용하도록 한다.
+    """
+
+    def __init__(self, schema_index: SchemaIndex, top_k: int = 8):
+        """
+        Args:
+            schema_index: 컬럼 목록/테이블 설명을 제공하는 스키마 인덱스
+            top_k: 별칭으로 선택할 최대 영양소 컬럼 수 (카테고리 언급으로 추가되는 컬럼 제외)
+        """
+        self.schema_index = schema_index
+        self.top_k = top_k
+
+        self.aliases: Dict[str, str] = {}            # 정규화된 별칭 -> 컬럼
+        self.categories: Dict[str, List[str]] = {}   # 정규화된 카테고리 이름 -> 컬럼 목록
+        self.key_columns: List[str] = []             # 항상 포함할 텍스트 컬럼
+        self._columns: Optional[Dict[str, str]] = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """스키마가 바뀌었으면 별칭/카테고리 인덱스 다시 생성"""
+        self.schema_index.refresh_if_changed()
+        columns = self.schema_index.columns
+        if columns is self._columns:
+            return
+        with self._lock:
+            if columns is self._columns:
+                return
+            categories: Dict[str, List[str]] = {}
+            for column, dtype in columns.items():
+                if dtype != "REAL":
+                    continue
+                match = _CATEGORY_PATTERN.match(column)
+                if match:
+                    for name in (match.group(1), match.group(2)):
+                        categories.setdefault(_normalize(name), []).append(column)
+            self.aliases = build_nutrient_aliases(columns)
+            self.categories = categories
+            self.key_columns = [column for column, dtype in columns.items() if dtype == "TEXT"]
+            self._columns = columns
+
+    def _match(self, question: str) -> Tuple[Dict[str, int], Set[str]]:
+        """별칭으로 일치한 컬럼별 점수(별칭 길이)와 카테고리 언급으로 일치한 컬럼"""
+        self._refresh()
+        text = _normalize(question)
+        words = set(_words(question))
+
+        scores: Dict[str, int] = {}
+        matched = []
+        for alias, column in self.aliases.items():
+            if (alias in text) if len(alias) >= 2 else (alias in words):
+                scores[column] = max(scores.get(column, 0), len(alias))
+                matched.append(alias)
+
+        category_columns: Set[str] = set()
+        for category, columns in self.categories.items():
+            # "오메가3 지방산" 처럼 영양소 이름의 일부인 경우는 카테고리 언급으로 보지 않음
+            if category in text and not any(category in alias for alias in matched):
+                category_columns.update(columns)
+        return scores, category_columns
+
+    def retrieve(self, question: str) -> Optional[List[str]]:
+        """
+        질문과 관련된 컬럼 선택
+
+        - 영양소 별칭이 질문에 포함되면 (긴 별칭일수록 높은 점수) 해당 컬럼
+        - 한 글자 영양소 ("철", "인") 는 조사를 제거한 단어와 정확히 같을 때만
+        - 카테고리 이름 ("비타민", "아미노산", "Minerals" 등) 이 언급되면 해당 카테고리의 모든 컬럼
+
+        Returns:
+            테이블 정의 순서의 컬럼 목록 (텍스트 컬럼 포함), 관련 컬럼이 없으면 None
+        """
+        scores, category_columns = self._match(question)
+        ranked = sorted(scores, key=lambda column: -scores[column])[: self.top_k]
+
+        selected = set(ranked) | category_columns
+        if not selected:
+            return None
+
+        selected.update(self.key_columns)
+        return [column for column in self._columns if column in selected]
+
+    def mentioned_columns(self, question: str) -> List[str]:
+        """질문에 언급된 영양소 컬럼 전체 (top_k 제한과 텍스트 컬럼 없이, 테이블 정의 순서)"""
+        scores, category_columns = self._match(question)
+        return [column for column in self._columns if column in scores or column in category_columns]
+
+    def table_info(self, question: str) -> str:
+        """질문에 맞게 줄인 프롬프트용 테이블 설명 (관련 컬럼이 없으면 전체 스키마)"""
+        return self.schema_index.get_table_info(self.retrieve(question))
@@ -0,0 +1,705 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+nutrition_data 테이블의 컬럼형(columnar) 메모리 매핑 저장소
+
+SQLite 테이블을 컬럼 단위 NumPy 배열 파일(.npy)로 변환해 두고 np.load(mmap_mode="r") 로
+읽어, 여러 워커 프로세스가 같은 읽기 전용 메모리 맵(OS 페이지 캐시)을 공유하도록 한다.
+"상위 N개", 필터, 집계처럼 단순한 SELECT 문은 벡터 연산으로 처리하고, 그 외 쿼리는
+None 을 반환하여 SQLite 에서 실행되도록 한다.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import uuid
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from result_cache import db_fingerprint
+
+MANIFEST_FILE = "manifest.json"
+
+##################################################################
+# 저장소 생성 / 로드
+##################################################################
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _build_store(db_path: str, table_name: str, target_dir: str, fingerprint: Tuple):
+    """SQLite 테이블을 읽어 컬럼형 배열 파일 생성 (임시 디렉터리에 만든 뒤 rename)"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        columns = [(row[1], (row[2] or "").upper()) for row in conn.execute(f"PRAGMA table_info({_quote(table_name)})")]
+        rows = conn.execute(f"SELECT * FROM {_quote(table_name)} ORDER BY rowid").fetchall()
+    finally:
+        conn.close()
+
+    layout, numeric, text = [], [], []
+    for i, (name, dtype) in enumerate(columns):
+        values = [row[i] for row in rows]
+        is_numeric = dtype in ("REAL", "INTEGER", "FLOAT", "DOUBLE", "NUMERIC") and all(
+            value is None or isinstance(value, float) for value in values
+        )
+        if is_numeric:
+            layout.append({"name": name, "kind": "num", "index": len(numeric)})
+            numeric.append([np.nan if value is None else value for value in values])
+        elif all(value is None or isinstance(value, str) for value in values):
+            layout.append({"name": name, "kind": "text", "index": len(text)})
+            text.append(values)
+        else:
+            # 정수/혼합 타입 컬럼은 SQLite 와 결과가 달라질 수 있어 조회 대상에서 제외
+            layout.append({"name": name, "kind": "other", "index": -1})
+
+    tmp_dir = f"{target_dir}.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp_dir)
+    try:
+        # (컬럼 수, 행 수) 배열: 한 컬럼의 값이 연속된 메모리에 저장됨
+        np.save(os.path.join(tmp_dir, "numeric.npy"), np.array(numeric, dtype=np.float64).reshape(len(numeric), len(rows)))
+        width = max([len(value) for values in text for value in values if value is not None] or [1])
+        np.save(os.path.join(tmp_dir, "text.npy"),
+                np.array([["" if value is None else value for value in values] for values in text], dtype=f"<U{width}").reshape(len(text), len(rows)))
+        np.save(os.path.join(tmp_dir, "text_null.npy"),
+                np.array([[value is None for value in values] for values in text], dtype=bool).reshape(len(text), len(rows)))
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump({"table": table_name, "fingerprint": list(fingerprint), "rows": len(rows), "columns": layout},
+                      f, ensure_ascii=False)
+        os.rename(tmp_dir, target_dir)
+    except OSError:
+        # 다른 프로세스가 먼저 생성한 경우 그 결과를 사용
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.exists(os.path.join(target_dir, MANIFEST_FILE)):
+            raise
+
+
+class ColumnarStore:
+    """
+    SQLite 테이블의 읽기 전용 컬럼형 사본
+
+    데이터베이스 파일의 mtime/size 로 만든 디렉터리에 배열 파일을 저장하므로,
+    같은 파일을 여는 프로세스들은 한 번 생성된 메모리 맵을 함께 사용한다.
+    데이터베이스가 변경되면 다음 조회 시 새로 생성한다.
+    """
+
+    def __init__(self, db_path: str, table_name: str, cache_dir: str = "data/columnar"):
+        """
+        Args:
+            db_path: SQLite 데이터베이스 파일 경로
+            table_name: 변환할 테이블 이름
+            cache_dir: 배열 파일을 저장할 디렉터리
+        """
+        self.db_path = db_path
+        self.table_name = table_name
+        self.cache_dir = cache_dir
+
+        self.columns: Dict[str, Dict] = {}  # 소문자 컬럼 이름 -> layout
+        self.column_order: List[str] = []
+        self.numeric = self.text = self.text_null = None
+        self.row_count = 0
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+        self.refresh_if_changed()
+
+    def _store_dir(self, fingerprint: Tuple) -> str:
+        digest = hashlib.sha1(repr((self.table_name, fingerprint)).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{self.table_name}-{digest}")
+
+    def refresh_if_changed(self):
+        """데이터베이스 파일이 변경되었으면 배열 파일을 다시 생성/로드"""
+        fingerprint = db_fingerprint(self.db_path)
+        if fingerprint == self._fingerprint:
+            return
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._load(fingerprint)
+                self._fingerprint = fingerprint
+
+    def _load(self, fingerprint: Tuple):
+        store_dir = self._store_dir(fingerprint)
+        if not os.path.exists(os.path.join(store_dir, MANIFEST_FILE)):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            _build_store(self.db_path, self.table_name, store_dir, fingerprint)
+            self._remove_stale(store_dir)
+
+        with open(os.path.join(store_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.numeric = np.load(os.path.join(store_dir, "numeric.npy"), mmap_mode="r")
+        self.text = np.load(os.path.join(store_dir, "text.npy"), mmap_mode="r")
+        self.text_null = np.load(os.path.join(store_dir, "text_null.npy"), mmap_mode="r")
+        self.row_count = manifest["rows"]
+        self.column_order = [column["name"] for column in manifest["columns"]]
+        self.columns = {column["name"].lower(): column for column in manifest["columns"]}
+
+    def _remove_stale(self, current_dir: str):
+        """이전 버전의 배열 파일 삭제 (이미 열린 메모리 맵은 계속 유효)"""
+        prefix = f"{self.table_name}-"
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(prefix) and path != current_dir and ".tmp-" not in name:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def column(self, name: str) -> Tuple[str, np.ndarray, np.ndarray]:
+        """컬럼 종류("num"/"text")와 값 배열, NULL 마스크 반환"""
+        layout = self.columns.get(name.lower())
+        if layout is None or layout["kind"] == "other":
+            raise _Unsupported(f"column {name}")
+        if layout["kind"] == "num":
+            values = self.numeric[layout["index"]]
+            return "num", values, np.isnan(values)
+        return "text", self.text[layout["index"]], self.text_null[layout["index"]]
+
+    def gather(self, names: List[str], index: np.ndarray) -> List[List]:
+        """선택된 행의 컬럼 값을 Python 값 목록으로 반환 (NULL 은 None)"""
+        layouts = [self.columns.get(name.lower()) for name in names]
+        if any(layout is None or layout["kind"] == "other" for layout in layouts):
+            raise _Unsupported("unknown column")
+
+        # 숫자 컬럼은 한 번의 fancy indexing 으로 모아서 변환
+        numeric_ids = sorted({layout["index"] for layout in layouts if layout["kind"] == "num"})
+        block = np.asarray(self.numeric[np.ix_(numeric_ids, index)]) if numeric_ids else None
+        numeric_values = {}
+        if block is not None:
+            nulls = np.isnan(block)
+            for position, column_id in enumerate(numeric_ids):
+                numeric_values[column_id] = [
+                    None if null else value for value, null in zip(block[position].tolist(), nulls[position].tolist())
+                ]
+
+        result = []
+        for layout in layouts:
+            if layout["kind"] == "num":
+                result.append(numeric_values[layout["index"]])
+            else:
+                values = self.text[layout["index"]][index].tolist()
+                nulls = self.text_null[layout["index"]][index].tolist()
+                result.append([None if null else value for value, null in zip(values, nulls)])
+        return result
+
+    def execute(self, query: str) -> Optional[Tuple[List[str], List[tuple]]]:
+        """
+        단순 SELECT 문을 벡터 연산으로 실행
+
+        Returns:
+            (컬럼 이름 목록, 행 목록), 지원하지 않는 쿼리는 None (SQLite 로 실행)
+        """
+        try:
+            statement = _Parser(query, self.table_name).parse()
+        except _Unsupported:
+            return None
+        self.refresh_if_changed()
+        try:
+            return _execute(self, statement)
+        except _Unsupported:
+            return None
+
+##################################################################
+# SQL 파서 (단일 테이블 SELECT 문의 일부 문법만 지원)
+##################################################################
+
+class _Unsupported(Exception):
+    """컬럼형 저장소로 처리할 수 없는 쿼리"""
+
+
+class _Token(NamedTuple):
+    kind: str  # word / ident / string / number / op
+    value: str
+    start: int
+    end: int
+
+
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<ident>"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])
+  | (?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<op><=|>=|<>|!=|==|[=<>(),*;.-])
+  | (?P<word>[^\W\d]\w*)
+""", re.VERBOSE)
+
+_KEYWORDS = {
+    "SELECT", "FROM", "WHERE", "GROUP", "BY", "ORDER", "LIMIT", "OFFSET", "AND", "OR", "NOT",
+    "LIKE", "IS", "NULL", "IN", "BETWEEN", "AS", "ASC", "DESC", "DISTINCT", "ALL", "HAVING",
+    "JOIN", "UNION", "ON", "USING", "CASE", "ESCAPE", "GLOB", "COLLATE", "WITH",
+}
+_AGGREGATES = {"COUNT", "SUM", "AVG", "MIN", "MAX"}
+_COMPARISONS = {"=", "==", "!=", "<>", "<", "<=", ">", ">="}
+
+
+def _tokenize(query: str) -> List[_Token]:
+    tokens, pos = [], 0
+    while pos < len(query):
+        match = _TOKEN_PATTERN.match(query, pos)
+        if match is None:
+            raise _Unsupported(f"unexpected character at {pos}")
+        kind, text = match.lastgroup, match.group()
+        if kind == "string":
+            tokens.append(_Token(kind, text[1:-1].replace("''", "'"), match.start(), match.end()))
+        elif kind == "ident":
+            tokens.append(_Token(kind, text[1:-1].replace('""', '"') if text[0] == '"' else text[1:-1], match.start(), match.end()))
+        elif kind != "space":
+            tokens.append(_Token(kind, text, match.start(), match.end()))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    SELECT 문을 다음 구조의 dict 로 변환
+
+    {"items": [...], "where": 조건식, "group_by": 컬럼, "order_by": [(키, desc)], "limit": n, "offset": n}
+    """
+
+    def __init__(self, query: str, table_name: str):
+        self.query = query
+        self.table_name = table_name
+        self.tokens = _tokenize(query)
+        self.pos = 0
+
+    # --- 토큰 유틸리티 ---
+
+    def peek(self, offset: int = 0) -> Optional[_Token]:
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def is_keyword(self, keyword: str, offset: int = 0) -> bool:
+        token = self.peek(offset)
+        return token is not None and token.kind == "word" and token.value.upper() == keyword
+
+    def is_op(self, op: str, offset: int = 0) -> bool:
+        token = self.peek(offset)
+        return token is not None and token.kind == "op" and token.value == op
+
+    def accept_keyword(self, keyword: str) -> bool:
+        if self.is_keyword(keyword):
+            self.pos += 1
+            return True
+        return False
+
+    def expect_keyword(self, keyword: str):
+        if not self.accept_keyword(keyword):
+            raise _Unsupported(f"expected {keyword}")
+
+    def expect_op(self, op: str):
+        if not self.is_op(op):
+            raise _Unsupported(f"expected {op}")
+        self.pos += 1
+
+    def identifier(self) -> str:
+        token = self.peek()
+        if token is None or token.kind not in ("word", "ident") or (token.kind == "word" and token.value.upper() in _KEYWORDS):
+            raise _Unsupported("expected identifier")
+        self.pos += 1
+        return token.value
+
+    def column_ref(self) -> str:
+        name = self.identifier()
+        if self.is_op("."):
+            if name.lower() != self.table_name.lower():
+                raise _Unsupported(f"unknown table {name}")
+            self.pos += 1
+            name = self.identifier()
+        return name
+
+    def literal(self):
+        """문자열 또는 숫자 리터럴 (단항 - 포함)"""
+        negative = False
+        if self.is_op("-"):
+            negative = True
+            self.pos += 1
+        token = self.peek()
+        if token is None or token.kind not in ("string", "number") or (negative and token.kind != "number"):
+            raise _Unsupported("expected literal")
+        self.pos += 1
+        if token.kind == "string":
+            return token.value
+        value = float(token.value)
+        return -value if negative else value
+
+    def integer(self) -> int:
+        token = self.peek()
+        if token is None or token.kind != "number" or not token.value.isdigit():
+            raise _Unsupported("expected integer")
+        self.pos += 1
+        return int(token.value)
+
+    # --- 문법 ---
+
+    def parse(self) -> Dict:
+        self.expect_keyword("SELECT")
+        items = [self.select_item()]
+        while self.is_op(","):
+            self.pos += 1
+            items.append(self.select_item())
+
+        self.expect_keyword("FROM")
+        if self.identifier().lower() != self.table_name.lower():
+            raise _Unsupported("unknown table")
+
+        statement = {"items": items, "where": None, "group_by": None, "order_by": [], "limit": None, "offset": 0}
+        if self.accept_keyword("WHERE"):
+            statement["where"] = self.or_expr()
+        if self.accept_keyword("GROUP"):
+            self.expect_keyword("BY")
+            statement["group_by"] = self.column_ref()
+        if self.accept_keyword("ORDER"):
+            self.expect_keyword("BY")
+            statement["order_by"].append(self.order_key())
+            while self.is_op(","):
+                self.pos += 1
+                statement["order_by"].append(self.order_key())
+        if self.accept_keyword("LIMIT"):
+            statement["limit"] = self.integer()
+            if self.accept_keyword("OFFSET"):
+                statement["offset"] = self.integer()
+
+        if self.is_op(";"):
+            self.pos += 1
+        if self.peek() is not None:
+            raise _Unsupported("trailing tokens")
+        return statement
+
+    def expression(self) -> Dict:
+        """컬럼 참조 또는 집계 함수 (COUNT/SUM/AVG/MIN/MAX)"""
+        start = self.peek()
+        if start is None:
+            raise _Unsupported("unexpected end")
+        if start.kind == "word" and start.value.upper() in _AGGREGATES and self.is_op("(", 1):
+            self.pos += 2
+            column = None
+            if self.is_op("*") and start.value.upper() == "COUNT":
+                self.pos += 1
+            else:
+                column = self.column_ref()
+            self.expect_op(")")
+            return {"type": "agg", "func": start.value.upper(), "column": column,
+                    "name": self.query[start.start:self.tokens[self.pos - 1].end]}
+        column = self.column_ref()
+        return {"type": "col", "column": column, "name": column}
+
+    def select_item(self) -> Dict:
+        if self.is_op("*"):
+            self.pos += 1
+            return {"type": "star"}
+        item = self.expression()
+        if self.accept_keyword("AS"):
+            item["name"] = self.identifier()
+        else:
+            token = self.peek()
+            if token is not None and (token.kind == "ident" or (token.kind == "word" and token.value.upper() not in _KEYWORDS)):
+                item["name"] = self.identifier()
+        return item
+
+    def order_key(self) -> Tuple[Dict, bool]:
+        token = self.peek()
+        if token is not None and token.kind == "number":
+            key = {"type": "position", "index": self.integer()}
+        else:
+            key = self.expression()
+        desc = False
+        if self.accept_keyword("DESC"):
+            desc = True
+        else:
+            self.accept_keyword("ASC")
+        return key, desc
+
+    def or_expr(self):
+        node = self.and_expr()
+        while self.accept_keyword("OR"):
+            node = ("or", node, self.and_expr())
+        return node
+
+    def and_expr(self):
+        node = self.not_expr()
+        while self.accept_keyword("AND"):
+            node = ("and", node, self.not_expr())
+        return node
+
+    def not_expr(self):
+        if self.accept_keyword("NOT"):
+            return ("not", self.not_expr())
+        if self.is_op("("):
+            self.pos += 1
+            node = self.or_expr()
+            self.expect_op(")")
+            return node
+        return self.predicate()
+
+    def predicate(self):
+        column = self.column_ref()
+        token = self.peek()
+        if token is not None and token.kind == "op" and token.value in _COMPARISONS:
+            self.pos += 1
+            return ("cmp", column, token.value, self.literal())
+        if self.accept_keyword("IS"):
+            negate = self.accept_keyword("NOT")
+            self.expect_keyword("NULL")
+            return ("not_null" if negate else "null", column)
+
+        negate = self.accept_keyword("NOT")
+        if self.accept_keyword("LIKE"):
+            pattern = self.literal()
+            if not isinstance(pattern, str):
+                raise _Unsupported("LIKE with number")
+            node = ("like", column, pattern)
+        elif self.accept_keyword("IN"):
+            self.expect_op("(")
+            values = [self.literal()]
+            while self.is_op(","):
+                self.pos += 1
+                values.append(self.literal())
+            self.expect_op(")")
+            node = ("in", column, values)
+        elif self.accept_keyword("BETWEEN"):
+            low = self.literal()
+            self.expect_keyword("AND")
+            node = ("between", column, low, self.literal())
+        else:
+            raise _Unsupported("unsupported predicate")
+        return ("not", node) if negate else node
+
+##################################################################
+# 실행
+##################################################################
+
+# 조건식 결과는 SQL 3값 논리를 따르기 위해 (참 마스크, 거짓 마스크) 로 표현 (둘 다 아니면 NULL)
+
+def _check_literal(kind: str, value):
+    if (kind == "num") != isinstance(value, float):
+        # 타입 친화도(affinity) 변환 규칙은 SQLite 에 맡김
+        raise _Unsupported("literal type mismatch")
+
+
+def _like_mask(values: np.ndarray, pattern: str) -> np.ndarray:
+    """SQLite LIKE (ASCII 대소문자 무시) 와 같은 결과의 마스크"""
+    body = pattern.strip("%")
+    simple = "%" not in body and "_" not in body and not re.search(r"[A-Za-z]", body)
+    if simple and body:
+        if pattern == f"%{body}%":
+            return np.char.find(values, body) >= 0
+        if pattern == f"{body}%":
+            return np.char.startswith(values, body)
+        if pattern == f"%{body}":
+            return np.char.endswith(values, body)
+        if pattern == body:
+            return values == body
+    regex = "".join(".*" if ch == "%" else "." if ch == "_" else re.escape(ch) for ch in pattern)
+    compiled = re.compile(regex, re.IGNORECASE | re.ASCII | re.DOTALL)
+    return np.fromiter((compiled.fullmatch(value) is not None for value in values), dtype=bool, count=len(values))
+
+
+def _evaluate(store: ColumnarStore, node) -> Tuple[np.ndarray, np.ndarray]:
+    op = node[0]
+    if op in ("and", "or"):
+        left_true, left_false = _evaluate(store, node[1])
+        right_true, right_false = _evaluate(store, node[2])
+        if op == "and":
+            return left_true & right_true, left_false | right_false
+        return left_true | right_true, left_false & right_false
+    if op == "not":
+        is_true, is_false = _evaluate(store, node[1])
+        return is_false, is_true
+
+    kind, values, nulls = store.column(node[1])
+    if op in ("null", "not_null"):
+        mask = nulls if op == "null" else ~nulls
+        return mask, ~mask
+
+    if op == "cmp":
+        _check_literal(kind, node[3])
+        operator, literal = node[2], node[3]
+        if operator in ("=", "=="):
+            mask = values == literal
+        elif operator in ("!=", "<>"):
+            mask = values != literal
+        elif operator == "<":
+            mask = values < literal
+        elif operator == "<=":
+            mask = values <= literal
+        elif operator == ">":
+            mask = values > literal
+        else:
+            mask = values >= literal
+    elif op == "like":
+        if kind != "text":
+            raise _Unsupported("LIKE on numeric column")
+        mask = _like_mask(values, node[2])
+    elif op == "in":
+        for literal in node[2]:
+            _check_literal(kind, literal)
+        mask = np.isin(values, np.array(node[2], dtype=values.dtype if kind == "num" else None))
+    else:  # between
+        _check_literal(kind, node[2])
+        _check_literal(kind, node[3])
+        mask = (values >= node[2]) & (values <= node[3])
+
+    mask = np.asarray(mask, dtype=bool) & ~nulls
+    return mask, ~mask & ~nulls
+
+
+def _sort_codes(values: np.ndarray, nulls: np.ndarray, desc: bool) -> np.ndarray:
+    """정렬 키를 정수 순위로 변환 (NULL 은 SQLite 와 같이 가장 작은 값)"""
+    if values.dtype.kind == "f":
+        # 숫자는 값 그대로 사용 (CSV 에서 온 데이터에는 -inf 가 없으므로 NULL 을 -inf 로 표현)
+        codes = np.where(nulls, -np.inf, values)
+    else:
+        codes = np.where(nulls, -1, np.unique(values, return_inverse=True)[1].reshape(-1))
+    return -codes if desc else codes
+
+
+def _order(keys: List[Tuple[np.ndarray, np.ndarray, bool]]) -> np.ndarray:
+    """안정 정렬 순서 (같은 값은 원래 행 순서 유지)"""
+    if not keys:
+        return None
+    codes = [_sort_codes(values, nulls, desc) for values, nulls, desc in keys]
+    return np.lexsort(codes[::-1])
+
+
+def _to_python(kind: str, values: np.ndarray, nulls: np.ndarray) -> List:
+    if kind == "num":
+        return [None if null else float(value) for value, null in zip(values.tolist(), nulls.tolist())]
+    return [None if null else str(value) for value, null in zip(values.tolist(), nulls.tolist())]
+
+
+def _aggregate(store: ColumnarStore, item: Dict, index: np.ndarray, groups: List[np.ndarray]) -> Tuple[str, np.ndarray, np.ndarray]:
+    """그룹별 집계 값 계산 -> (종류, 값 배열, NULL 마스크)"""
+    func = item["func"]
+    if item["column"] is None:
+        return "int", np.array([len(group) for group in groups], dtype=np.int64), np.zeros(len(groups), dtype=bool)
+
+    kind, values, nulls = store.column(item["column"])
+    if func == "COUNT":
+        counts = [int((~nulls[index[group]]).sum()) for group in groups]
+        return "int", np.array(counts, dtype=np.int64), np.zeros(len(groups), dtype=bool)
+    if kind != "num":
+        raise _Unsupported(f"{func} on text column")
+
+    results = np.full(len(groups), np.nan)
+    for i, group in enumerate(groups):
+        present = values[index[group]]
+        present = present[~np.isnan(present)]
+        if not len(present):
+            continue
+        if func == "MIN":
+            results[i] = present.min()
+        elif func == "MAX":
+            results[i] = present.max()
+        else:
+            # 행 순서대로 누적 (SQLite 도 순차 누적이지만 순서는 실행 계획을 따르므로 마지막 자리는 다를 수 있음)
+            total = np.cumsum(present)[-1]
+            results[i] = total if func == "SUM" else total / len(present)
+    return "num", results, np.isnan(results)
+
+
+def _execute(store: ColumnarStore, statement: Dict) -> Tuple[List[str], List[tuple]]:
+    index = np.arange(store.row_count)
+    if statement["where"] is not None:
+        index = np.flatnonzero(_evaluate(store, statement["where"])[0])
+
+    items = statement["items"]
+    has_aggregate = any(item["type"] == "agg" for item in items)
+    group_by = statement["group_by"]
+
+    if not has_aggregate and group_by is None:
+        # 일반 SELECT: 선택된 행 번호를 정렬한 뒤 필요한 컬럼만 읽음
+        names, selected = [], []
+        for item in items:
+            if item["type"] == "star":
+                names.extend(store.column_order)
+                selected.extend(store.column_order)
+            else:
+                names.append(item["name"])
+                selected.append(item["column"])
+
+        keys = []
+        for key, desc in statement["order_by"]:
+            if key["type"] == "position":
+                if not 1 <= key["index"] <= len(selected):
+                    raise _Unsupported("order by position")
+                column = selected[key["index"] - 1]
+            elif key["type"] == "col":
+                aliases = {item["name"].lower(): item["column"] for item in items if item["type"] == "col"}
+                column = aliases.get(key["column"].lower(), key["column"])
+            else:
+                raise _Unsupported("order by aggregate")
+            kind, values, nulls = store.column(column)
+            keys.append((np.asarray(values[index]), np.asarray(nulls[index]), desc))
+        order = _order(keys)
+        if order is not None:
+            index = index[order]
+        index = _apply_limit(index, statement)
+
+        return names, list(zip(*store.gather(selected, index))) if len(index) else []
+
+    # 집계: GROUP BY 가 없으면 전체를 하나의 그룹으로 처리
+    if any(item["type"] == "star" for item in items):
+        raise _Unsupported("* with aggregate")
+    if group_by is None:
+        if any(item["type"] == "col" for item in items):
+            raise _Unsupported("bare column with aggregate")
+        groups = [np.arange(len(index))]
+        group_column = None
+    else:
+        kind, values, nulls = store.column(group_by)
+        if any(item["type"] == "col" and item["column"].lower() != group_by.lower() for item in items):
+            raise _Unsupported("non-grouped column")
+        order = _order([(np.asarray(values[index]), np.asarray(nulls[index]), False)])
+        codes = _sort_codes(np.asarray(values[index]), np.asarray(nulls[index]), False)[order]
+        boundaries = np.flatnonzero(np.diff(codes)) + 1
+        groups = np.split(order, boundaries) if len(order) else []
+        first = index[np.array([group[0] for group in groups], dtype=np.int64)]
+        group_column = (kind, np.asarray(values[first]), np.asarray(nulls[first]))
+
+    result_columns, names = [], []
+    for item in items:
+        names.append(item["name"])
+        result_columns.append(group_column if item["type"] == "col" else _aggregate(store, item, index, groups))
+
+    row_order = np.arange(len(groups))
+    keys = []
+    for key, desc in statement["order_by"]:
+        position = _resolve_result_key(key, items)
+        keys.append((result_columns[position][1], result_columns[position][2], desc))
+    order = _order(keys)
+    if order is not None:
+        row_order = row_order[order]
+    row_order = _apply_limit(row_order, statement)
+
+    columns = []
+    for kind, values, nulls in result_columns:
+        if kind == "int":
+            columns.append([int(values[i]) for i in row_order])
+        else:
+            columns.append(_to_python(kind, values[row_order], nulls[row_order]))
+    return names, list(zip(*columns)) if len(row_order) else []
+
+
+def _resolve_result_key(key: Dict, items: List[Dict]) -> int:
+    """집계 결과의 ORDER BY 키를 결과 컬럼 번호로 변환"""
+    if key["type"] == "position":
+        if not 1 <= key["index"] <= len(items):
+            raise _Unsupported("order by position")
+        return key["index"] - 1
+    for i, item in enumerate(items):
+        if key["type"] == "col" and key["column"].lower() == item["name"].lower():
+            return i
+    for i, item in enumerate(items):
+        same_column = (item["column"] or "").lower() == (key["column"] or "").lower()
+        if item["type"] == key["type"] and item.get("func") == key.get("func") and same_column:
+            return i
+    raise _Unsupported("order by expression not in select list")
+
+
+def _apply_limit(index: np.ndarray, statement: Dict) -> np.ndarray:
+    offset = statement["offset"]
+    if statement["limit"] is None:
+        return index[offset:]
+    return index[offset:offset + statement["limit"]]
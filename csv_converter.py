@@ -2,10 +2,129 @@
 # -*- coding: utf-8 -*-
 
 import pandas as pd
+import codecs
+import csv
+import hashlib
+import json
 import sqlite3
 import sys
 import os
-from typing import List, Dict
+import time
+from typing import Dict, Iterator, List, Tuple
+
+# 데이터 버전 등 메타데이터를 기록하는 테이블 (app.py 의 결과 캐시 무효화에 사용)
+META_TABLE = 'nutrition_meta'
+
+# 문자열 컬럼 패턴 정의 (식품군, 식품명, 출처 등), 그 외 컬럼은 REAL
+STRING_PATTERNS = ['식품군', '식품명', '출처', '학목', '색인']
+
+# 스트리밍 변환 시 한 번에 읽어 저장할 행 수
+DEFAULT_CHUNK_SIZE = 1000
+# 인코딩 판별에 사용할 파일 앞부분 크기 (바이트)
+ENCODING_SNIFF_BYTES = 64 * 1024
+# 판별 시도 순서 (process_multi_header_csv 의 재시도 순서와 동일)
+CANDIDATE_ENCODINGS = ['utf-8', 'cp949', 'euc-kr']
+
+# 증분 변환(--upsert) 시 행을 식별하는 컬럼 패턴 (식품명 + 출처)
+ROW_KEY_PATTERNS = ['식품명', '출처']
+# 증분 변환 시 새 데이터를 먼저 기록할 섀도 테이블 접미사
+SHADOW_SUFFIX = '_shadow'
+
+# 인덱스를 생성할 텍스트 컬럼 패턴
+INDEXED_TEXT_PATTERNS = ['식품군', '식품명', '출처']
+# 질문에 자주 등장하는 영양소 컬럼 (컬럼명 끝부분 기준)
+INDEXED_NUTRIENT_SUFFIXES = [
+    '에너지_kcal', '단백질_g', 'Proximates_지방_g', '탄수화물_g', '당류_g', '총_식이섬유_g',
+    '칼슘_mg', '철_mg', '칼륨_mg', '나트륨_mg', '요오드_μg',
+    '비타민_A_μg', '비타민_C_mg', '비타민_D_μg', '오메가3_지방산_g', '총_포화_지방산_g',
+]
+# 영양소별 상위 식품 / 식품군별 요약 테이블
+TOPK_TABLE = 'nutrition_topk'
+GROUP_SUMMARY_TABLE = 'nutrition_group_summary'
+TOP_K = 10
+# 식품명/식품군 trigram 전문 검색 인덱스 (app.py 의 식품명 해석 단계에서 사용)
+FOOD_FTS_TABLE = 'nutrition_food_fts'
+
+def _clean_header(row) -> List[str]:
+    """헤더 행의 빈 값 처리 및 줄바꿈 문자 제거"""
+    return [
+        '' if value is None or (isinstance(value, float) and pd.isna(value))
+        else str(value).replace('\n', ' ').replace('\r', ' ').strip()
+        for value in row
+    ]
+
+def build_column_names(header_row1, header_row2, header_row3) -> List[str]:
+    """
+    3줄 헤더(큰 카테고리 / 메인 헤더 / 단위 등)를 조합하여 컬럼명 목록 생성
+    
+    Args:
+        header_row1: 큰 카테고리 행
+        header_row2: 메인 헤더 행
+        header_row3: 부가 정보 (단위 등) 행
+    
+    Returns:
+        중복이 제거된 컬럼명 목록
+    """
+    header_row1 = _clean_header(header_row1)  # 큰 카테고리
+    header_row2 = _clean_header(header_row2)  # 메인 헤더
+    header_row3 = _clean_header(header_row3)  # 부가 정보 (단위 등)
+    
+    # 새로운 컬럼명 생성
+    new_columns = []
+    current_category = ''
+    column_count = {}  # 중복 컬럼명 카운터
+    
+    for i in range(len(header_row2)):
+        # 큰 카테고리가 있는 경우 업데이트 ("-"인 경우 무시)
+        category = header_row1[i].strip() if i < len(header_row1) else ''
+        if category and category != '-':
+            current_category = category
+        elif category == '-':
+            current_category = ''  # "-"인 경우 카테고리 초기화
+        
+        main_header = header_row2[i].strip()
+        sub_info = header_row3[i].strip() if i < len(header_row3) else ''
+        
+        # 컬럼명 조합 (current_category가 비어있거나 "-"인 경우 무시)
+        if current_category and main_header:
+            if sub_info:
+                column_name = f"{current_category}_{main_header}_{sub_info}"
+            else:
+                column_name = f"{current_category}_{main_header}"
+        elif main_header:
+            if sub_info:
+                column_name = f"{main_header}_{sub_info}"
+            else:
+                column_name = main_header
+        else:
+            column_name = f"column_{i}"
+        
+        # 특수문자 제거 및 정리 (괄호, 콜론 등 포함)
+        column_name = (column_name.replace(' ', '_')
+                      .replace('(', '_')
+                      .replace(')', '_')
+                      .replace('/', '_')
+                      .replace('-', '_')
+                      .replace(':', '_')
+                      .replace(',', '_')
+                      .replace('.', '_'))
+        
+        # 연속된 언더스코어 제거 및 앞뒤 언더스코어 제거
+        while '__' in column_name:
+            column_name = column_name.replace('__', '_')
+        column_name = column_name.strip('_')
+        
+        # 중복 컬럼명 처리
+        original_name = column_name
+        if column_name in column_count:
+            column_count[column_name] += 1
+            column_name = f"{original_name}_{column_count[column_name]}"
+        else:
+            column_count[column_name] = 0
+        
+        new_columns.append(column_name)
+    
+    return new_columns
 
 def process_multi_header_csv(csv_file_path: str, encoding: str = 'utf-8') -> pd.DataFrame:
     """
@@ -23,69 +142,7 @@ def process_multi_header_csv(csv_file_path: str, encoding: str = 'utf-8') -> pd.
         df = pd.read_csv(csv_file_path, header=None, encoding=encoding)
         
         # 첫 3줄을 헤더로 추출
-        header_row1 = df.iloc[0].fillna('').astype(str)  # 큰 카테고리
-        header_row2 = df.iloc[1].fillna('').astype(str)  # 메인 헤더  
-        header_row3 = df.iloc[2].fillna('').astype(str)  # 부가 정보 (단위 등)
-        
-        # 줄바꿈 문자 제거 및 정리
-        header_row1 = header_row1.str.replace('\n', ' ').str.replace('\r', ' ').str.strip()
-        header_row2 = header_row2.str.replace('\n', ' ').str.replace('\r', ' ').str.strip()
-        header_row3 = header_row3.str.replace('\n', ' ').str.replace('\r', ' ').str.strip()
-        
-        # 새로운 컬럼명 생성
-        new_columns = []
-        current_category = ''
-        column_count = {}  # 중복 컬럼명 카운터
-        
-        for i in range(len(header_row2)):
-            # 큰 카테고리가 있는 경우 업데이트 ("-"인 경우 무시)
-            category = header_row1[i].strip()
-            if category and category != '-':
-                current_category = category
-            elif category == '-':
-                current_category = ''  # "-"인 경우 카테고리 초기화
-            
-            main_header = header_row2[i].strip()
-            sub_info = header_row3[i].strip()
-            
-            # 컬럼명 조합 (current_category가 비어있거나 "-"인 경우 무시)
-            if current_category and main_header:
-                if sub_info:
-                    column_name = f"{current_category}_{main_header}_{sub_info}"
-                else:
-                    column_name = f"{current_category}_{main_header}"
-            elif main_header:
-                if sub_info:
-                    column_name = f"{main_header}_{sub_info}"
-                else:
-                    column_name = main_header
-            else:
-                column_name = f"column_{i}"
-            
-            # 특수문자 제거 및 정리 (괄호, 콜론 등 포함)
-            column_name = (column_name.replace(' ', '_')
-                          .replace('(', '_')
-                          .replace(')', '_')
-                          .replace('/', '_')
-                          .replace('-', '_')
-                          .replace(':', '_')
-                          .replace(',', '_')
-                          .replace('.', '_'))
-            
-            # 연속된 언더스코어 제거 및 앞뒤 언더스코어 제거
-            while '__' in column_name:
-                column_name = column_name.replace('__', '_')
-            column_name = column_name.strip('_')
-            
-            # 중복 컬럼명 처리
-            original_name = column_name
-            if column_name in column_count:
-                column_count[column_name] += 1
-                column_name = f"{original_name}_{column_count[column_name]}"
-            else:
-                column_count[column_name] = 0
-            
-            new_columns.append(column_name)
+        new_columns = build_column_names(df.iloc[0], df.iloc[1], df.iloc[2])
         
         # 데이터 부분만 추출 (4번째 줄부터)
         data_df = df.iloc[3:].reset_index(drop=True)
@@ -119,6 +176,51 @@ def process_multi_header_csv(csv_file_path: str, encoding: str = 'utf-8') -> pd.
         else:
             raise
 
+def get_column_types(columns) -> Dict[str, str]:
+    """컬럼명 패턴으로 SQLite 타입 결정 (문자열 패턴은 TEXT, 나머지는 REAL)"""
+    return {
+        col: 'TEXT' if any(pattern in col for pattern in STRING_PATTERNS) else 'REAL'
+        for col in columns
+    }
+
+def create_table_sql(table_name: str, column_types: Dict[str, str]) -> str:
+    """테이블 생성을 위한 SQL 스키마 생성"""
+    column_definitions = []
+    
+    for col, dtype in column_types.items():
+        # 컬럼명에 특수문자가 있는 경우 따옴표로 감싸기
+        safe_col = f'"{col}"' if any(c in col for c in [' ', '-', '(', ')', '/']) else col
+        column_definitions.append(f"{safe_col} {dtype}")
+    
+    return f"CREATE TABLE IF NOT EXISTS {table_name} (" + ", ".join(column_definitions) + ")"
+
+def print_table_summary(conn: sqlite3.Connection, db_path: str, table_name: str):
+    """저장된 테이블의 행/컬럼 수, 컬럼 타입, 샘플 데이터 출력"""
+    # 테이블 정보 확인
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+    row_count = cursor.fetchone()[0]
+    
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    columns = cursor.fetchall()
+    
+    print(f"\n=== SQLite 저장 완료 ===")
+    print(f"데이터베이스: {db_path}")
+    print(f"테이블: {table_name}")
+    print(f"저장된 행 수: {row_count}")
+    print(f"컬럼 수: {len(columns)}")
+    
+    # 컬럼 타입 정보 출력
+    print(f"\n=== 컬럼 타입 정보 ===")
+    for col_info in columns:
+        col_name, col_type = col_info[1], col_info[2]
+        print(f"{col_name}: {col_type}")
+    
+    # 샘플 데이터 조회
+    print(f"\n=== 샘플 데이터 (처음 3행) ===")
+    sample_df = pd.read_sql(f"SELECT * FROM {table_name} LIMIT 3", conn)
+    print(sample_df.to_string())
+
 def save_to_sqlite(df: pd.DataFrame, db_path: str, table_name: str = 'nutrition_data'):
     """
     DataFrame을 SQLite 데이터베이스에 저장
@@ -129,89 +231,506 @@ def save_to_sqlite(df: pd.DataFrame, db_path: str, table_name: str = 'nutrition_
         table_name: 테이블 이름
     """
     try:
-        # 컬럼 타입 설정
-        # 문자열 컬럼 패턴 정의 (식품군, 식품명, 출처 등)
-        string_patterns = ['식품군', '식품명', '출처', '학목', '색인']
-        
         # 데이터 타입 처리
         df_processed = df.copy()
-        column_types = {}
+        column_types = get_column_types(df_processed.columns)
         
         for col in df_processed.columns:
-            is_string_column = any(pattern in col for pattern in string_patterns)
-            
-            if is_string_column:
+            if column_types[col] == 'TEXT':
                 # 문자열 컬럼 처리
                 df_processed[col] = df_processed[col].astype(str)
-                column_types[col] = 'TEXT'
             else:
                 # 숫자 컬럼 처리 (소수점 가능)
                 df_processed[col] = pd.to_numeric(df_processed[col], errors='coerce')
-                column_types[col] = 'REAL'
         
-        # SQLite 연결
+        # SQLite 연결 (앱의 읽기 연결이 변환 중에도 이전 데이터를 읽을 수 있도록 WAL 사용)
         conn = sqlite3.connect(db_path)
-        
-        # 테이블 생성을 위한 SQL 스키마 생성
-        create_table_sql = f"CREATE TABLE IF NOT EXISTS {table_name} ("
-        column_definitions = []
-        
-        for col, dtype in column_types.items():
-            # 컬럼명에 특수문자가 있는 경우 따옴표로 감싸기
-            safe_col = f'"{col}"' if any(c in col for c in [' ', '-', '(', ')', '/']) else col
-            column_definitions.append(f"{safe_col} {dtype}")
-        
-        create_table_sql += ", ".join(column_definitions) + ")"
+        conn.execute("PRAGMA journal_mode=WAL")
         
         # 기존 테이블 삭제 후 새로 생성
         conn.execute(f"DROP TABLE IF EXISTS {table_name}")
-        conn.execute(create_table_sql)
+        conn.execute(create_table_sql(table_name, column_types))
         
         # 데이터 삽입
         df_processed.to_sql(table_name, conn, if_exists='append', index=False)
         
-        # 테이블 정보 확인
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-        row_count = cursor.fetchone()[0]
+        # 인덱스 및 요약 테이블 생성
+        build_indexes(conn, table_name)
+        
+        # 데이터 버전 기록 (캐시 무효화용)
+        write_data_version(conn)
+        
+        print_table_summary(conn, db_path, table_name)
+        
+        conn.close()
+        
+    except Exception as e:
+        print(f"SQLite 저장 중 오류 발생: {e}")
+        raise
+
+def sniff_encoding(csv_file_path: str, sample_bytes: int = ENCODING_SNIFF_BYTES) -> str:
+    """
+    파일 앞부분만 읽어 인코딩 판별 (전체 파일을 인코딩별로 다시 읽지 않도록)
+    
+    Args:
+        csv_file_path: CSV 파일 경로
+        sample_bytes: 판별에 사용할 바이트 수
+    
+    Returns:
+        판별된 인코딩 (utf-8-sig, utf-8, cp949, euc-kr 중 하나)
+    """
+    with open(csv_file_path, 'rb') as f:
+        sample = f.read(sample_bytes)
+    
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    
+    for encoding in CANDIDATE_ENCODINGS:
+        # 잘린 멀티바이트 문자가 끝에 있어도 실패하지 않도록 incremental decoder 사용
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            decoder.decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    
+    raise ValueError(f"지원하지 않는 인코딩입니다: {csv_file_path}")
+
+def _read_header(f) -> Tuple[List[str], List[int]]:
+    """
+    열린 CSV 파일에서 헤더 3줄을 읽어 (전체 컬럼명, 유지할 컬럼 위치) 반환
+    
+    헤더는 csv 모듈로 읽음 (따옴표 안의 줄바꿈 포함), "색인"이 포함된 컬럼은 제외
+    """
+    reader = csv.reader(f)
+    header_rows = [next(reader) for _ in range(3)]
+    columns = build_column_names(*header_rows)
+    keep = [i for i, col in enumerate(columns) if '색인' not in col]
+    return columns, keep
+
+def read_column_types(csv_file_path: str, encoding: str) -> Dict[str, str]:
+    """
+    CSV 파일의 헤더만 읽어 저장될 컬럼과 타입 반환
+    
+    Args:
+        csv_file_path: CSV 파일 경로
+        encoding: 파일 인코딩
+    
+    Returns:
+        컬럼명 -> SQLite 타입 (색인 컬럼 제외, 파일 순서 유지)
+    """
+    with open(csv_file_path, 'r', encoding=encoding, newline='') as f:
+        columns, keep = _read_header(f)
+    
+    removed_columns = [col for i, col in enumerate(columns) if i not in keep]
+    if removed_columns:
+        print(f"제거된 색인 컬럼: {removed_columns}")
+    
+    return get_column_types([columns[i] for i in keep])
+
+def iter_csv_chunks(csv_file_path: str, encoding: str,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    3줄 헤더 CSV 파일의 데이터를 chunk_size 행씩 읽어 타입 변환된 DataFrame 으로 반환
+    
+    각 청크는 process_multi_header_csv + save_to_sqlite 와 같은 방식으로 변환되며,
+    NULL 값은 NaN 대신 None 으로 채워져 바로 executemany 에 사용할 수 있다.
+    
+    Args:
+        csv_file_path: CSV 파일 경로
+        encoding: 파일 인코딩
+        chunk_size: 한 번에 읽을 행 수
+    
+    Returns:
+        청크 DataFrame iterator (빈 행 제외)
+    """
+    with open(csv_file_path, 'r', encoding=encoding, newline='') as f:
+        columns, keep = _read_header(f)
+        kept_columns = [columns[i] for i in keep]
+        column_types = get_column_types(kept_columns)
         
-        cursor.execute(f"PRAGMA table_info({table_name})")
-        columns = cursor.fetchall()
+        # 나머지 데이터는 같은 파일 객체에서 이어서 읽음 (모든 값을 문자열로 읽은 뒤 변환)
+        chunks = pd.read_csv(f, header=None, names=list(range(len(columns))), usecols=keep,
+                             dtype=str, chunksize=chunk_size)
+        for chunk in chunks:
+            chunk = chunk[keep]
+            chunk.columns = kept_columns
+            
+            # 빈 행 제거
+            chunk = chunk.dropna(how='all')
+            if chunk.empty:
+                continue
+            
+            for col, dtype in column_types.items():
+                if dtype == 'TEXT':
+                    chunk[col] = chunk[col].astype(str)
+                else:
+                    # 청크에 정수만 있어도 전체 파일 변환과 같이 float 으로 통일
+                    chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype(float)
+            
+            # NaN -> NULL
+            yield chunk.astype(object).where(chunk.notna(), None)
+
+def _insert_sql(table_name: str, columns: List[str]) -> str:
+    placeholders = ", ".join("?" for _ in columns)
+    return (f"INSERT INTO {_quote(table_name)} ({', '.join(_quote(col) for col in columns)}) "
+            f"VALUES ({placeholders})")
+
+def stream_csv_to_sqlite(csv_file_path: str, db_path: str, table_name: str = 'nutrition_data',
+                         chunk_size: int = DEFAULT_CHUNK_SIZE, encoding: str = None) -> int:
+    """
+    3줄 헤더 CSV 파일을 청크 단위로 읽어 SQLite에 저장 (스트리밍 모드)
+    
+    process_multi_header_csv + save_to_sqlite 와 같은 테이블을 만들지만,
+    전체 파일을 DataFrame 으로 올리지 않고 chunk_size 행씩 변환하여 executemany 로 삽입한다.
+    테이블 삭제/생성부터 마지막 청크, 인덱스/요약 테이블과 데이터 버전까지 하나의 트랜잭션으로
+    처리하므로 중간에 실패하면 기존 테이블이 그대로 남고, 실행 중인 앱이 새 행과 이전 요약 테이블/
+    데이터 버전을 함께 보는 일이 없다.
+    
+    Args:
+        csv_file_path: CSV 파일 경로
+        db_path: SQLite 데이터베이스 파일 경로
+        table_name: 테이블 이름
+        chunk_size: 한 번에 읽어 저장할 행 수
+        encoding: 파일 인코딩 (None 이면 파일 앞부분으로 판별)
+    
+    Returns:
+        저장된 행 수
+    """
+    if encoding is None:
+        encoding = sniff_encoding(csv_file_path)
+        print(f"판별된 인코딩: {encoding}")
+    
+    started = time.time()
+    column_types = read_column_types(csv_file_path, encoding)
+    insert_sql = _insert_sql(table_name, list(column_types))
+    
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("BEGIN")
+        conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+        conn.execute(create_table_sql(table_name, column_types))
         
-        print(f"\n=== SQLite 저장 완료 ===")
-        print(f"데이터베이스: {db_path}")
-        print(f"테이블: {table_name}")
-        print(f"저장된 행 수: {row_count}")
-        print(f"컬럼 수: {len(columns)}")
+        row_count = 0
+        for chunk in iter_csv_chunks(csv_file_path, encoding, chunk_size):
+            conn.executemany(insert_sql, chunk.itertuples(index=False, name=None))
+            row_count += len(chunk)
+        print(f"처리된 데이터: {row_count} 행, {len(column_types)} 열 ({time.time() - started:.2f}초)")
         
-        # 컬럼 타입 정보 출력
-        print(f"\n=== 컬럼 타입 정보 ===")
-        for col_info in columns:
-            col_name, col_type = col_info[1], col_info[2]
-            print(f"{col_name}: {col_type}")
+        # 인덱스 및 요약 테이블 생성 (같은 트랜잭션)
+        build_indexes(conn, table_name, commit=False)
         
-        # 샘플 데이터 조회
-        print(f"\n=== 샘플 데이터 (처음 3행) ===")
-        sample_df = pd.read_sql(f"SELECT * FROM {table_name} LIMIT 3", conn)
-        print(sample_df.to_string())
+        # 데이터 버전 기록 후 커밋 (캐시 무효화용)
+        write_data_version(conn)
         
+        print_table_summary(conn, db_path, table_name)
+        return row_count
+    
+    except Exception as e:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        print(f"SQLite 저장 중 오류 발생: {e}")
+        raise
+    finally:
         conn.close()
+
+def _row_hash(row: tuple) -> str:
+    """행 값의 해시 (CSV 에서 변환한 값과 SQLite 에서 읽은 값이 같으면 같은 해시)"""
+    return hashlib.sha1(json.dumps(row, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def _row_key_positions(columns: List[str]) -> List[int]:
+    """행 식별에 사용할 컬럼 위치 (식품명 + 출처, 없으면 모든 문자열 컬럼)"""
+    positions = [i for pattern in ROW_KEY_PATTERNS for i, col in enumerate(columns) if pattern in col]
+    if len(positions) < len(ROW_KEY_PATTERNS):
+        column_types = get_column_types(columns)
+        positions = [i for i, col in enumerate(columns) if column_types[col] == 'TEXT']
+    return positions
+
+def _row_keys(rows, positions: List[int], counts: Dict[str, int]) -> Iterator[str]:
+    """행 식별 키 생성 (같은 키가 반복되면 "#2", "#3" 을 붙여 구분)"""
+    for row in rows:
+        key = '\x1f'.join(str(row[i]) for i in positions)
+        counts[key] = counts.get(key, 0) + 1
+        yield key if counts[key] == 1 else f"{key}#{counts[key]}"
+
+def upsert_csv_to_sqlite(csv_file_path: str, db_path: str, table_name: str = 'nutrition_data',
+                         chunk_size: int = DEFAULT_CHUNK_SIZE, encoding: str = None) -> Dict[str, int]:
+    """
+    CSV 파일과 기존 테이블을 비교하여 변경된 행만 반영 (증분 모드)
+    
+    1. 기존 테이블의 각 행을 식품명+출처 키와 값 해시로 정리
+    2. 기존 테이블을 rowid 그대로 섀도 테이블에 복사한 뒤 CSV 와 비교하여
+       추가/변경/삭제된 행만 섀도 테이블에 반영
+    3. 하나의 트랜잭션에서 기존 테이블을 섀도 테이블로 교체하고 인덱스/요약 테이블과
+       데이터 버전을 다시 생성
+    
+    교체 전까지 기존 테이블은 변경되지 않으므로 실행 중인 앱이 일부만 반영된 테이블을 보지 않는다.
+    변경된 행이 없으면 테이블과 데이터 버전을 그대로 두어 캐시가 유지된다.
+    컬럼 구성이 바뀐 경우에는 모든 행을 새로 추가한다.
+    
+    Args:
+        csv_file_path: CSV 파일 경로
+        db_path: SQLite 데이터베이스 파일 경로
+        table_name: 테이블 이름
+        chunk_size: 한 번에 읽어 비교할 행 수
+        encoding: 파일 인코딩 (None 이면 파일 앞부분으로 판별)
+    
+    Returns:
+        inserted / updated / deleted / unchanged 행 수
+    """
+    if encoding is None:
+        encoding = sniff_encoding(csv_file_path)
+        print(f"판별된 인코딩: {encoding}")
+    
+    started = time.time()
+    column_types = read_column_types(csv_file_path, encoding)
+    columns = list(column_types)
+    key_positions = _row_key_positions(columns)
+    shadow_table = f"{table_name}{SHADOW_SUFFIX}"
+    quoted_columns = ', '.join(_quote(col) for col in columns)
+    stats = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+    
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        # 교체 트랜잭션 동안에도 읽기 연결이 이전 스냅샷을 계속 읽을 수 있도록 WAL 사용
+        conn.execute("PRAGMA journal_mode=WAL")
         
+        existing_types = {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({_quote(table_name)})")}
+        same_schema = list(existing_types.items()) == list(column_types.items())
+        if existing_types and not same_schema:
+            print(f"컬럼 구성이 달라 모든 행을 새로 추가합니다: {table_name}")
+        
+        conn.execute("BEGIN")
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(shadow_table)}")
+        conn.execute(create_table_sql(shadow_table, column_types))
+        
+        # 기존 행: 키 -> (rowid, 해시)
+        existing = {}
+        if same_schema:
+            conn.execute(f"INSERT INTO {_quote(shadow_table)} (rowid, {quoted_columns}) "
+                         f"SELECT rowid, {quoted_columns} FROM {_quote(table_name)}")
+            cursor = conn.execute(f"SELECT rowid, {quoted_columns} FROM {_quote(table_name)} ORDER BY rowid")
+            rows = [(row[0], row[1:]) for row in cursor]
+            keys = _row_keys((values for _, values in rows), key_positions, {})
+            existing = {key: (rowid, _row_hash(values)) for key, (rowid, values) in zip(keys, rows)}
+        
+        update_sql = (f"UPDATE {_quote(shadow_table)} SET "
+                      f"{', '.join(f'{_quote(col)} = ?' for col in columns)} WHERE rowid = ?")
+        insert_sql = _insert_sql(shadow_table, columns)
+        seen = set()
+        key_counts = {}
+        for chunk in iter_csv_chunks(csv_file_path, encoding, chunk_size):
+            rows = list(chunk.itertuples(index=False, name=None))
+            inserts, updates = [], []
+            for key, values in zip(_row_keys(rows, key_positions, key_counts), rows):
+                seen.add(key)
+                if key not in existing:
+                    inserts.append(values)
+                    continue
+                rowid, old_hash = existing[key]
+                if _row_hash(values) == old_hash:
+                    stats['unchanged'] += 1
+                else:
+                    updates.append(values + (rowid,))
+            conn.executemany(insert_sql, inserts)
+            conn.executemany(update_sql, updates)
+            stats['inserted'] += len(inserts)
+            stats['updated'] += len(updates)
+        
+        deleted = [(rowid,) for key, (rowid, _) in existing.items() if key not in seen]
+        conn.executemany(f"DELETE FROM {_quote(shadow_table)} WHERE rowid = ?", deleted)
+        stats['deleted'] = len(deleted)
+        
+        print(f"비교 완료 ({time.time() - started:.2f}초): 추가 {stats['inserted']}, 변경 {stats['updated']}, "
+              f"삭제 {stats['deleted']}, 동일 {stats['unchanged']}")
+        
+        if same_schema and not (stats['inserted'] or stats['updated'] or stats['deleted']):
+            conn.execute("ROLLBACK")
+            print("변경된 행이 없어 기존 테이블을 유지합니다")
+            return stats
+        conn.execute("COMMIT")
+        
+        # 기존 테이블을 섀도 테이블로 교체 (인덱스/요약 테이블/데이터 버전까지 한 트랜잭션)
+        swap_started = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(table_name)}")
+        conn.execute(f"ALTER TABLE {_quote(shadow_table)} RENAME TO {_quote(table_name)}")
+        build_indexes(conn, table_name, commit=False)
+        write_data_version(conn)
+        print(f"테이블 교체 완료 ({time.time() - swap_started:.2f}초)")
+        
+        print_table_summary(conn, db_path, table_name)
+        return stats
+    
     except Exception as e:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
         print(f"SQLite 저장 중 오류 발생: {e}")
         raise
+    finally:
+        conn.close()
+
+def _quote(name: str) -> str:
+    """SQLite 식별자 따옴표 처리"""
+    return '"' + name.replace('"', '""') + '"'
+
+def build_indexes(conn: sqlite3.Connection, table_name: str = 'nutrition_data', top_k: int = TOP_K,
+                  commit: bool = True):
+    """
+    조회 성능을 위한 인덱스와 요약 테이블 생성 후 ANALYZE 실행
+    
+    - 텍스트 컬럼(식품군, 식품명, 출처) 인덱스
+    - 주요 영양소별 (영양소) / (식품군, 영양소) 인덱스
+      -> "영양소 상위 N개", "식품군 Y 중 Z가 가장 많은 식품" 쿼리가 인덱스 탐색으로 처리됨
+    - 영양소별 상위 top_k 식품 테이블 (nutrition_topk)
+    - 식품군별 영양소 요약 테이블 (nutrition_group_summary)
+    - 식품명/식품군 trigram 전문 검색 인덱스 (nutrition_food_fts)
+    
+    Args:
+        conn: SQLite 연결
+        table_name: 원본 테이블 이름
+        top_k: 영양소별로 저장할 상위 식품 수
+        commit: 완료 후 커밋 여부 (호출자의 트랜잭션 안에서 실행할 때는 False)
+    """
+    columns = [(row[1], row[2]) for row in conn.execute(f"PRAGMA table_info({_quote(table_name)})")]
+    text_columns = {pattern: name for pattern in INDEXED_TEXT_PATTERNS
+                    for name, dtype in columns if pattern in name and dtype == 'TEXT'}
+    nutrient_columns = [name for name, dtype in columns if dtype == 'REAL']
+    indexed_nutrients = [name for name in nutrient_columns
+                         if any(name.endswith(suffix) for suffix in INDEXED_NUTRIENT_SUFFIXES)]
+    
+    group_col = text_columns.get('식품군')
+    name_col = text_columns.get('식품명')
+    table = _quote(table_name)
+    
+    started = time.time()
+    for pattern, col in text_columns.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(f'idx_{table_name}_{col}')} ON {table} ({_quote(col)})")
+    
+    for col in indexed_nutrients:
+        # LIMIT N 쿼리는 인덱스 순서로 N행만 읽으므로 식품명까지 포함한 커버링 인덱스는 만들지 않음 (DB 크기 절약)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(f'idx_{table_name}_{col}')} ON {table} ({_quote(col)})")
+        if group_col:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(f'idx_{table_name}_{group_col}_{col}')} "
+                         f"ON {table} ({_quote(group_col)}, {_quote(col)})")
+    
+    if group_col and name_col:
+        # 영양소별 상위 top_k 식품
+        conn.execute(f"DROP TABLE IF EXISTS {TOPK_TABLE}")
+        conn.execute(f"CREATE TABLE {TOPK_TABLE} (nutrient TEXT, rank INTEGER, {_quote(group_col)} TEXT, "
+                     f"{_quote(name_col)} TEXT, value REAL, PRIMARY KEY (nutrient, rank))")
+        # 식품군별 영양소 요약 (식품 수, 값이 있는 식품 수, 평균/최소/최대, 최대값 식품)
+        conn.execute(f"DROP TABLE IF EXISTS {GROUP_SUMMARY_TABLE}")
+        conn.execute(f"CREATE TABLE {GROUP_SUMMARY_TABLE} ({_quote(group_col)} TEXT, nutrient TEXT, "
+                     f"food_count INTEGER, value_count INTEGER, avg_value REAL, min_value REAL, max_value REAL, "
+                     f"top_food TEXT, PRIMARY KEY ({_quote(group_col)}, nutrient))")
+        
+        for col in nutrient_columns:
+            q_col, q_group, q_name = _quote(col), _quote(group_col), _quote(name_col)
+            conn.execute(
+                # 값이 같으면 rowid 순 (question_router 의 원본 테이블 쿼리와 같은 순서)
+                f"INSERT INTO {TOPK_TABLE} SELECT ?, ROW_NUMBER() OVER (ORDER BY {q_col} DESC, rowid), {q_group}, "
+                f"{q_name}, {q_col} FROM {table} WHERE {q_col} IS NOT NULL ORDER BY {q_col} DESC, rowid LIMIT ?",
+                (col, top_k)
+            )
+            conn.execute(
+                f"INSERT INTO {GROUP_SUMMARY_TABLE} "
+                f"SELECT grp, ?, COUNT(*), COUNT(value), AVG(value), MIN(value), MAX(value), "
+                f"MAX(CASE WHEN rn = 1 AND value IS NOT NULL THEN name END) "
+                f"FROM (SELECT {q_group} AS grp, {q_name} AS name, {q_col} AS value, "
+                f"ROW_NUMBER() OVER (PARTITION BY {q_group} ORDER BY {q_col} DESC, rowid) AS rn FROM {table}) "
+                f"GROUP BY grp",
+                (col,)
+            )
+    
+    if group_col and name_col:
+        build_food_name_index(conn, table_name, name_col, group_col)
+    
+    # 통계 정보 갱신 (쿼리 플래너가 인덱스를 사용하도록)
+    conn.execute("ANALYZE")
+    if commit:
+        conn.commit()
+    
+    print(f"\n=== 인덱스 생성 완료 ({time.time() - started:.2f}초) ===")
+    print(f"텍스트 컬럼 인덱스: {list(text_columns.values())}")
+    print(f"영양소 인덱스: {len(indexed_nutrients)}개, 요약 대상 영양소: {len(nutrient_columns)}개")
+
+def build_food_name_index(conn: sqlite3.Connection, table_name: str, name_col: str, group_col: str):
+    """
+    식품명/식품군 FTS5 trigram 인덱스 생성 (원본 테이블을 content 로 사용, rowid 공유)
+    
+    Args:
+        conn: SQLite 연결
+        table_name: 원본 테이블 이름
+        name_col: 식품명 컬럼
+        group_col: 식품군 컬럼
+    """
+    try:
+        conn.execute(f"DROP TABLE IF EXISTS {FOOD_FTS_TABLE}")
+        conn.execute(
+            f"CREATE VIRTUAL TABLE {FOOD_FTS_TABLE} USING fts5("
+            f"{_quote(name_col)}, {_quote(group_col)}, content={_quote(table_name)}, content_rowid='rowid', "
+            f"tokenize='trigram')"
+        )
+        conn.execute(f"INSERT INTO {FOOD_FTS_TABLE} ({FOOD_FTS_TABLE}) VALUES ('rebuild')")
+    except sqlite3.OperationalError as e:
+        # FTS5/trigram 을 지원하지 않는 SQLite 빌드 (app.py 는 메모리 인덱스로 대체)
+        print(f"식품명 전문 검색 인덱스 생성 실패: {e}")
+
+def write_data_version(conn: sqlite3.Connection) -> str:
+    """
+    메타데이터 테이블에 새로운 데이터 버전 기록
+    
+    Args:
+        conn: SQLite 연결
+    
+    Returns:
+        기록된 데이터 버전
+    """
+    version = str(time.time_ns())
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute(
+        f"INSERT OR REPLACE INTO {META_TABLE} (key, value) VALUES ('data_version', ?)",
+        (version,)
+    )
+    conn.commit()
+    return version
 
 def main():
     """메인 함수"""
     if len(sys.argv) < 2:
         print("사용법: python script.py <csv_file_path> [db_file_path] [table_name]")
+        print("       python script.py --stream <csv_file_path> [db_file_path] [table_name]")
+        print("       python script.py --upsert <csv_file_path> [db_file_path] [table_name]")
+        print("       python script.py --index-only <db_file_path> [table_name]")
         print("예시: python script.py nutrition_data.csv nutrition.db food_nutrition")
         sys.exit(1)
     
-    # 명령행 인자 처리
-    csv_file = sys.argv[1]
-    db_file = sys.argv[2] if len(sys.argv) > 2 else csv_file.replace('.csv', '.db')
-    table_name = sys.argv[3] if len(sys.argv) > 3 else 'nutrition_data'
+    # 기존 데이터베이스에 인덱스/요약 테이블만 생성
+    if sys.argv[1] == '--index-only':
+        if len(sys.argv) < 3 or not os.path.exists(sys.argv[2]):
+            print("오류: 데이터베이스 파일을 지정하세요")
+            sys.exit(1)
+        conn = sqlite3.connect(sys.argv[2])
+        try:
+            build_indexes(conn, sys.argv[3] if len(sys.argv) > 3 else 'nutrition_data')
+            write_data_version(conn)
+        finally:
+            conn.close()
+        return
+    
+    # 명령행 인자 처리 (--stream: 청크 단위 스트리밍 변환, --upsert: 변경된 행만 반영)
+    args = sys.argv[1:]
+    mode = args[0] if args[0] in ('--stream', '--upsert') else None
+    if mode:
+        args = args[1:]
+    if not args:
+        print("오류: CSV 파일을 지정하세요")
+        sys.exit(1)
+    csv_file = args[0]
+    db_file = args[1] if len(args) > 1 else csv_file.replace('.csv', '.db')
+    table_name = args[2] if len(args) > 2 else 'nutrition_data'
     
     # 파일 존재 확인
     if not os.path.exists(csv_file):
@@ -221,11 +740,18 @@ def main():
     try:
         print(f"CSV 파일 처리 시작: {csv_file}")
         
-        # CSV 처리
-        df = process_multi_header_csv(csv_file)
-        
-        # SQLite에 저장
-        save_to_sqlite(df, db_file, table_name)
+        if mode == '--stream':
+            # 청크 단위로 읽어 바로 저장
+            stream_csv_to_sqlite(csv_file, db_file, table_name)
+        elif mode == '--upsert':
+            # 기존 테이블과 비교하여 변경된 행만 반영
+            upsert_csv_to_sqlite(csv_file, db_file, table_name)
+        else:
+            # CSV 처리
+            df = process_multi_header_csv(csv_file)
+            
+            # SQLite에 저장
+            save_to_sqlite(df, db_file, table_name)
         
         print(f"\n✅ 변환 완료!")
         print(f"   입력: {csv_file}")
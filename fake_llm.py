@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+네트워크 없이 파이프라인을 실행하기 위한 ChatOpenAI 대체 모델
+
+벤치마크와 오프라인 테스트에서 사용하며, 질문별로 미리 정의된 SQL/평가/답변을 재생하고
+설정 가능한 지연 시간을 흉내낸다.
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, AsyncIterator, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    미리 정의된 응답을 재생하는 로컬 채팅 모델
+
+    - latency: 호출당 지연 시간 중앙값(초), jitter: 로그정규 분포 sigma
+    - slow_rate 확률로 slow_latency 초가 걸리는 지연 호출, failure_rate 확률로 일시적 오류(ConnectionError) 발생
+    - seed 가 같으면 지연 시간 순서도 같음 (결정적)
+    - canned: 질문 -> {"query": SQL, "score": 점수, "columns": [...], "answer": 답변}
+    """
+
+    canned: Dict[str, Dict[str, Any]] = {}
+    latency: float = 0.0
+    jitter: float = 0.0
+    seed: int = 0
+    slow_rate: float = 0.0
+    slow_latency: float = 0.0
+    failure_rate: float = 0.0
+    stream_chunk_size: int = 8
+
+    _rng: Any = None
+    _rng_lock: Any = None
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+        self._rng_lock = threading.Lock()
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    # ------------------------------------------------------------------
+    # 지연 시간 / 응답 선택
+    # ------------------------------------------------------------------
+
+    def sample_latency(self) -> float:
+        """설정된 분포에서 지연 시간 하나를 뽑기"""
+        with self._rng_lock:
+            if self.slow_rate > 0 and self._rng.random() < self.slow_rate:
+                return self.slow_latency
+            if self.latency <= 0:
+                return 0.0
+            if self.jitter <= 0:
+                return self.latency
+            return self._rng.lognormvariate(0.0, self.jitter) * self.latency
+
+    def _maybe_fail(self):
+        """failure_rate 확률로 일시적 오류 발생 (재시도 정책 확인용)"""
+        if self.failure_rate <= 0:
+            return
+        with self._rng_lock:
+            failed = self._rng.random() < self.failure_rate
+        if failed:
+            raise ConnectionError("fake transient failure")
+
+    def _find_canned(self, text: str) -> Dict[str, Any]:
+        """프롬프트에 포함된 질문으로 미리 정의된 응답 찾기 (가장 긴 질문 우선)"""
+        for question in sorted(self.canned, key=len, reverse=True):
+            if question in text:
+                return self.canned[question]
+        return {}
+
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        text = "\n".join(str(message.content) for message in messages)
+        canned = self._find_canned(text)
+        if "SQL Result:" in text:
+            return canned.get("answer", "요청하신 정보는 위의 검색 결과와 같습니다.")
+        return canned.get("query", "SELECT 1")
+
+    # ------------------------------------------------------------------
+    # BaseChatModel 구현
+    # ------------------------------------------------------------------
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.sample_latency())
+        self._maybe_fail()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._respond(messages)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.sample_latency())
+        self._maybe_fail()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._respond(messages)))])
+
+    def _chunks(self, text: str) -> List[str]:
+        size = self.stream_chunk_size
+        return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        # 첫 토큰까지 지연 시간의 대부분을 쓰고 나머지 토큰은 짧은 간격으로 전달
+        total = self.sample_latency()
+        chunks = self._chunks(self._respond(messages))
+        time.sleep(total * 0.5)
+        self._maybe_fail()
+        for piece in chunks:
+            time.sleep(total * 0.5 / len(chunks))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        total = self.sample_latency()
+        chunks = self._chunks(self._respond(messages))
+        await asyncio.sleep(total * 0.5)
+        self._maybe_fail()
+        for piece in chunks:
+            await asyncio.sleep(total * 0.5 / len(chunks))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    # ------------------------------------------------------------------
+    # Structured Output
+    # ------------------------------------------------------------------
+
+    def _structured(self, schema: Any, prompt: Any) -> Dict[str, Any]:
+        text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+        canned = self._find_canned(text)
+        keys = getattr(schema, "__annotations__", {})
+        if "score" in keys:
+            return {"score": canned.get("score", 0.9), "columns": canned.get("columns", [])}
+        if "query" in keys:
+            # 이미 SQL 문이 생성된 프롬프트라면 그대로 사용
+            match = re.search(r"(SELECT\b.*)", text, re.IGNORECASE | re.DOTALL)
+            return {"query": canned.get("query") or (match.group(1).strip() if match else "SELECT 1")}
+        return {}
+
+    def with_structured_output(self, schema: Any, include_raw: bool = False, **kwargs: Any):
+        """TypedDict 스키마에 맞는 미리 정의된 응답을 반환하는 Runnable (include_raw 는 ChatOpenAI 와 같은 형식)"""
+
+        def output(prompt: Any) -> Dict[str, Any]:
+            parsed = self._structured(schema, prompt)
+            if not include_raw:
+                return parsed
+            return {"raw": AIMessage(content=""), "parsed": parsed, "parsing_error": None}
+
+        def invoke(prompt: Any) -> Dict[str, Any]:
+            time.sleep(self.sample_latency())
+            self._maybe_fail()
+            return output(prompt)
+
+        async def ainvoke(prompt: Any) -> Dict[str, Any]:
+            await asyncio.sleep(self.sample_latency())
+            self._maybe_fail()
+            return output(prompt)
+
+        return RunnableLambda(invoke, afunc=ainvoke, name=f"{self._llm_type}-structured")
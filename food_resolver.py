@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, TypedDict
+
+from result_cache import db_fingerprint
+
+# csv_converter.py 가 생성하는 식품명/식품군 trigram 전문 검색 테이블
+FOOD_FTS_TABLE = "nutrition_food_fts"
+
+# 질문 단어 끝에 붙는 조사 (긴 것부터 제거)
+_PARTICLES = sorted([
+    "에서는", "에서", "에는", "으로", "이랑", "하고", "까지", "부터", "보다",
+    "과", "와", "의", "은", "는", "이", "가", "을", "를", "에", "도", "만", "랑", "로", "중",
+], key=len, reverse=True)
+
+# 식품 이름으로 해석하지 않을 일반 단어
+_STOPWORDS = {
+    "식품", "음식", "영양소", "영양", "성분", "함량", "종류", "가장", "많은", "높은", "낮은", "적은",
+    "상위", "하위", "모든", "들어있", "들어있는", "포함된", "풍부한", "칼로리", "열량", "어떤", "무엇",
+}
+
+_WORD_PATTERN = re.compile(r"[0-9A-Za-z가-힣]+")
+
+
+class FoodMatch(TypedDict):
+    term: str            # 질문에 나온 단어
+    rowids: List[int]    # 일치하는 nutrition_data 행의 rowid (최대 max_matches 개)
+    names: List[str]     # rowid 와 같은 순서의 식품명
+    total: int           # 일치하는 전체 행 수
+    group: Optional[str]  # 단어가 식품군 이름이면 해당 식품군
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", "", text).lower()
+
+
+def extract_terms(question: str) -> List[str]:
+    """질문에서 조사를 제거한 2글자 이상의 단어 목록 추출 (순서 유지, 중복 제거)"""
+    terms = []
+    for word in _WORD_PATTERN.findall(question):
+        for particle in _PARTICLES:
+            if word.endswith(particle) and len(word) - len(particle) >= 2:
+                word = word[: -len(particle)]
+                break
+        if len(word) >= 2 and word not in _STOPWORDS and not word.isdigit() and word not in terms:
+            terms.append(word)
+    return terms
+
+
+def _to_jamo(text: str) -> str:
+    """한글 음절을 자모로 분해 (한 글자 오타도 일부 trigram 이 일치하도록)"""
+    jamo = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            jamo.append(chr(0x1100 + code // 588))
+            jamo.append(chr(0x1161 + (code % 588) // 28))
+            if code % 28:
+                jamo.append(chr(0x11A7 + code % 28))
+        else:
+            jamo.append(ch)
+    return "".join(jamo)
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class FoodNameResolver:
+    """
+    질문에 언급된 식품을 nutrition_data 의 rowid 로 해석
+
+    csv_converter.py 가 만든 FTS5 trigram 인덱스(nutrition_food_fts)로 부분 문자열을 찾고,
+    인덱스가 없는 데이터베이스는 시작 시 메모리에 같은 인덱스를 만든다.
+    일치하는 이름이 없으면 자모 단위 trigram 유사도로 철자가 다른 이름을 찾는다.
+    """
+
+    def __init__(self, db_path: str, table_name: str, name_column: str, group_column: str,
+                 exclude_terms: Iterable[str] = (), max_matches: int = 20, min_similarity: float = 0.5):
+        """
+        Args:
+            db_path: SQLite 데이터베이스 파일 경로
+            table_name: 식품 테이블 이름
+            name_column: 식품명 컬럼
+            group_column: 식품군 컬럼
+            exclude_terms: 식품으로 해석하지 않을 단어 (영양소 이름 등)
+            max_matches: 단어별로 반환할 최대 행 수
+            min_similarity: 철자 보정 시 필요한 최소 trigram 일치 비율
+        """
+        self.db_path = db_path
+        self.table_name = table_name
+        self.name_column = name_column
+        self.group_column = group_column
+        # 영양소 이름 전체와 이름을 이루는 단어 ("총 식이섬유" -> "총식이섬유", "식이섬유")
+        self.exclude_terms = set()
+        for term in exclude_terms:
+            self.exclude_terms.add(_normalize(term))
+            self.exclude_terms.update(_normalize(word) for word in term.split())
+        self.max_matches = max_matches
+        self.min_similarity = min_similarity
+
+        self.groups: Dict[str, str] = {}  # 정규화된 식품군 이름 -> 식품군
+        self.uses_file_index = False
+        self._names: List[tuple] = []  # [(rowid, 식품명)]
+        self._fuzzy_index: Optional[List[tuple]] = None  # [(rowid, 식품명, 자모 trigram 집합)], 처음 사용 시 생성
+        self._conn: Optional[sqlite3.Connection] = None
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+        self.refresh_if_changed()
+
+    def refresh_if_changed(self):
+        """데이터베이스 파일이 변경되었으면 인덱스 다시 열기"""
+        fingerprint = db_fingerprint(self.db_path)
+        if fingerprint == self._fingerprint:
+            return
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._open()
+                self._fingerprint = fingerprint
+
+    def _open(self):
+        if self._conn is not None:
+            self._conn.close()
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        has_index = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (FOOD_FTS_TABLE,)
+        ).fetchone() is not None
+        groups = conn.execute(
+            f"SELECT DISTINCT {_quote(self.group_column)} FROM {_quote(self.table_name)}"
+        ).fetchall()
+        self.groups = {_normalize(group): group for (group,) in groups if group}
+        rows = conn.execute(
+            f"SELECT rowid, {_quote(self.name_column)}, {_quote(self.group_column)} FROM {_quote(self.table_name)}"
+        ).fetchall()
+        self._names = [(rowid, name) for rowid, name, _ in rows if name]
+        self._fuzzy_index = None
+
+        if not has_index:
+            # 인덱스가 없는 데이터베이스: 메모리에 같은 구조의 인덱스 생성
+            conn.close()
+            conn = sqlite3.connect(":memory:", check_same_thread=False)
+            conn.execute(
+                f"CREATE VIRTUAL TABLE {FOOD_FTS_TABLE} USING fts5("
+                f"{_quote(self.name_column)}, {_quote(self.group_column)}, tokenize='trigram')"
+            )
+            conn.executemany(
+                f"INSERT INTO {FOOD_FTS_TABLE} (rowid, {_quote(self.name_column)}, {_quote(self.group_column)}) VALUES (?, ?, ?)",
+                rows
+            )
+            # 2글자 단어 검색용 (trigram 인덱스는 3글자 이상만 사용 가능)
+            conn.execute(f"CREATE TABLE {_quote(self.table_name)} ({_quote(self.name_column)} TEXT)")
+            conn.executemany(
+                f"INSERT INTO {_quote(self.table_name)} (rowid, {_quote(self.name_column)}) VALUES (?, ?)",
+                self._names
+            )
+        self.uses_file_index = has_index
+        self._conn = conn
+
+    def _search(self, term: str) -> List[tuple]:
+        """부분 문자열 검색 -> [(rowid, 식품명)] (짧은 이름 우선)"""
+        name = _quote(self.name_column)
+        if len(term) >= 3:
+            sql = (f"SELECT rowid, {name} FROM {FOOD_FTS_TABLE} WHERE {name} MATCH ? "
+                   f"ORDER BY length({name}), rowid")
+            return self._conn.execute(sql, ('"' + term.replace('"', '""') + '"',)).fetchall()
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        sql = (f"SELECT rowid, {name} FROM {_quote(self.table_name)} WHERE {name} LIKE ? ESCAPE '\\' "
+               f"ORDER BY length({name}), rowid")
+        return self._conn.execute(sql, (f"%{escaped}%",)).fetchall()
+
+    def warmup(self):
+        """철자 보정용 자모 trigram 인덱스를 미리 생성"""
+        self.refresh_if_changed()
+        with self._lock:
+            self._build_fuzzy_index()
+
+    def _build_fuzzy_index(self):
+        if self._fuzzy_index is None:
+            self._fuzzy_index = [(rowid, name, _trigrams(_to_jamo(_normalize(name)))) for rowid, name in self._names]
+
+    def _fuzzy_search(self, term: str) -> List[tuple]:
+        """철자가 조금 다른 이름 찾기 (자모 trigram 포함 비율이 가장 높은 이름들) -> [(rowid, 식품명)]"""
+        grams = _trigrams(_to_jamo(term))
+        if not grams:
+            return []
+        self._build_fuzzy_index()
+        best, found = self.min_similarity, []
+        for rowid, food_name, name_grams in self._fuzzy_index:
+            similarity = len(grams & name_grams) / len(grams)
+            if similarity > best:
+                best, found = similarity, [(rowid, food_name)]
+            elif similarity == best and found:
+                found.append((rowid, food_name))
+        return sorted(found, key=lambda item: (len(item[1]), item[0]))
+
+    def resolve(self, question: str) -> List[FoodMatch]:
+        """
+        질문에 언급된 식품/식품군 해석
+
+        Returns:
+            단어별 일치 결과 목록 (일치하는 행이나 식품군이 있는 단어만)
+        """
+        self.refresh_if_changed()
+        matches = []
+        with self._lock:
+            for term in extract_terms(question):
+                normalized = _normalize(term)
+                if normalized in self.exclude_terms:
+                    continue
+                group = self.groups.get(normalized) or self.groups.get(normalized + "류")
+                if group is not None:
+                    matches.append({"term": term, "rowids": [], "names": [], "total": 0, "group": group})
+                    continue
+
+                try:
+                    rows = self._search(term) or (self._fuzzy_search(normalized) if len(normalized) >= 3 else [])
+                except sqlite3.OperationalError:
+                    continue
+                if rows:
+                    shown = rows[: self.max_matches]
+                    matches.append({
+                        "term": term,
+                        "rowids": [rowid for rowid, _ in shown],
+                        "names": [food_name for _, food_name in shown],
+                        "total": len(rows),
+                        "group": None,
+                    })
+        return matches
+
+
+def format_food_hint(matches: List[FoodMatch], table_name: str, name_column: str, group_column: str) -> str:
+    """해석 결과를 SQL 생성 프롬프트에 덧붙일 참고 문장으로 변환 (결과가 없으면 빈 문자열)"""
+    lines = []
+    for match in matches:
+        if match["group"] is not None:
+            lines.append(f'- "{match["term"]}": {group_column} = \'{match["group"]}\'')
+            continue
+        if match["total"] > len(match["rowids"]):
+            # 일치하는 행이 많으면 rowid 목록 대신 예시만 표시
+            examples = ", ".join(match["names"][:5])
+            lines.append(f'- "{match["term"]}": {match["total"]}개 식품과 일치 (예: {examples})')
+            continue
+        foods = ", ".join(f"{rowid}={name}" for rowid, name in zip(match["rowids"], match["names"]))
+        lines.append(f'- "{match["term"]}": {table_name}.rowid IN ({", ".join(map(str, match["rowids"]))}) -> {foods}')
+    if not lines:
+        return ""
+    return (
+        f"\n\n(참고: 질문에 언급된 식품을 {name_column} 에서 찾은 결과입니다. "
+        f"해당하는 경우 LIKE 대신 rowid 또는 {group_column} 조건을 사용하세요.)\n" + "\n".join(lines)
+    )
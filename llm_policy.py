@@ -0,0 +1,676 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import contextvars
+import math
+import queue
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler, BaseCallbackManager
+from langchain_core.callbacks.manager import handle_event
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import ensure_config
+from langchain_core.tracers._streaming import _StreamingCallbackHandler
+
+# 재시도할 OpenAI SDK 예외 (openai 모듈을 import 하지 않도록 이름으로 비교)
+_RETRYABLE_ERRORS = {"APITimeoutError", "APIConnectionError", "RateLimitError", "InternalServerError"}
+
+
+class DeadlineExceeded(TimeoutError):
+    """노드별 LLM 호출 제한 시간 초과"""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """일시적인 오류(시간 초과, 연결 오류, 429, 5xx)인지 확인"""
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in _RETRYABLE_ERRORS:
+        return True
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+def _earliest(*times: Optional[float]) -> Optional[float]:
+    values = [t for t in times if t is not None]
+    return min(values) if values else None
+
+
+def _timeout(wake: Optional[float]) -> Optional[float]:
+    return None if wake is None else max(0.0, wake - time.monotonic())
+
+
+class LatencyWindow:
+    """최근 호출 지연 시간(초) 표본 (hedge 지연 시간 계산용)"""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """nearest-rank 방식 분위수 (표본이 없으면 None)"""
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered), max(1, math.ceil(q * len(ordered)))) - 1]
+
+
+class _GatedHandler(BaseCallbackHandler):
+    """부모 콜백 핸들러를 감싸 이벤트를 _AttemptGate 로 보내는 핸들러 (시도마다 하나)"""
+
+    def __init__(self, inner: BaseCallbackHandler, gate: "_AttemptGate", attempt: int):
+        self.inner = inner
+        self.gate = gate
+        self.attempt = attempt
+        self.raise_error = inner.raise_error
+        self.run_inline = inner.run_inline
+
+
+class _GatedStreamingHandler(_GatedHandler):
+    """스트리밍 핸들러(LangGraph messages 모드 등)를 감싼 핸들러 (모델이 토큰 스트리밍 여부를 판단할 수 있도록)"""
+
+    def tap_output_iter(self, run_id, output):
+        return self.inner.tap_output_iter(run_id, output)
+
+    def tap_output_aiter(self, run_id, output):
+        return self.inner.tap_output_aiter(run_id, output)
+
+
+def _gated_event(name: str):
+    def handle(self, *args, **kwargs):
+        self.gate.event(self.attempt, self.inner, name, args, kwargs)
+    return handle
+
+
+for _name in dir(BaseCallbackHandler):
+    if _name.startswith("on_"):
+        setattr(_GatedHandler, _name, _gated_event(_name))
+    elif _name.startswith("ignore_"):
+        setattr(_GatedHandler, _name, property(lambda self, name=_name: getattr(self.inner, name)))
+
+
+class _AttemptGate:
+    """
+    정책 호출 한 번의 여러 시도(hedge/재시도) 중 승자의 콜백 이벤트만 부모 콜백에 전달
+
+    시도마다 부모 콜백(UI 토큰 스트리밍, 토큰 사용량 기록 등)을 감싼 config 로 실행하고, 승자가 정해지기 전의
+    이벤트는 보관했다가 승자의 것만 전달한다. 승자가 정해진 뒤에는 승자의 이벤트만 바로 전달하고 나머지는 버린다.
+    """
+
+    def __init__(self):
+        # 호출한 노드의 config (호출 스레드/task 의 context 에서 생성해야 함)
+        self._config = ensure_config()
+        self._lock = threading.RLock()
+        self._attempts = 0
+        self._buffers: Dict[int, list] = {}
+        self._winner: Optional[int] = None
+        self._closed = False
+
+    def attempt(self) -> Tuple[int, Optional[RunnableConfig]]:
+        """새 시도 번호와 해당 시도를 실행할 config (부모 콜백이 없으면 None)"""
+        with self._lock:
+            attempt = self._attempts
+            self._attempts += 1
+            self._buffers[attempt] = []
+        callbacks = self._config.get("callbacks")
+        if not callbacks:
+            return attempt, None
+
+        wrapped: Dict[int, _GatedHandler] = {}
+
+        def gated(handler: BaseCallbackHandler) -> _GatedHandler:
+            if id(handler) not in wrapped:
+                cls = _GatedStreamingHandler if isinstance(handler, _StreamingCallbackHandler) else _GatedHandler
+                wrapped[id(handler)] = cls(handler, self, attempt)
+            return wrapped[id(handler)]
+
+        if isinstance(callbacks, BaseCallbackManager):
+            manager = callbacks.copy()
+            manager.handlers = [gated(handler) for handler in callbacks.handlers]
+            manager.inheritable_handlers = [gated(handler) for handler in callbacks.inheritable_handlers]
+        else:
+            manager = [gated(handler) for handler in callbacks]
+        return attempt, {**self._config, "callbacks": manager}
+
+    def event(self, attempt: int, handler: BaseCallbackHandler, name: str, args: tuple, kwargs: dict):
+        with self._lock:
+            if self._winner is None:
+                if not self._closed:
+                    self._buffers[attempt].append((handler, name, args, kwargs))
+                return
+            if attempt == self._winner:
+                handle_event([handler], name, None, *args, **kwargs)
+
+    def choose(self, attempt: int):
+        """승자 결정 (보관한 승자의 이벤트를 전달하고 나머지 시도의 이벤트는 버림)"""
+        with self._lock:
+            if self._winner is not None or self._closed:
+                return
+            self._winner = attempt
+            for handler, name, args, kwargs in self._buffers.get(attempt, []):
+                handle_event([handler], name, None, *args, **kwargs)
+            self._buffers.clear()
+
+    def close(self):
+        """호출 종료 (승자 없이 끝났으면 이후 이벤트도 모두 버림)"""
+        with self._lock:
+            self._closed = True
+            self._buffers.clear()
+
+
+class CallPolicy:
+    """
+    LLM 호출 정책 (노드별 제한 시간, hedged request, 지터 재시도)
+
+    - deadline: 재시도를 포함한 호출 전체의 제한 시간(초), 초과 시 DeadlineExceeded
+      노드가 LLM 을 여러 번 호출하면 node_deadline() 으로 구한 제한 시각을 각 호출에 전달해 노드 전체에 적용한다.
+    - hedge: 응답이 최근 지연 시간의 hedge_quantile 분위수(p95)보다 늦으면 같은 요청을 한 번 더 보내고
+      먼저 도착한 응답을 사용한다. 늦은 쪽은 취소한다 (비동기는 task 취소, 동기 스트리밍은 다음 토큰에서 중단,
+      동기 호출은 결과를 버리고 스레드가 끝나기를 기다리지 않으며 abandoned 로 집계).
+      스트리밍은 첫 토큰까지의 시간을 기준으로 한다.
+      표본이 hedge_min_samples 개 미만이면 hedge 하지 않고, hedge 는 전체 호출의 max_hedge_ratio 이내로 제한한다.
+    - 콜백: 모든 시도는 부모 콜백을 감싼 config 로 실행되고, 승자의 이벤트만 전달된다
+      (UI 토큰 스트리밍과 토큰 사용량은 먼저 응답한 시도 하나만 반영)
+    - retry: 일시적인 오류는 최대 max_attempts 번까지 full jitter 지수 백오프로 재시도한다
+      (스트리밍은 첫 토큰을 받기 전까지만 재시도)
+
+    Runnable 을 감싸지 않고 호출 시 전달받으므로 app.context 의 모델을 교체(FakeChatModel 등)해도 그대로 적용된다.
+    """
+
+    def __init__(self, name: str, deadline: Optional[float] = None, hedge: bool = True,
+                 hedge_quantile: float = 0.95, hedge_min_samples: int = 20, hedge_min_delay: float = 0.0,
+                 max_hedge_ratio: float = 0.1, max_attempts: int = 3, backoff: float = 0.5,
+                 backoff_max: float = 4.0, window: int = 200, executor: Optional[ThreadPoolExecutor] = None,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            name: 정책 이름 (노드 이름, 로그/오류 메시지에 사용)
+            deadline: 호출 전체 제한 시간(초), None 이면 제한 없음
+            hedge: hedged request 사용 여부
+            hedge_quantile: hedge 지연 시간으로 사용할 최근 지연 시간 분위수
+            hedge_min_samples: hedge 를 시작하기 위한 최소 표본 수
+            hedge_min_delay: hedge 지연 시간 하한(초)
+            max_hedge_ratio: 전체 호출 대비 최대 hedge 비율
+            max_attempts: 최대 시도 횟수 (1 이면 재시도 없음)
+            backoff: 첫 재시도 백오프 상한(초), 시도마다 두 배
+            backoff_max: 백오프 상한(초)
+            window: 지연 시간 표본 수
+            executor: 동기 호출을 실행할 스레드풀 (제한 시간/hedge 가 없으면 호출 스레드에서 바로 실행)
+            seed: 백오프 지터 난수 seed
+        """
+        self.name = name
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.latencies = LatencyWindow(window)
+        self.executor = executor
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts = {"calls": 0, "ok": 0, "errors": 0, "deadline_exceeded": 0,
+                        "retries": 0, "hedges": 0, "hedge_wins": 0, "abandoned": 0}
+
+    # ------------------------------------------------------------------
+    # 공통
+    # ------------------------------------------------------------------
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def hedge_delay(self) -> Optional[float]:
+        """현재 hedge 지연 시간(초), hedge 하지 않으면 None"""
+        if not self.hedge or len(self.latencies) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, self.latencies.quantile(self.hedge_quantile))
+
+    def _hedge_at(self, started: float) -> Optional[float]:
+        delay = self.hedge_delay()
+        return None if delay is None else started + delay
+
+    def _take_hedge(self) -> bool:
+        """hedge 비율 한도 안이면 hedge 횟수를 기록하고 True"""
+        with self._lock:
+            if self._counts["hedges"] + 1 > self.max_hedge_ratio * self._counts["calls"]:
+                return False
+            self._counts["hedges"] += 1
+            return True
+
+    def node_deadline(self) -> Optional[float]:
+        """지금부터 deadline 초 후의 제한 시각 (time.monotonic 기준, 노드 실행 시작 시 한 번 구해 각 호출에 전달)"""
+        return None if self.deadline is None else time.monotonic() + self.deadline
+
+    def _deadline_at(self, deadline_at: Optional[float]) -> Optional[float]:
+        return self.node_deadline() if deadline_at is None else deadline_at
+
+    def _deadline_error(self) -> DeadlineExceeded:
+        self._count("deadline_exceeded")
+        return DeadlineExceeded(f"{self.name} LLM 응답 시간 초과 ({self.deadline:g}초)")
+
+    def _retry_delay(self, error: BaseException, attempt: int, deadline_at: Optional[float]) -> Optional[float]:
+        """재시도 전 대기 시간 (재시도하지 않으면 None)"""
+        if attempt >= self.max_attempts or not is_retryable(error):
+            return None
+        with self._lock:
+            delay = self._rng.uniform(0.0, min(self.backoff_max, self.backoff * 2 ** (attempt - 1)))
+        if deadline_at is not None and time.monotonic() + delay >= deadline_at:
+            return None
+        self._count("retries")
+        return delay
+
+    def _direct(self, deadline_at: Optional[float]) -> bool:
+        """제한 시간과 hedge 가 모두 없으면 호출 스레드에서 바로 실행"""
+        return deadline_at is None and self.hedge_delay() is None
+
+    def stats(self) -> Dict[str, float]:
+        """누적 호출/재시도/hedge 수와 현재 hedge 지연 시간(ms, hedge 하지 않으면 -1)"""
+        with self._lock:
+            counts = dict(self._counts)
+        delay = self.hedge_delay()
+        return {**counts, "hedge_delay_ms": -1 if delay is None else delay * 1000}
+
+    # ------------------------------------------------------------------
+    # 동기 호출
+    # ------------------------------------------------------------------
+
+    def _submit(self, fn: Callable[[], Any], context: contextvars.Context) -> Future:
+        with self._lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix=f"llm-{self.name}")
+        return self.executor.submit(context.run, fn)
+
+    def invoke(self, runnable, input: Any, deadline_at: Optional[float] = None) -> Any:
+        """
+        runnable.invoke(input) 를 정책에 따라 실행
+
+        Args:
+            deadline_at: 노드 단위 제한 시각 (node_deadline(), None 이면 지금부터 deadline 초)
+        """
+        self._count("calls")
+        deadline_at = self._deadline_at(deadline_at)
+        gate = _AttemptGate()
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                try:
+                    if self._direct(deadline_at):
+                        started = time.monotonic()
+                        result = runnable.invoke(input)
+                        self.latencies.add(time.monotonic() - started)
+                    else:
+                        result = self._hedged_invoke(
+                            lambda config: runnable.invoke(input, config=config), deadline_at, gate
+                        )
+                    self._count("ok")
+                    return result
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt, deadline_at)
+                    if delay is None:
+                        self._count("errors")
+                        raise
+                    time.sleep(delay)
+        finally:
+            gate.close()
+
+    def _hedged_invoke(self, fn: Callable[[Optional[RunnableConfig]], Any], deadline_at: Optional[float],
+                       gate: _AttemptGate) -> Any:
+        if deadline_at is not None and time.monotonic() >= deadline_at:
+            raise self._deadline_error()
+        futures: Dict[Future, Tuple[int, float]] = {}
+
+        def submit():
+            attempt, config = gate.attempt()
+            futures[self._submit(lambda: fn(config), contextvars.copy_context())] = (attempt, time.monotonic())
+            return attempt
+
+        primary = submit()
+        hedge_at = self._hedge_at(futures[next(iter(futures))][1])
+        error = None
+        try:
+            while futures:
+                done, _ = wait(list(futures), timeout=_timeout(_earliest(deadline_at, hedge_at)),
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    attempt, future_started = futures.pop(future)
+                    if future.exception() is None:
+                        gate.choose(attempt)
+                        self._record(attempt != primary, time.monotonic() - future_started)
+                        return future.result()
+                    error = error or future.exception()
+                now = time.monotonic()
+                if deadline_at is not None and now >= deadline_at:
+                    raise self._deadline_error()
+                if hedge_at is not None and now >= hedge_at:
+                    hedge_at = None
+                    if futures and self._take_hedge():
+                        submit()
+            raise error
+        finally:
+            # 실행 중인 스레드는 멈출 수 없으므로 결과를 버리고 abandoned 로 집계 (콜백 이벤트는 _AttemptGate 가 버림)
+            for future in futures:
+                if not future.cancel():
+                    self._count("abandoned")
+
+    def _record(self, hedged: bool, elapsed: float):
+        """승자의 지연 시간만 표본에 추가 (늦은 쪽의 경과 시간은 완료된 응답이 아니므로 p95 를 부풀리지 않도록 제외)"""
+        self.latencies.add(elapsed)
+        if hedged:
+            self._count("hedge_wins")
+
+    def stream(self, runnable, input: Any, deadline_at: Optional[float] = None) -> Iterator[Any]:
+        """runnable.stream(input) 를 정책에 따라 실행 (첫 토큰 전까지만 재시도, deadline_at 은 invoke 와 같음)"""
+        self._count("calls")
+        deadline_at = self._deadline_at(deadline_at)
+        if self._direct(deadline_at):
+            yield from self._direct_stream(runnable, input)
+            return
+        gate = _AttemptGate()
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                emitted = False
+                try:
+                    for chunk in self._hedged_stream(runnable, input, deadline_at, gate):
+                        emitted = True
+                        yield chunk
+                    self._count("ok")
+                    return
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    delay = None if emitted else self._retry_delay(e, attempt, deadline_at)
+                    if delay is None:
+                        self._count("errors")
+                        raise
+                    time.sleep(delay)
+        finally:
+            gate.close()
+
+    def _direct_stream(self, runnable, input: Any) -> Iterator[Any]:
+        attempt = 0
+        while True:
+            attempt += 1
+            emitted = False
+            started = time.monotonic()
+            try:
+                for chunk in runnable.stream(input):
+                    if not emitted:
+                        emitted = True
+                        self.latencies.add(time.monotonic() - started)
+                    yield chunk
+                self._count("ok")
+                return
+            except Exception as e:
+                delay = None if emitted else self._retry_delay(e, attempt, None)
+                if delay is None:
+                    self._count("errors")
+                    raise
+                time.sleep(delay)
+
+    def _hedged_stream(self, runnable, input: Any, deadline_at: Optional[float],
+                       gate: _AttemptGate) -> Iterator[Any]:
+        if deadline_at is not None and time.monotonic() >= deadline_at:
+            raise self._deadline_error()
+        events: "queue.Queue" = queue.Queue()
+        stops: Dict[int, threading.Event] = {}
+        started: Dict[int, float] = {}
+        finished = set()
+
+        def pump(stream_id: int, config: Optional[RunnableConfig], stop: threading.Event):
+            try:
+                iterator = iter(runnable.stream(input, config=config))
+                try:
+                    for chunk in iterator:
+                        if stop.is_set():
+                            return
+                        events.put((stream_id, "chunk", chunk))
+                finally:
+                    close = getattr(iterator, "close", None)
+                    if close is not None:
+                        close()
+                events.put((stream_id, "end", None))
+            except BaseException as e:
+                events.put((stream_id, "error", e))
+
+        def start() -> int:
+            stream_id, config = gate.attempt()
+            stops[stream_id] = threading.Event()
+            started[stream_id] = time.monotonic()
+            self._submit(lambda: pump(stream_id, config, stops[stream_id]), contextvars.copy_context())
+            return stream_id
+
+        primary = start()
+        hedge_at = self._hedge_at(started[primary])
+        alive = {primary}
+        winner = None
+        error = None
+        try:
+            while True:
+                wake = _earliest(deadline_at, hedge_at if winner is None else None)
+                try:
+                    stream_id, kind, payload = events.get(timeout=_timeout(wake))
+                except queue.Empty:
+                    now = time.monotonic()
+                    if deadline_at is not None and now >= deadline_at:
+                        raise self._deadline_error()
+                    if hedge_at is not None and now >= hedge_at:
+                        hedge_at = None
+                        if winner is None and alive and self._take_hedge():
+                            alive.add(start())
+                    continue
+
+                if kind != "chunk":
+                    finished.add(stream_id)
+                if winner is not None and stream_id != winner:
+                    continue
+                if kind == "error":
+                    alive.discard(stream_id)
+                    if winner is not None:
+                        raise payload
+                    error = error or payload
+                    if not alive:
+                        raise error
+                    continue
+                if winner is None:
+                    winner = stream_id
+                    gate.choose(winner)
+                    self._record(winner != primary, time.monotonic() - started[winner])
+                    for other, stop in stops.items():
+                        if other != winner:
+                            stop.set()
+                if kind == "end":
+                    return
+                yield payload
+        finally:
+            # 남은 스레드는 다음 토큰에서 멈추지만 첫 토큰 전이면 응답이 올 때까지 실행되므로 abandoned 로 집계
+            for stream_id, stop in stops.items():
+                stop.set()
+                if stream_id not in finished:
+                    self._count("abandoned")
+
+    # ------------------------------------------------------------------
+    # 비동기 호출
+    # ------------------------------------------------------------------
+
+    async def ainvoke(self, runnable, input: Any, deadline_at: Optional[float] = None) -> Any:
+        """invoke 의 비동기 버전 (늦은 쪽 요청은 task 취소)"""
+        self._count("calls")
+        deadline_at = self._deadline_at(deadline_at)
+        gate = _AttemptGate()
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                try:
+                    result = await self._hedged_ainvoke(
+                        lambda config: runnable.ainvoke(input, config=config), deadline_at, gate
+                    )
+                    self._count("ok")
+                    return result
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt, deadline_at)
+                    if delay is None:
+                        self._count("errors")
+                        raise
+                    await asyncio.sleep(delay)
+        finally:
+            gate.close()
+
+    async def _hedged_ainvoke(self, afn: Callable[[Optional[RunnableConfig]], Any], deadline_at: Optional[float],
+                              gate: _AttemptGate) -> Any:
+        if deadline_at is not None and time.monotonic() >= deadline_at:
+            raise self._deadline_error()
+        tasks: Dict[asyncio.Future, Tuple[int, float]] = {}
+
+        def start() -> int:
+            attempt, config = gate.attempt()
+            tasks[asyncio.ensure_future(afn(config))] = (attempt, time.monotonic())
+            return attempt
+
+        primary = start()
+        hedge_at = self._hedge_at(next(iter(tasks.values()))[1])
+        error = None
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(list(tasks), timeout=_timeout(_earliest(deadline_at, hedge_at)),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    attempt, task_started = tasks.pop(task)
+                    if task.exception() is None:
+                        gate.choose(attempt)
+                        self._record(attempt != primary, time.monotonic() - task_started)
+                        return task.result()
+                    error = error or task.exception()
+                now = time.monotonic()
+                if deadline_at is not None and now >= deadline_at:
+                    raise self._deadline_error()
+                if hedge_at is not None and now >= hedge_at:
+                    hedge_at = None
+                    if tasks and self._take_hedge():
+                        start()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def astream(self, runnable, input: Any, deadline_at: Optional[float] = None) -> AsyncIterator[Any]:
+        """stream 의 비동기 버전"""
+        self._count("calls")
+        deadline_at = self._deadline_at(deadline_at)
+        gate = _AttemptGate()
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                emitted = False
+                try:
+                    async for chunk in self._hedged_astream(runnable, input, deadline_at, gate):
+                        emitted = True
+                        yield chunk
+                    self._count("ok")
+                    return
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    delay = None if emitted else self._retry_delay(e, attempt, deadline_at)
+                    if delay is None:
+                        self._count("errors")
+                        raise
+                    await asyncio.sleep(delay)
+        finally:
+            gate.close()
+
+    async def _hedged_astream(self, runnable, input: Any, deadline_at: Optional[float],
+                              gate: _AttemptGate) -> AsyncIterator[Any]:
+        if deadline_at is not None and time.monotonic() >= deadline_at:
+            raise self._deadline_error()
+        events: "asyncio.Queue" = asyncio.Queue()
+        tasks: Dict[int, asyncio.Task] = {}
+        started: Dict[int, float] = {}
+
+        async def pump(stream_id: int, config: Optional[RunnableConfig]):
+            try:
+                async for chunk in runnable.astream(input, config=config):
+                    events.put_nowait((stream_id, "chunk", chunk))
+                events.put_nowait((stream_id, "end", None))
+            except asyncio.CancelledError:
+                raise
+            except BaseException as e:
+                events.put_nowait((stream_id, "error", e))
+
+        def start() -> int:
+            stream_id, config = gate.attempt()
+            started[stream_id] = time.monotonic()
+            tasks[stream_id] = asyncio.get_running_loop().create_task(pump(stream_id, config))
+            return stream_id
+
+        primary = start()
+        hedge_at = self._hedge_at(started[primary])
+        alive = {primary}
+        winner = None
+        error = None
+        try:
+            while True:
+                wake = _earliest(deadline_at, hedge_at if winner is None else None)
+                try:
+                    stream_id, kind, payload = await asyncio.wait_for(events.get(), _timeout(wake))
+                except asyncio.TimeoutError:
+                    now = time.monotonic()
+                    if deadline_at is not None and now >= deadline_at:
+                        raise self._deadline_error()
+                    if hedge_at is not None and now >= hedge_at:
+                        hedge_at = None
+                        if winner is None and alive and self._take_hedge():
+                            alive.add(start())
+                    continue
+
+                if winner is not None and stream_id != winner:
+                    continue
+                if kind == "error":
+                    alive.discard(stream_id)
+                    if winner is not None:
+                        raise payload
+                    error = error or payload
+                    if not alive:
+                        raise error
+                    continue
+                if winner is None:
+                    winner = stream_id
+                    gate.choose(winner)
+                    self._record(winner != primary, time.monotonic() - started[winner])
+                    for other, task in tasks.items():
+                        if other != winner:
+                            task.cancel()
+                if kind == "end":
+                    return
+                yield payload
+        finally:
+            for task in tasks.values():
+                task.cancel()
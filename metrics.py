@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# 지연 시간 히스토그램 구간(초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 크기 히스토그램 구간 (행 수 / 바이트)
+SIZE_BUCKETS = (0, 1, 10, 100, 1000, 10_000, 100_000, 1_000_000)
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape_label_value(value) -> str:
+    """Prometheus 텍스트 형식의 라벨 값 이스케이프 (역슬래시, 큰따옴표, 줄바꿈)"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: Tuple, extra: Optional[Tuple] = None) -> str:
+    items = list(key) + list(extra or ())
+    if not items:
+        return ""
+    body = ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in items)
+    return "{" + body + "}"
+
+
+class MetricsRegistry:
+    """
+    Prometheus 텍스트 형식으로 출력 가능한 간단한 메트릭 저장소
+
+    counter / gauge / histogram 을 지원하며, render() 시 등록된 collector 를 호출하여
+    캐시 통계 등 외부 값을 gauge 로 갱신한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Tuple, float]] = defaultdict(dict)
+        self._gauges: Dict[str, Dict[Tuple, float]] = defaultdict(dict)
+        self._histograms: Dict[str, Dict[Tuple, Dict]] = defaultdict(dict)
+        self._buckets: Dict[str, Tuple] = {}
+        self._collectors: List[Callable[["MetricsRegistry"], None]] = []
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Tuple = LATENCY_BUCKETS):
+        """메트릭 종류(counter/gauge/histogram)와 설명 등록"""
+        self._help[name] = (kind, help_text)
+        if kind == "histogram":
+            self._buckets[name] = buckets
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        with self._lock:
+            key = _label_key(labels)
+            self._counters[name][key] = self._counters[name].get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[name][_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        buckets = self._buckets.get(name, LATENCY_BUCKETS)
+        with self._lock:
+            key = _label_key(labels)
+            series = self._histograms[name].get(key)
+            if series is None:
+                series = self._histograms[name][key] = {"counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def register_collector(self, collector: Callable[["MetricsRegistry"], None]):
+        """render() 직전에 호출될 collector 등록"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Prometheus text exposition format 문자열 생성"""
+        for collector in self._collectors:
+            try:
+                collector(self)
+            except Exception:
+                pass
+
+        lines = []
+        with self._lock:
+            names = sorted(set(self._counters) | set(self._gauges) | set(self._histograms))
+            for name in names:
+                kind, help_text = self._help.get(name, ("untyped", ""))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in self._counters.get(name, {}).items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+                for key, value in self._gauges.get(name, {}).items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+                buckets = self._buckets.get(name, LATENCY_BUCKETS)
+                for key, series in self._histograms.get(name, {}).items():
+                    for bound, count in zip(buckets, series["counts"]):
+                        lines.append(f"{name}_bucket{_format_labels(key, (('le', bound),))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {series['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {series['sum']}")
+                    lines.append(f"{name}_count{_format_labels(key)} {series['count']}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+registry.describe("nutrition_node_duration_seconds", "histogram", "Wall time of each graph node")
+registry.describe("nutrition_node_errors_total", "counter", "Graph node executions that raised")
+registry.describe("nutrition_request_duration_seconds", "histogram", "End-to-end handler time per question")
+registry.describe("nutrition_queue_wait_seconds", "histogram", "Time from handler entry until the first graph node starts")
+registry.describe("nutrition_llm_tokens_total", "counter", "LLM prompt/completion tokens by node")
+registry.describe("nutrition_sql_duration_seconds", "histogram", "SQL execution time (cache misses only)")
+registry.describe("nutrition_sql_rows", "histogram", "Rows returned per SQL execution", SIZE_BUCKETS)
+registry.describe("nutrition_sql_result_bytes", "histogram", "Result size in bytes per SQL execution", SIZE_BUCKETS)
+registry.describe("nutrition_cache_events_total", "counter", "Cache hits and misses")
+
+##################################################################
+# 요청별 trace
+##################################################################
+
+def get_trace(config) -> Optional[List[Dict]]:
+    """graph config 에 포함된 요청별 trace 목록 반환 (없으면 None)"""
+    return (config or {}).get("configurable", {}).get("trace")
+
+
+def add_trace_event(config, event: Dict):
+    """요청별 trace 에 이벤트 추가"""
+    trace = get_trace(config)
+    if trace is not None:
+        trace.append({"ts": time.time(), **event})
+
+
+def dump_trace(trace_dir: str, question: str, trace: List[Dict], total: float) -> str:
+    """요청별 trace 를 JSON 파일로 저장하고 경로 반환"""
+    os.makedirs(trace_dir, exist_ok=True)
+    path = os.path.join(trace_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"question": question, "total_seconds": total, "events": trace}, f, ensure_ascii=False, indent=2)
+    return path
+
+##################################################################
+# 노드 / LLM 계측
+##################################################################
+
+def instrument_node(node_name: str, fn: Callable) -> Callable:
+    """그래프 노드 실행 시간을 기록하는 wrapper (sync/async 모두 지원)"""
+
+    def record(started: float, config, error: Optional[Exception]):
+        duration = time.perf_counter() - started
+        registry.observe("nutrition_node_duration_seconds", duration, node=node_name)
+        if error is not None:
+            registry.inc("nutrition_node_errors_total", node=node_name)
+        add_trace_event(config, {
+            "type": "node", "node": node_name, "duration": duration,
+            "error": str(error) if error else None,
+        })
+
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(state, config):
+            started = time.perf_counter()
+            try:
+                result = await fn(state, config)
+            except Exception as e:
+                record(started, config, e)
+                raise
+            record(started, config, None)
+            return result
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(state, config):
+        started = time.perf_counter()
+        try:
+            result = fn(state, config)
+        except Exception as e:
+            record(started, config, e)
+            raise
+        record(started, config, None)
+        return result
+    return wrapper
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """LLM 호출의 prompt/completion 토큰 수를 노드별로 기록하는 callback"""
+
+    def __init__(self, trace: Optional[List[Dict]] = None):
+        self.trace = trace
+        self._nodes: Dict = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._nodes[run_id] = (metadata or {}).get("langgraph_node", "unknown")
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._nodes[run_id] = (metadata or {}).get("langgraph_node", "unknown")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        node = self._nodes.pop(run_id, "unknown")
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+
+        # 스트리밍 응답은 llm_output 대신 message.usage_metadata 에 사용량이 기록됨
+        if not usage:
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens += metadata.get("input_tokens", 0)
+                    completion_tokens += metadata.get("output_tokens", 0)
+
+        registry.inc("nutrition_llm_tokens_total", prompt_tokens, node=node, kind="prompt")
+        registry.inc("nutrition_llm_tokens_total", completion_tokens, node=node, kind="completion")
+        if self.trace is not None:
+            self.trace.append({
+                "ts": time.time(), "type": "llm", "node": node,
+                "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            })
+
+##################################################################
+# /metrics HTTP 엔드포인트
+##################################################################
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """백그라운드 스레드에서 /metrics 엔드포인트 서버 시작"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
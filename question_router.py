@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, TypedDict
+
+from result_cache import db_fingerprint
+from result_shaper import split_label_unit
+
+# csv_converter.py 가 생성하는 영양소별 상위 식품 / 식품군별 요약 테이블
+TOPK_TABLE = "nutrition_topk"
+GROUP_SUMMARY_TABLE = "nutrition_group_summary"
+
+# 스키마 라벨에 없는 표현 -> 라벨 (한국어 동의어 / 영어 이름)
+NUTRIENT_SYNONYMS = {
+    "칼로리": "에너지", "열량": "에너지", "철분": "철", "엽산": "엽산 엽산당량",
+    "포화지방": "총 포화 지방산", "트랜스지방": "총 트랜스 지방산", "불포화지방": "총 불포화 지방산",
+    "dha": "도코사 헥사에노산 22 6 n 3", "epa": "에이코사 펜타에노산 20 5 n 3",
+    "energy": "에너지", "calorie": "에너지", "calories": "에너지", "kcal": "에너지",
+    "water": "수분", "moisture": "수분", "protein": "단백질", "fat": "지방", "ash": "회분",
+    "carbohydrate": "탄수화물", "carbohydrates": "탄수화물", "carbs": "탄수화물",
+    "sugar": "당류", "sugars": "당류", "fiber": "총 식이섬유", "fibre": "총 식이섬유",
+    "dietaryfiber": "총 식이섬유", "calcium": "칼슘", "iron": "철", "magnesium": "마그네슘",
+    "phosphorus": "인", "potassium": "칼륨", "sodium": "나트륨", "zinc": "아연", "copper": "구리",
+    "manganese": "망간", "selenium": "셀레늄", "molybdenum": "몰리브덴", "iodine": "요오드",
+    "retinol": "레티놀", "betacarotene": "베타카로틴", "thiamin": "티아민", "thiamine": "티아민",
+    "riboflavin": "리보플라빈", "niacin": "니아신", "pantothenicacid": "판토텐산", "biotin": "비오틴",
+    "folate": "엽산 엽산당량", "folicacid": "엽산 엽산당량",
+    "omega3": "오메가3 지방산", "omega6": "오메가6 지방산",
+    "saturatedfat": "총 포화 지방산", "transfat": "총 트랜스 지방산",
+}
+
+# 식품 전체 영양소 답변에 먼저 나열할 주요 영양소 라벨
+KEY_NUTRIENTS = ["에너지", "단백질", "지방", "탄수화물", "당류", "총 식이섬유", "나트륨", "칼슘", "철", "비타민 C"]
+
+_PARTICLE = r"(?:이|가|은|는|의)?"
+_LIMIT = r"(?P<limit>\d+)\s*(?:개|가지)"
+
+# "<식품군> 중 <영양소>가 가장 많은 식품 N개는?", "상위 N개 <영양소>가 높은 식품은?"
+TOP_FOODS_PATTERN = re.compile(
+    r"^(?:(?P<group>.+?)\s*중(?:에서|에)?\s+)?"
+    r"(?:상위\s*(?P<top>\d+)\s*개\s*)?"
+    r"(?P<nutrient>.+?)\s*(?:함량)?" + _PARTICLE + r"\s+"
+    r"(?P<most>가장\s+|제일\s+)?(?:많은|높은|풍부한)\s*(?:식품|음식)"
+    r"(?:\s*" + _LIMIT + r")?\s*(?:은|는)?\s*(?:무엇인가요|뭐야|알려줘)?\s*\??$"
+)
+
+# "<식품군>의 평균 <영양소> 함량은?", "식품군별 평균 <영양소>는?"
+GROUP_AVERAGE_PATTERN = re.compile(
+    r"^(?:(?P<by_group>식품군\s*별)|(?P<group>.+?)\s*(?:의|중))\s*평균\s*"
+    r"(?P<nutrient>.+?)\s*(?:함량)?\s*(?:은|는)?\s*(?:얼마인가요|얼마야|무엇인가요|알려줘)?\s*\??$"
+)
+
+# "<식품>에 들어있는 모든 영양소는?"
+FOOD_NUTRIENTS_PATTERN = re.compile(
+    r"^(?P<food>.+?)(?:에|의)\s*(?:들어\s*있는\s*|포함된\s*)?(?:모든\s*)?(?:영양소|영양\s*성분)"
+    r"\s*(?:은|는)?\s*(?:무엇인가요|뭐야|알려줘)?\s*\??$"
+)
+
+
+class TemplateMatch(TypedDict):
+    template: str             # "top_foods" | "group_average" | "food_nutrients"
+    sql: str                  # ? 자리표시자를 사용하는 SQL
+    params: List[Any]         # sql 에 바인딩할 값
+    label: str                # 영양소 라벨 (food_nutrients 는 빈 문자열)
+    unit: str
+    group: Optional[str]      # 식품군 조건 (없으면 None)
+    food: Optional[str]       # food_nutrients 대상 식품명
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _normalize(text: str) -> str:
+    """별칭 비교용 정규화 (공백/하이픈 제거, 소문자)"""
+    return re.sub(r"[\s\-]+", "", text).lower()
+
+
+def _sql_literal(value: Any) -> str:
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def _strip_notation(label: str) -> str:
+    """지방산 탄소수 표기 제거 ("리놀레산 18 2 n 6" -> "리놀레산")"""
+    return re.sub(r"(?:\s+(?:\d+\w*|n|t))+$", "", label)
+
+
+def build_nutrient_aliases(columns: Dict[str, str]) -> Dict[str, str]:
+    """
+    스키마의 숫자 컬럼으로 영양소 별칭 사전 생성
+
+    - 라벨 그대로 ("비타민 C" -> "비타민c"), "총" 을 뺀 이름 ("총 식이섬유" -> "식이섬유")
+    - 탄소수 표기를 뺀 지방산 이름 ("리놀레산 18 2 n 6" -> "리놀레산"), "오메가3 지방산" -> "오메가3"
+    - 비타민 영어 이름 ("vitaminc"), NUTRIENT_SYNONYMS 의 동의어/영어 이름
+
+    Returns:
+        정규화된 별칭 -> 컬럼 이름
+    """
+    aliases: Dict[str, str] = {}
+    by_label: Dict[str, str] = {}
+    for column, dtype in columns.items():
+        label, _ = split_label_unit(column)
+        if dtype != "REAL" or not label or label.startswith("column"):
+            continue
+        by_label[label] = column
+        names = [label]
+        if label.startswith("총 "):
+            names.append(label[2:])
+        base = _strip_notation(label)
+        names.append(base)
+        if base.endswith(" 지방산") and not base.startswith("총 "):
+            names.append(base[: -len(" 지방산")])
+        if label.startswith("비타민 "):
+            names.append("vitamin" + label[len("비타민 "):])
+        for name in names:
+            # 먼저 나온 컬럼 우선 ("니아신" 은 니아신 컬럼)
+            aliases.setdefault(_normalize(name), column)
+
+    for alias, label in NUTRIENT_SYNONYMS.items():
+        if label in by_label:
+            aliases.setdefault(_normalize(alias), by_label[label])
+    return aliases
+
+
+class QuestionRouter:
+    """
+    자주 묻는 질문 형식을 규칙으로 처리하는 라우터
+
+    질문이 템플릿과 일치하면 LLM 없이 파라미터 SQL 과 템플릿 답변을 만든다.
+    영양소/식품군/식품명이 모두 확실하게 해석될 때만 일치로 판단하고,
+    그 외의 질문은 None 을 반환하여 기존 LLM 경로로 처리되도록 한다.
+    상위 식품/식품군 평균 질문은 csv_converter.py 가 미리 계산한 요약 테이블이 있으면 그 테이블을 조회한다.
+    """
+
+    def __init__(self, db_path: str, table_name: str, name_column: str, group_column: str, max_rows: int = 50):
+        """
+        Args:
+            db_path: SQLite 데이터베이스 파일 경로
+            table_name: 식품 테이블 이름
+            name_column: 식품명 컬럼
+            group_column: 식품군 컬럼
+            max_rows: "상위 N개" 에서 허용할 최대 N (초과하면 LLM 경로로 처리)
+        """
+        self.db_path = db_path
+        self.table_name = table_name
+        self.name_column = name_column
+        self.group_column = group_column
+        self.max_rows = max_rows
+
+        self.columns: Dict[str, str] = {}
+        self.aliases: Dict[str, str] = {}
+        self.groups: Dict[str, str] = {}  # 정규화된 식품군 이름/별칭 -> 식품군
+        self.topk_rows = 0                # nutrition_topk 의 영양소별 저장 행 수 (테이블이 없으면 0)
+        self.has_group_summary = False
+        self._conn: Optional[sqlite3.Connection] = None
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+        self.refresh_if_changed()
+
+    def refresh_if_changed(self):
+        """데이터베이스 파일이 변경되었으면 별칭 사전과 식품군 목록 다시 생성"""
+        fingerprint = db_fingerprint(self.db_path)
+        if fingerprint == self._fingerprint:
+            return
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._load()
+                self._fingerprint = fingerprint
+
+    def _load(self):
+        if self._conn is not None:
+            self._conn.close()
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        self.columns = {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({_quote(self.table_name)})")}
+        self.aliases = build_nutrient_aliases(self.columns)
+
+        groups = {}
+        for (group,) in conn.execute(f"SELECT DISTINCT {_quote(self.group_column)} FROM {_quote(self.table_name)}"):
+            if not group:
+                continue
+            # "곡류 및 그 제품" -> "곡류및그제품", "곡류" / "조리가공식품류" -> "조리가공식품"
+            names = {group, group.split()[0]}
+            names.update(name[:-1] for name in list(names) if name.endswith("류") and len(name) > 2)
+            for name in names:
+                groups.setdefault(_normalize(name), group)
+        self.groups = groups
+
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.topk_rows = 0
+        if TOPK_TABLE in tables:
+            self.topk_rows = conn.execute(f"SELECT MAX(rank) FROM {TOPK_TABLE}").fetchone()[0] or 0
+        self.has_group_summary = GROUP_SUMMARY_TABLE in tables
+        self._conn = conn
+
+    def _nutrient_column(self, text: str) -> Optional[str]:
+        return self.aliases.get(_normalize(text))
+
+    def _find_food(self, text: str) -> Optional[str]:
+        """식품명 그대로 또는 "<식품>, 생것" 인 식품이 하나 있으면 그 이름"""
+        name = _quote(self.name_column)
+        for candidate in (text, f"{text}, 생것"):
+            rows = self._conn.execute(
+                f"SELECT {name} FROM {_quote(self.table_name)} WHERE {name} = ? LIMIT 2", (candidate,)
+            ).fetchall()
+            if len(rows) == 1:
+                return rows[0][0]
+        return None
+
+    def match(self, question: str) -> Optional[TemplateMatch]:
+        """질문이 템플릿과 일치하면 SQL/파라미터 반환 (불확실하면 None)"""
+        self.refresh_if_changed()
+        question = re.sub(r"\s+", " ", question).strip()
+        with self._lock:
+            match = TOP_FOODS_PATTERN.match(question)
+            if match:
+                return self._match_top_foods(match)
+            match = GROUP_AVERAGE_PATTERN.match(question)
+            if match:
+                return self._match_group_average(match)
+            match = FOOD_NUTRIENTS_PATTERN.match(question)
+            if match:
+                return self._match_food_nutrients(match)
+        return None
+
+    def _match_top_foods(self, match) -> Optional[TemplateMatch]:
+        column = self._nutrient_column(match.group("nutrient"))
+        if column is None:
+            return None
+        group = None
+        if match.group("group"):
+            group = self.groups.get(_normalize(match.group("group")))
+            if group is None:
+                return None
+
+        limit = match.group("top") or match.group("limit")
+        if limit is not None:
+            limit = int(limit)
+        else:
+            # "가장 많은 식품은?" -> 1개, "많은 식품은?" -> 10개
+            limit = 1 if match.group("most") else 10
+        if not 1 <= limit <= self.max_rows:
+            return None
+
+        name, value, group_column = _quote(self.name_column), _quote(column), _quote(self.group_column)
+        if group is None and limit <= self.topk_rows:
+            # 미리 계산한 영양소별 상위 식품 (값이 있는 식품이 topk_rows 개보다 적으면 전부 저장되어 있음)
+            sql = (f"SELECT {name}, {group_column}, value AS {value} FROM {TOPK_TABLE} "
+                   f"WHERE nutrient = ? ORDER BY rank LIMIT ?")
+            params: List[Any] = [column, limit]
+        elif group is not None and limit == 1 and self.has_group_summary:
+            # 식품군별 요약 테이블의 최대값 식품
+            sql = (f"SELECT top_food AS {name}, {group_column}, max_value AS {value} FROM {GROUP_SUMMARY_TABLE} "
+                   f"WHERE {group_column} = ? AND nutrient = ? AND top_food IS NOT NULL")
+            params = [group, column]
+        else:
+            where = f"{value} IS NOT NULL"
+            params = []
+            if group is not None:
+                where += f" AND {group_column} = ?"
+                params.append(group)
+            params.append(limit)
+            sql = (f"SELECT {name}, {group_column}, {value} FROM {_quote(self.table_name)} "
+                   f"WHERE {where} ORDER BY {value} DESC, rowid LIMIT ?")
+
+        label, unit = split_label_unit(column)
+        return {"template": "top_foods", "sql": sql, "params": params, "label": _strip_notation(label),
+                "unit": unit, "group": group, "food": None}
+
+    def _match_group_average(self, match) -> Optional[TemplateMatch]:
+        """식품군 평균 질문 (요약 테이블이 없으면 LLM 경로로 처리)"""
+        if not self.has_group_summary:
+            return None
+        column = self._nutrient_column(match.group("nutrient"))
+        if column is None:
+            return None
+        group = None
+        if not match.group("by_group"):
+            group = self.groups.get(_normalize(match.group("group")))
+            if group is None:
+                return None
+
+        group_column = _quote(self.group_column)
+        sql = (f"SELECT {group_column}, food_count, value_count, min_value, max_value, top_food, avg_value "
+               f"FROM {GROUP_SUMMARY_TABLE} WHERE nutrient = ?")
+        params: List[Any] = [column]
+        if group is not None:
+            sql += f" AND {group_column} = ?"
+            params.append(group)
+        else:
+            sql += " AND avg_value IS NOT NULL ORDER BY avg_value DESC"
+
+        label, unit = split_label_unit(column)
+        return {"template": "group_average", "sql": sql, "params": params, "label": _strip_notation(label),
+                "unit": unit, "group": group, "food": None}
+
+    def _match_food_nutrients(self, match) -> Optional[TemplateMatch]:
+        food = self._find_food(match.group("food").strip())
+        if food is None:
+            return None
+        sql = f"SELECT * FROM {_quote(self.table_name)} WHERE {_quote(self.name_column)} = ?"
+        return {"template": "food_nutrients", "sql": sql, "params": [food], "label": "", "unit": "",
+                "group": None, "food": food}
+
+    @staticmethod
+    def display_sql(match: TemplateMatch) -> str:
+        """화면 표시용 SQL (자리표시자에 값을 넣은 문자열)"""
+        params = iter(match["params"])
+        return re.sub(r"\?", lambda _: _sql_literal(next(params)), match["sql"])
+
+    @staticmethod
+    def render_answer(match: TemplateMatch, columns: List[str], rows: List[tuple]) -> str:
+        """쿼리 결과로 템플릿 답변 생성"""
+        if not rows:
+            return "죄송합니다. 조건에 맞는 식품을 찾을 수 없습니다."
+
+        if match["template"] == "top_foods":
+            unit = match["unit"]
+            prefix = f"{match['group']} 중 " if match["group"] else ""
+            subject = f"식품 {len(rows)}개는" if len(rows) > 1 else "식품은"
+            lines = [f"{prefix}{match['label']} 함량이 가장 높은 {subject} 다음과 같습니다 (100g 당).", ""]
+            for i, row in enumerate(rows, 1):
+                lines.append(f"{i}. {row[0]}: {row[-1]:g}{unit}")
+            return "\n".join(lines)
+
+        if match["template"] == "group_average":
+            unit = match["unit"]
+            if match["group"] is None:
+                lines = [f"식품군별 평균 {match['label']} 함량은 다음과 같습니다 (100g 당, 높은 순).", ""]
+                for i, row in enumerate(rows, 1):
+                    lines.append(f"{i}. {row[0]}: {row[-1]:.4g}{unit} (식품 {row[2]}개 기준)")
+                return "\n".join(lines)
+            group, food_count, value_count, min_value, max_value, top_food, avg_value = rows[0]
+            if avg_value is None:
+                return f"죄송합니다. {group}에는 {match['label']} 값이 있는 식품이 없습니다."
+            return (f"{group}의 평균 {match['label']} 함량은 100g 당 {avg_value:.4g}{unit}입니다.\n\n"
+                    f"- 값이 있는 식품: {value_count}개 (전체 {food_count}개)\n"
+                    f"- 최소 {min_value:g}{unit}, 최대 {max_value:g}{unit} ({top_food})")
+
+        # food_nutrients: 주요 영양소를 먼저 나열하고 나머지는 검색 결과 표 참고
+        row = rows[0]
+        values = {}
+        for column, value in zip(columns, row):
+            label, unit = split_label_unit(column)
+            if isinstance(value, (int, float)) and value:
+                values[label] = f"{value:g}{' ' + unit if unit else ''}"
+        lines = [f"{match['food']}의 100g 당 영양성분입니다.", ""]
+        lines.extend(f"- {label}: {values[label]}" for label in KEY_NUTRIENTS if label in values)
+        lines.append("")
+        lines.append(f"값이 있는 영양소 {len(values)}개 전체는 검색 결과를 참고하세요.")
+        return "\n".join(lines)
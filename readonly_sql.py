@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# SQLDatabase 기본값과 동일한 문자열 최대 길이
+MAX_STRING_LENGTH = 300
+
+
+class QueryBudgetExceeded(Exception):
+    """쿼리가 허용된 시간 또는 행 수를 초과한 경우"""
+
+
+def truncate_word(content: Any, length: int = MAX_STRING_LENGTH, suffix: str = "...") -> Any:
+    """긴 문자열을 단어 단위로 자르기 (langchain SQLDatabase 와 같은 규칙)"""
+    if not isinstance(content, str) or length <= 0:
+        return content
+    if len(content) <= length:
+        return content
+    return content[: length - len(suffix)].rsplit(" ", 1)[0] + suffix
+
+
+def format_rows(columns: List[str], rows: List[tuple]) -> str:
+    """QuerySQLDatabaseTool 과 같은 형식의 결과 문자열 생성"""
+    if not rows:
+        return ""
+    # SQLDatabase.run 과 동일하게 컬럼 이름 기준 dict 를 거쳐 tuple 로 변환
+    res = [
+        tuple({column: truncate_word(value) for column, value in zip(columns, row)}.values())
+        for row in rows
+    ]
+    return str(res)
+
+
+def _execute_with_budget(conn: sqlite3.Connection, query: str, max_rows: int,
+                         timeout: float, params: Sequence = ()) -> Tuple[List[str], List[tuple]]:
+    """연결에 시간 제한(progress handler)과 행 수 제한을 걸고 쿼리 실행"""
+    deadline = time.monotonic() + timeout
+    # 일정 VM 명령마다 호출되어 시간 초과 시 쿼리 중단 (0이 아닌 값 반환 시 중단)
+    conn.set_progress_handler(lambda: int(time.monotonic() > deadline), 1000)
+    cursor = conn.cursor()
+    try:
+        try:
+            cursor.execute(query, params)
+            rows = cursor.fetchmany(max_rows + 1)
+        except sqlite3.OperationalError as e:
+            if time.monotonic() > deadline:
+                raise QueryBudgetExceeded(f"query exceeded {timeout}s") from e
+            raise
+
+        if len(rows) > max_rows:
+            raise QueryBudgetExceeded(f"query returned more than {max_rows} rows")
+
+        columns = [description[0] for description in cursor.description or []]
+        return columns, rows
+    finally:
+        # 끝까지 읽지 않은 statement 가 읽기 트랜잭션을 유지하지 않도록 정리
+        cursor.close()
+        conn.set_progress_handler(None, 0)
+
+
+def run_readonly_query(db_path: str, query: str, max_rows: int = 1000, timeout: float = 2.0) -> Tuple[List[str], List[tuple]]:
+    """
+    읽기 전용 샌드박스 연결에서 쿼리 실행
+
+    Args:
+        db_path: SQLite 데이터베이스 파일 경로
+        query: 실행할 SQL 문
+        max_rows: 허용할 최대 행 수
+        timeout: 허용할 최대 실행 시간(초)
+
+    Returns:
+        (컬럼 이름 목록, 행 목록)
+
+    Raises:
+        QueryBudgetExceeded: 시간 또는 행 수 제한 초과
+        sqlite3.Error: SQL 오류
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+    try:
+        conn.execute("PRAGMA query_only = 1")
+        return _execute_with_budget(conn, query, max_rows, timeout)
+    finally:
+        conn.close()
+
+
+def _file_id(db_path: str) -> Tuple[int, int]:
+    stat = os.stat(db_path)
+    return stat.st_dev, stat.st_ino
+
+
+class ReadOnlyConnectionPool:
+    """
+    스레드별 읽기 전용 SQLite 연결 풀
+
+    - 스레드마다 하나의 연결을 만들어 재사용 (동시 세션이 하나의 연결에서 직렬화되지 않음)
+    - mode=ro URI + query_only 로 쓰기 차단, mmap_size / cache_size 로 페이지 읽기 비용 절감
+    - 쿼리마다 progress handler 로 시간 제한, fetchmany 로 행 수 제한 적용
+      (한 쿼리가 제한을 넘겨도 해당 스레드의 쿼리만 중단되고 연결은 계속 사용)
+    - WAL 모드 데이터베이스에서는 변환 도구가 쓰는 동안에도 이전 스냅샷을 계속 읽음
+    - 데이터베이스 파일이 다른 파일로 교체되면 (inode 변경) 연결을 다시 연다
+    """
+
+    def __init__(self, db_path: str, mmap_size: int = 64 * 1024 * 1024, cache_size_kb: int = 16 * 1024,
+                 busy_timeout: float = 5.0):
+        """
+        Args:
+            db_path: SQLite 데이터베이스 파일 경로
+            mmap_size: 연결별 메모리 매핑 크기 (바이트, 0 이면 사용 안 함)
+            cache_size_kb: 연결별 페이지 캐시 크기 (KiB)
+            busy_timeout: 데이터베이스가 잠겨 있을 때 기다릴 최대 시간(초)
+        """
+        self.db_path = db_path
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.busy_timeout = busy_timeout
+        self.journal_mode: Optional[str] = None
+        self._connections: Dict[int, Tuple[sqlite3.Connection, Tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+        self._queries = 0
+        self._budget_exceeded = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False,
+                               timeout=self.busy_timeout)
+        conn.execute("PRAGMA query_only = 1")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        # 읽기 전용 연결은 journal_mode 를 바꿀 수 없으므로 현재 모드만 기록 (WAL 전환은 csv_converter 에서)
+        self.journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """현재 스레드의 연결 반환 (없거나 데이터베이스 파일이 교체되었으면 새로 연결)"""
+        ident = threading.get_ident()
+        file_id = _file_id(self.db_path)
+        entry = self._connections.get(ident)
+        if entry is not None and entry[1] == file_id:
+            return entry[0]
+
+        conn = self._connect()
+        with self._lock:
+            if entry is not None:
+                entry[0].close()
+            # 종료된 스레드의 연결 정리
+            alive = {thread.ident for thread in threading.enumerate()}
+            for dead in [key for key in self._connections if key not in alive]:
+                self._connections.pop(dead)[0].close()
+            self._connections[ident] = (conn, file_id)
+        return conn
+
+    def query(self, query: str, max_rows: int = 1000, timeout: float = 2.0,
+              params: Sequence = ()) -> Tuple[List[str], List[tuple]]:
+        """
+        현재 스레드의 연결에서 시간/행 수 제한을 걸고 쿼리 실행 (params: ? 자리에 바인딩할 값)
+
+        Returns:
+            (컬럼 이름 목록, 행 목록)
+
+        Raises:
+            QueryBudgetExceeded: 시간 또는 행 수 제한 초과
+            sqlite3.Error: SQL 오류
+        """
+        conn = self.connection()
+        with self._lock:
+            self._queries += 1
+        try:
+            return _execute_with_budget(conn, query, max_rows, timeout, params)
+        except QueryBudgetExceeded:
+            with self._lock:
+                self._budget_exceeded += 1
+            raise
+
+    def close(self):
+        """모든 연결 닫기"""
+        with self._lock:
+            for conn, _ in self._connections.values():
+                conn.close()
+            self._connections.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "connections": len(self._connections),
+                "queries": self._queries,
+                "budget_exceeded": self._budget_exceeded,
+                "journal_mode": self.journal_mode,
+            }
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Callable, Dict, Generic, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+##################################################################
+# Single-flight (같은 질문의 동시 실행을 하나로 합침)
+##################################################################
+
+class _Flight(Generic[T]):
+    """실행 중인 작업 하나의 최신 출력 (출력은 화면 전체를 다시 그리는 snapshot 이므로 최신 것만 보관)"""
+
+    def __init__(self):
+        self.version = 0               # publish 횟수
+        self.latest: Optional[T] = None
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.condition = None          # AsyncSingleFlight 에서 사용하는 asyncio.Condition
+        self.task = None               # AsyncSingleFlight 의 생산자 task (GC 방지)
+
+
+class SingleFlight(Generic[T]):
+    """
+    같은 키의 동시 요청을 하나의 실행에 연결하는 single-flight (스레드 기반)
+
+    처음 요청한 쪽(leader)의 produce() 를 별도 스레드에서 한 번만 실행하고, 실행 중에 들어온
+    같은 키의 요청(follower)은 새로 실행하지 않고 같은 출력을 받는다. 늦게 합류한 요청은
+    최신 출력부터 받으며, 느린 소비자는 중간 출력을 건너뛴다 (출력이 쌓이지 않음).
+    생산자가 별도 스레드이므로 leader 의 연결이 끊어져도 다른 요청에는 영향이 없다.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight[T]] = {}
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._leaders = 0
+        self._followers = 0
+
+    def run(self, key: str, produce: Callable[[], Iterator[T]]) -> Iterator[T]:
+        """
+        키에 해당하는 실행에 합류하여 출력을 차례로 반환
+
+        Args:
+            key: 같은 실행으로 합칠 요청의 키 (정규화된 질문)
+            produce: 출력을 생성하는 함수 (키별로 동시에 하나만 실행됨)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self._leaders += 1
+                threading.Thread(
+                    target=self._produce, args=(key, flight, produce), name="single-flight", daemon=True
+                ).start()
+            else:
+                self._followers += 1
+        return self._consume(flight)
+
+    def _produce(self, key: str, flight: _Flight[T], produce: Callable[[], Iterator[T]]):
+        try:
+            for item in produce():
+                with self._condition:
+                    flight.latest = item
+                    flight.version += 1
+                    self._condition.notify_all()
+        except BaseException as e:
+            flight.error = e
+        finally:
+            with self._condition:
+                flight.done = True
+                del self._flights[key]
+                self._condition.notify_all()
+
+    def _consume(self, flight: _Flight[T]) -> Iterator[T]:
+        seen = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: flight.version != seen or flight.done)
+                version, item, done = flight.version, flight.latest, flight.done
+            if version != seen:
+                seen = version
+                yield item
+            if done:
+                if flight.error is not None:
+                    raise flight.error
+                return
+
+    def stats(self) -> Dict[str, int]:
+        """실행 중인 키 수와 누적 leader/follower 수"""
+        with self._lock:
+            return {"in_flight": len(self._flights), "leaders": self._leaders, "followers": self._followers}
+
+
+class AsyncSingleFlight(Generic[T]):
+    """SingleFlight 의 asyncio 버전 (생산자는 같은 이벤트 루프의 task 로 실행)"""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight[T]] = {}
+        self._leaders = 0
+        self._followers = 0
+
+    def run(self, key: str, produce: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """SingleFlight.run 과 같음 (produce 는 async generator 를 반환)"""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            flight.condition = asyncio.Condition()
+            flight.task = asyncio.ensure_future(self._produce(key, flight, produce))
+            self._leaders += 1
+        else:
+            self._followers += 1
+        return self._consume(flight)
+
+    async def _produce(self, key: str, flight: _Flight[T], produce: Callable[[], AsyncIterator[T]]):
+        try:
+            async for item in produce():
+                async with flight.condition:
+                    flight.latest = item
+                    flight.version += 1
+                    flight.condition.notify_all()
+        except BaseException as e:
+            flight.error = e
+        finally:
+            del self._flights[key]
+            async with flight.condition:
+                flight.done = True
+                flight.condition.notify_all()
+
+    async def _consume(self, flight: _Flight[T]) -> AsyncIterator[T]:
+        seen = 0
+        while True:
+            async with flight.condition:
+                await flight.condition.wait_for(lambda: flight.version != seen or flight.done)
+                version, item, done = flight.version, flight.latest, flight.done
+            if version != seen:
+                seen = version
+                yield item
+            if done:
+                if flight.error is not None:
+                    raise flight.error
+                return
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._flights), "leaders": self._leaders, "followers": self._followers}
+
+##################################################################
+# 입장 제어 (동시 실행 수 / 대기열 길이 / 클라이언트별 제한)
+##################################################################
+
+class AdmissionRejected(Exception):
+    """입장 거절 (reason: queue_full / client_limit / timeout)"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdmissionTicket:
+    """AdmissionController.enter() 가 반환하는 입장권 (release() 로 반드시 반납)"""
+
+    def __init__(self, controller: "AdmissionController", client: str):
+        self.controller = controller
+        self.client = client
+        self.admitted = False
+        self.position = 0          # 대기열에 들어간 시점의 앞선 대기 요청 수
+        self.released = False
+        self._event = threading.Event()
+        self._future: Optional[asyncio.Future] = None
+
+    def _grant(self):
+        """대기 중인 입장권 승인 (controller 락 밖에서 호출)"""
+        self._event.set()
+        future = self._future
+        if future is not None:
+            future.get_loop().call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+    def wait(self):
+        """입장할 때까지 대기 (timeout 초과 시 AdmissionRejected("timeout"))"""
+        if self.admitted:
+            return
+        if not self._event.wait(self.controller.timeout) and self.controller._cancel(self):
+            raise AdmissionRejected("timeout")
+
+    async def wait_async(self):
+        """wait() 의 비동기 버전"""
+        if self.admitted:
+            return
+        with self.controller._lock:
+            if not self.admitted:
+                self._future = asyncio.get_running_loop().create_future()
+        if self._future is None or self.admitted:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self._future), self.controller.timeout)
+        except asyncio.TimeoutError:
+            if self.controller._cancel(self):
+                raise AdmissionRejected("timeout")
+
+    def release(self):
+        """실행 종료 또는 대기 취소 (여러 번 호출해도 한 번만 반영)"""
+        self.controller._release(self)
+
+
+class AdmissionController:
+    """
+    파이프라인 동시 실행 수를 제한하는 입장 제어
+
+    - 동시에 max_active 개까지 실행하고, 나머지는 최대 max_queue 개까지 대기
+    - 대기열이 가득 차면 기다리지 않고 즉시 거절 (과부하가 모든 요청의 지연으로 번지지 않도록)
+    - 클라이언트별 실행+대기 요청은 per_client 개까지 (초과 시 즉시 거절)
+    - 빈 자리는 대기 중인 클라이언트 사이에 순서대로 돌아가며 배정 (한 클라이언트가 대기열을 독점하지 않도록)
+    - timeout 초 안에 입장하지 못하면 거절
+    """
+
+    def __init__(self, max_active: int = 8, max_queue: int = 32, per_client: int = 2, timeout: float = 30.0):
+        """
+        Args:
+            max_active: 동시에 실행할 최대 요청 수
+            max_queue: 최대 대기 요청 수 (0 이면 대기 없이 거절)
+            per_client: 클라이언트별 최대 실행+대기 요청 수
+            timeout: 대기열에서 기다리는 최대 시간(초)
+        """
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.per_client = per_client
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._waiting: "OrderedDict[str, deque]" = OrderedDict()  # 클라이언트 -> 대기 중인 입장권 (배정 순서)
+        self._per_client: Dict[str, int] = {}
+        self._counts = {"admitted": 0, "enqueued": 0, "queue_full": 0, "client_limit": 0, "timeout": 0}
+
+    def enter(self, client: str) -> AdmissionTicket:
+        """
+        입장 요청
+
+        Returns:
+            바로 입장했으면 admitted=True, 대기열에 들어갔으면 admitted=False 인 입장권
+
+        Raises:
+            AdmissionRejected: 대기열이 가득 찼거나 클라이언트별 제한 초과
+        """
+        ticket = AdmissionTicket(self, client)
+        with self._lock:
+            if self._per_client.get(client, 0) >= self.per_client:
+                self._counts["client_limit"] += 1
+                raise AdmissionRejected("client_limit")
+            if self._active < self.max_active:
+                self._active += 1
+                ticket.admitted = True
+                self._counts["admitted"] += 1
+            elif self._queued < self.max_queue:
+                ticket.position = self._queued
+                self._waiting.setdefault(client, deque()).append(ticket)
+                self._queued += 1
+                self._counts["enqueued"] += 1
+            else:
+                self._counts["queue_full"] += 1
+                raise AdmissionRejected("queue_full")
+            self._per_client[client] = self._per_client.get(client, 0) + 1
+        return ticket
+
+    def _remove_waiting(self, ticket: AdmissionTicket):
+        waiting = self._waiting[ticket.client]
+        waiting.remove(ticket)
+        if not waiting:
+            del self._waiting[ticket.client]
+        self._queued -= 1
+
+    def _cancel(self, ticket: AdmissionTicket) -> bool:
+        """대기 시간 초과 처리 (그 사이 입장했으면 False)"""
+        with self._lock:
+            if ticket.admitted or ticket.released:
+                return False
+            self._remove_waiting(ticket)
+            ticket.released = True
+            self._decrement_client(ticket.client)
+            self._counts["timeout"] += 1
+            return True
+
+    def _decrement_client(self, client: str):
+        count = self._per_client.get(client, 0) - 1
+        if count > 0:
+            self._per_client[client] = count
+        else:
+            self._per_client.pop(client, None)
+
+    def _release(self, ticket: AdmissionTicket):
+        granted = None
+        with self._lock:
+            if ticket.released:
+                return
+            ticket.released = True
+            self._decrement_client(ticket.client)
+            if not ticket.admitted:
+                self._remove_waiting(ticket)
+                return
+            self._active -= 1
+            if self._waiting:
+                # 가장 오래 기다린 클라이언트부터 하나씩 배정하고 해당 클라이언트는 맨 뒤로
+                client, waiting = next(iter(self._waiting.items()))
+                granted = waiting.popleft()
+                del self._waiting[client]
+                if waiting:
+                    self._waiting[client] = waiting
+                self._queued -= 1
+                self._active += 1
+                granted.admitted = True
+                self._counts["admitted"] += 1
+        if granted is not None:
+            granted._grant()
+
+    def stats(self) -> Dict[str, int]:
+        """실행/대기 중인 요청 수와 누적 입장/거절 수"""
+        with self._lock:
+            return {"active": self._active, "queued": self._queued, "clients": len(self._per_client), **self._counts}
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# csv_converter.save_to_sqlite 가 기록하는 메타데이터 테이블
+META_TABLE = "nutrition_meta"
+
+
+def normalize_sql(query: str) -> str:
+    """
+    캐시 키로 사용할 수 있도록 SQL 문을 정규화
+
+    문자열 리터럴 바깥의 공백을 하나로 합치고 끝의 세미콜론을 제거한다.
+    (리터럴 내부와 식별자 대소문자는 결과에 영향을 줄 수 있으므로 유지)
+    """
+    parts = re.split(r"('(?:[^']|'')*')", query.strip())
+    normalized = []
+    for i, part in enumerate(parts):
+        if i % 2 == 0:
+            part = re.sub(r"\s+", " ", part)
+        normalized.append(part)
+    return "".join(normalized).rstrip("; ").strip()
+
+
+def db_fingerprint(db_path: str) -> Tuple:
+    """데이터베이스 파일(및 WAL 파일)의 mtime/size (변경 감지용)"""
+    fingerprint = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            st = os.stat(path)
+            fingerprint.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            fingerprint.append(None)
+    return tuple(fingerprint)
+
+
+def read_data_version(db_path: str) -> Optional[str]:
+    """메타데이터 테이블의 data_version 값 조회 (없으면 None)"""
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            row = conn.execute(
+                f"SELECT value FROM {META_TABLE} WHERE key = 'data_version'"
+            ).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+_version_memo: Dict[str, Tuple[Tuple, str]] = {}
+_version_lock = threading.Lock()
+
+
+def current_data_version(db_path: str) -> str:
+    """
+    데이터베이스 내용 버전 (data_version, 없으면 파일 fingerprint)
+
+    파일 fingerprint 가 그대로면 메타데이터 테이블을 다시 읽지 않는다.
+    """
+    fingerprint = db_fingerprint(db_path)
+    with _version_lock:
+        memo = _version_memo.get(db_path)
+        if memo is not None and memo[0] == fingerprint:
+            return memo[1]
+    version = read_data_version(db_path) or repr(fingerprint)
+    with _version_lock:
+        _version_memo[db_path] = (fingerprint, version)
+    return version
+
+
+class SQLResultCache:
+    """
+    정규화된 SQL 문 기준 실행 결과 캐시
+
+    - 데이터베이스 파일(및 WAL 파일)의 mtime/size 가 바뀌면 전체 무효화
+    - 결과 문자열 크기의 합이 max_bytes 를 넘으면 LRU 순서로 제거
+    """
+
+    def __init__(self, db_path: str, max_bytes: int = 16 * 1024 * 1024, max_entry_bytes: Optional[int] = None):
+        """
+        Args:
+            db_path: 감시할 SQLite 데이터베이스 파일 경로
+            max_bytes: 캐시가 사용할 최대 바이트 수
+            max_entry_bytes: 캐시할 결과 하나의 최대 바이트 수 (기본값: max_bytes / 8)
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 8
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.data_version = None
+
+        self._entries: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+    def _check_fingerprint(self):
+        """파일이 변경되었으면 캐시 비우기 (lock 을 잡은 상태에서 호출)"""
+        fingerprint = db_fingerprint(self.db_path)
+        if fingerprint != self._fingerprint:
+            if self._fingerprint is not None:
+                self.invalidations += 1
+            self._entries.clear()
+            self._total_bytes = 0
+            self._fingerprint = fingerprint
+            self.data_version = read_data_version(self.db_path)
+
+    def get(self, query: str) -> Optional[str]:
+        """캐시된 실행 결과 반환, 없으면 None"""
+        key = normalize_sql(query)
+        with self._lock:
+            self._check_fingerprint()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, query: str, result: str):
+        """실행 결과 저장 (너무 큰 결과는 저장하지 않음)"""
+        size = len(result.encode("utf-8"))
+        if size > self.max_entry_bytes:
+            return
+
+        key = normalize_sql(query)
+        with self._lock:
+            self._check_fingerprint()
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+            self._entries[key] = (result, size)
+            self._total_bytes += size
+
+            while self._total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """캐시 비우기"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict:
+        """적중/미스/제거/무효화 카운터 반환"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "data_version": self.data_version,
+            }
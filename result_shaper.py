@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+from typing import Any, List, Tuple
+
+# 컬럼명 끝에 붙는 단위 (csv_converter 가 3번째 헤더 줄을 "_단위" 로 붙임)
+_UNIT_PATTERN = re.compile(r"_(kcal|kJ|mg|μg|ug|g|%)$")
+# "일반성분_Proximates_", "아미노산_Amino_acids_" 같은 카테고리 접두어
+_CATEGORY_PATTERN = re.compile(r"^[가-힣]+_[A-Z][a-z]+(?:_[a-z]+)?_")
+_FOOD_NAME_PREFIX = "가식부_100g_당_"
+
+
+def split_label_unit(column: str) -> Tuple[str, str]:
+    """
+    컬럼명을 사람이 읽기 쉬운 이름과 단위로 분리
+
+    예: "비타민_Vitamins_비타민_C_mg" -> ("비타민 C", "mg")
+    """
+    unit = ""
+    match = _UNIT_PATTERN.search(column)
+    if match:
+        unit = match.group(1)
+        column = column[:match.start()]
+    if column.startswith(_FOOD_NAME_PREFIX):
+        column = column[len(_FOOD_NAME_PREFIX):]
+    column = _CATEGORY_PATTERN.sub("", column)
+    return column.replace("_", " ").strip(), unit
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or (isinstance(value, (int, float)) and value == 0) or value == ""
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:g}" if abs(value) < 1e15 else str(value)
+    return str(value)
+
+
+def shape_result(columns: List[str], rows: List[tuple], max_rows: int = 50, max_bytes: int = 4000,
+                 vertical_threshold: int = 8) -> str:
+    """
+    SQL 결과를 LLM 프롬프트/화면 표시에 적합한 간결한 표로 변환
+
+    - 모든 행에서 NULL 이거나 0 인 컬럼 제거
+    - 컬럼명 대신 "이름 (단위)" 헤더 사용
+    - 행 수(max_rows)와 바이트 수(max_bytes) 제한, 생략된 내용은 요약 줄로 표시
+    - 한 행에 컬럼이 많으면 "이름 (단위): 값" 형식의 세로 목록으로 출력
+
+    Args:
+        columns: 컬럼 이름 목록
+        rows: 결과 행 목록
+        max_rows: 출력할 최대 행 수
+        max_bytes: 출력할 최대 바이트 수 (UTF-8 기준)
+        vertical_threshold: 한 행 결과를 세로로 출력할 최소 컬럼 수
+
+    Returns:
+        정리된 결과 문자열 (결과가 없으면 빈 문자열)
+    """
+    if not rows:
+        return ""
+
+    keep = [i for i in range(len(columns)) if not all(_is_empty(row[i]) for row in rows)]
+    if not keep:
+        keep = list(range(len(columns)))
+    dropped = len(columns) - len(keep)
+
+    headers = []
+    for i in keep:
+        label, unit = split_label_unit(columns[i])
+        headers.append(f"{label} ({unit})" if unit else label)
+
+    if len(rows) == 1 and len(keep) >= vertical_threshold:
+        row = rows[0]
+        lines = [f"{header}: {_format_value(row[i])}" for header, i in zip(headers, keep)]
+        shown_unit, total_units = "항목", len(keep)
+    else:
+        lines = [" | ".join(headers)]
+        for row in rows[:max_rows]:
+            lines.append(" | ".join(_format_value(row[i]) for i in keep))
+        shown_unit, total_units = "행", len(rows)
+
+    # 바이트 제한 적용
+    output, size = [], 0
+    for line in lines:
+        line_size = len(line.encode("utf-8")) + 1
+        if output and size + line_size > max_bytes:
+            break
+        output.append(line)
+        size += line_size
+
+    shown = len(output) - (1 if shown_unit == "행" else 0)
+    notes = []
+    if shown < total_units:
+        notes.append(f"총 {total_units}{shown_unit} 중 {shown}{shown_unit}만 표시")
+    if dropped:
+        dropped_labels = [split_label_unit(columns[i])[0] for i in range(len(columns)) if i not in keep]
+        if dropped <= 5:
+            notes.append(f"값이 없거나 0인 컬럼 생략: {', '.join(dropped_labels)}")
+        else:
+            notes.append(f"값이 없거나 0인 컬럼 {dropped}개 생략")
+    if notes:
+        output.append(f"({', '.join(notes)})")
+
+    return "\n".join(output)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from result_cache import db_fingerprint
+
+# 모든 테이블에서 사용할 수 있는 rowid 컬럼 이름
+ROWID_ALIASES = {"rowid", "_rowid_", "oid"}
+
+
+def _quote(name: str) -> str:
+    """SQLite 식별자 따옴표 처리"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _display_name(name: str) -> str:
+    """테이블 설명용 식별자 (SQLAlchemy 와 같이 단순 소문자 식별자는 따옴표 생략)"""
+    return name if re.fullmatch(r"[a-z_][a-z0-9_$]*", name) else _quote(name)
+
+
+def normalize_column_name(name: str) -> str:
+    """LLM 이 반환한 컬럼 이름에서 따옴표와 테이블 접두어 제거"""
+    name = name.strip().strip('"`[]')
+    if "." in name:
+        name = name.split(".")[-1].strip('"`[]')
+    return name
+
+
+class SchemaIndex:
+    """
+    테이블 스키마 인메모리 인덱스
+
+    컬럼 이름/타입과 프롬프트용 테이블 설명(CREATE TABLE + 샘플 행)을
+    미리 계산해 두고, 데이터베이스 파일이 변경된 경우에만 다시 읽는다.
+    """
+
+    def __init__(self, db_path: str, table_name: str, sample_rows: int = 3):
+        """
+        Args:
+            db_path: SQLite 데이터베이스 파일 경로
+            table_name: 인덱싱할 테이블 이름
+            sample_rows: 테이블 설명에 포함할 샘플 행 수
+        """
+        self.db_path = db_path
+        self.table_name = table_name
+        self.sample_rows = sample_rows
+
+        self.columns: Dict[str, str] = {}  # 컬럼 이름 -> 타입 (정의 순서 유지)
+        self.table_info = ""
+        self._rows: List[tuple] = []  # 샘플 행 (컬럼 일부만 설명할 때 사용)
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+        self.refresh_if_changed()
+
+    def refresh_if_changed(self):
+        """데이터베이스 파일이 변경되었으면 스키마 다시 읽기"""
+        fingerprint = db_fingerprint(self.db_path)
+        if fingerprint == self._fingerprint:
+            return
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._load()
+                self._fingerprint = fingerprint
+
+    def _load(self):
+        """스키마와 샘플 행을 읽어 인덱스 생성"""
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            columns = {
+                row[1]: row[2]
+                for row in conn.execute(f"PRAGMA table_info({_quote(self.table_name)})")
+            }
+            rows = conn.execute(
+                f"SELECT * FROM {_quote(self.table_name)} LIMIT {int(self.sample_rows)}"
+            ).fetchall()
+        finally:
+            conn.close()
+
+        self.columns = columns
+        self._rows = rows
+        self.table_info = self._format_table_info(columns, rows)
+
+    def _format_table_info(self, columns: Dict[str, str], rows: List[tuple]) -> str:
+        """SQLDatabase.get_table_info() 와 같은 형식의 테이블 설명 생성"""
+        definitions = ", \n\t".join(f"{_display_name(name)} {dtype}" for name, dtype in columns.items())
+        create_table = f"\nCREATE TABLE {self.table_name} (\n\t{definitions}\n)"
+
+        # 샘플 값은 100자까지만 표시
+        sample_lines = ["\t".join(columns.keys())]
+        for row in rows:
+            sample_lines.append("\t".join(str(value)[:100] for value in row))
+        sample = "\n".join(sample_lines)
+
+        return (
+            f"{create_table}\n\n/*\n{len(rows)} rows from {self.table_name} table:\n"
+            f"{sample}\n*/"
+        )
+
+    def get_table_info(self, columns: Optional[Iterable[str]] = None) -> str:
+        """
+        프롬프트용 테이블 설명 반환
+
+        Args:
+            columns: 설명에 포함할 컬럼 (None 이면 전체, 순서는 테이블 정의 순서를 따름)
+        """
+        self.refresh_if_changed()
+        if columns is None:
+            return self.table_info
+
+        wanted = {normalize_column_name(name) for name in columns}
+        positions = [i for i, name in enumerate(self.columns) if name in wanted]
+        names = list(self.columns)
+        subset = {names[i]: self.columns[names[i]] for i in positions}
+        rows = [tuple(row[i] for i in positions) for row in self._rows]
+        return self._format_table_info(subset, rows)
+
+    def column_names(self) -> List[str]:
+        """컬럼 이름 목록 반환"""
+        self.refresh_if_changed()
+        return list(self.columns)
+
+    def text_columns(self) -> Set[str]:
+        """TEXT 타입 컬럼 이름 집합 반환"""
+        self.refresh_if_changed()
+        return {name for name, dtype in self.columns.items() if dtype == "TEXT"}
+
+    # column_type / has_column 은 한 질문에서 컬럼마다 여러 번 호출되므로 파일 변경을 확인하지 않는다.
+    # 변경 확인은 질문마다 한 번 호출되는 get_table_info / column_names / text_columns 에서 한다.
+
+    def column_type(self, name: str) -> Optional[str]:
+        """컬럼 타입 반환 (없으면 None)"""
+        return self.columns.get(normalize_column_name(name))
+
+    def has_column(self, name: str) -> bool:
+        """컬럼 존재 여부 확인 (rowid 포함)"""
+        name = normalize_column_name(name)
+        return name in self.columns or name.lower() in ROWID_ALIASES
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import sqlite3
+from typing import List, Optional, Set, TypedDict
+
+from schema_index import ROWID_ALIASES
+
+# 검증 결과
+VALID = "valid"
+INVALID = "invalid"
+INCONCLUSIVE = "inconclusive"
+
+# SELECT 문 실행에 필요한 작업만 허용 (재귀 CTE 의 SQLITE_RECURSIVE 는 거부)
+_ALLOWED_ACTIONS = {
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+}
+
+_AGGREGATE_PATTERN = re.compile(r"\b(COUNT|SUM|AVG|MIN|MAX|GROUP_CONCAT|TOTAL)\s*\(", re.IGNORECASE)
+_ALIAS_PATTERN = re.compile(r'\bAS\s+("(?:[^"]|"")+"|[^\s,()]+)', re.IGNORECASE)
+_CTE_PATTERN = re.compile(r'(?:\bWITH|,)\s*(?:RECURSIVE\s+)?("(?:[^"]|"")+"|\w+)\s+AS\s*\(', re.IGNORECASE)
+_QUOTED_PATTERN = re.compile(r'"((?:[^"]|"")+)"')
+_TOKEN_PATTERN = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|\w+|\S""")
+
+# FROM / WHERE 절의 끝을 나타내는 키워드
+_CLAUSE_END = {"WHERE", "GROUP", "HAVING", "ORDER", "LIMIT", "UNION", "INTERSECT", "EXCEPT", "WINDOW"}
+_JOIN_WORDS = {"NATURAL", "LEFT", "RIGHT", "FULL", "OUTER", "INNER", "CROSS", "JOIN"}
+
+# LLM 응답 텍스트에서 SQL 문을 찾기 위한 패턴
+_FENCE_PATTERN = re.compile(r"```(?:sql|sqlite)?\s*(.*?)```", re.IGNORECASE | re.DOTALL)
+_STATEMENT_START_PATTERN = re.compile(
+    r'\bSELECT\b|\bWITH\s+(?:RECURSIVE\s+)?(?:"(?:[^"]|"")+"|\w+)\s+AS\s*\(', re.IGNORECASE
+)
+# 세미콜론 앞까지 (문자열 리터럴/큰따옴표 식별자 안의 세미콜론은 무시)
+_STATEMENT_PATTERN = re.compile(r"""(?:[^;'"]|'(?:[^']|'')*'|"(?:[^"]|"")*")*""")
+
+
+class ValidationResult(TypedDict):
+    """정적 SQL 검증 결과"""
+    verdict: str        # VALID / INVALID / INCONCLUSIVE
+    reason: str
+    columns: List[str]  # 실제로 읽는 컬럼
+
+
+def _strip_literals(query: str) -> str:
+    """작은따옴표 문자열 리터럴을 제거한 SQL 반환"""
+    return re.sub(r"'(?:[^']|'')*'", "''", query)
+
+
+def _unquote(name: str) -> str:
+    if len(name) >= 2 and name[0] == name[-1] == '"':
+        name = name[1:-1].replace('""', '"')
+    return name
+
+
+def _identifier(name: str) -> str:
+    """비교용 식별자 (SQLite 식별자는 따옴표 여부와 관계없이 대소문자를 구분하지 않음)"""
+    return _unquote(name).lower()
+
+
+def _parse_groups(tokens: List[str]) -> list:
+    """토큰 목록을 괄호 단위로 중첩된 리스트로 변환"""
+    stack = [[]]
+    for token in tokens:
+        if token == "(":
+            stack.append([])
+        elif token == ")" and len(stack) > 1:
+            group = stack.pop()
+            stack[-1].append(group)
+        else:
+            stack[-1].append(token)
+    while len(stack) > 1:
+        group = stack.pop()
+        stack[-1].append(group)
+    return stack[0]
+
+
+def _flatten(items: list) -> List[str]:
+    tokens = []
+    for item in items:
+        tokens.extend(_flatten(item) if isinstance(item, list) else [item])
+    return tokens
+
+
+def _is_word(item, word: str) -> bool:
+    return isinstance(item, str) and item.upper() == word
+
+
+def _clause(items: list, start: int) -> list:
+    """start 다음부터 같은 괄호 깊이에서 다음 절 키워드 전까지의 항목"""
+    end = start + 1
+    while end < len(items) and not (isinstance(items[end], str) and items[end].upper() in _CLAUSE_END):
+        end += 1
+    return items[start + 1:end]
+
+
+def _select_clauses(items: list):
+    """모든 괄호 깊이의 (FROM 절, WHERE 절 또는 None) 목록"""
+    for i, item in enumerate(items):
+        if isinstance(item, list):
+            yield from _select_clauses(item)
+        elif _is_word(item, "FROM"):
+            from_items = _clause(items, i)
+            end = i + 1 + len(from_items)
+            where_items = _clause(items, end) if end < len(items) and _is_word(items[end], "WHERE") else None
+            yield from_items, where_items
+
+
+def _recursive_ctes(items: list) -> bool:
+    """자기 자신을 참조하는 CTE 가 있는지 여부 (RECURSIVE 키워드 유무, 사용 여부와 관계없이)"""
+    for i, item in enumerate(items):
+        if not isinstance(item, list):
+            continue
+        if i >= 2 and _is_word(items[i - 1], "AS"):
+            name = items[i - 2] if isinstance(items[i - 2], str) else (items[i - 3] if i >= 3 else "")
+            if isinstance(name, str) and _identifier(name) in {_identifier(token) for token in _flatten(item)}:
+                return True
+        if _recursive_ctes(item):
+            return True
+    return False
+
+
+def _split_terms(items: Optional[list]) -> List[List[str]]:
+    """조건식을 최상위 AND/OR 기준으로 나눈 항목별 토큰 목록"""
+    terms, current = [], []
+    for item in items or []:
+        if _is_word(item, "AND") or _is_word(item, "OR"):
+            terms.append(current)
+            current = []
+        else:
+            current.append(item)
+    terms.append(current)
+    return [_flatten(term) for term in terms if term]
+
+
+def _qualifiers(tokens: List[str]) -> Set[str]:
+    """별칭.컬럼 형태로 참조한 별칭(테이블 이름) 집합"""
+    return {_identifier(tokens[i]) for i in range(len(tokens) - 1) if tokens[i + 1] == "."}
+
+
+def _references(tokens: List[str], names: Set[str]) -> bool:
+    """토큰 중 컬럼/별칭 이름이 있는지 여부 (names 는 _identifier 로 변환한 이름)"""
+    return any(_identifier(token) in names for token in tokens)
+
+
+def _join_problem(from_items: list, where_items: Optional[list], table_name: str, names: Set[str]) -> Optional[str]:
+    """
+    FROM 절의 조인마다 조인 조건이 있는지 확인
+
+    Returns:
+        INVALID (조건 없음), INCONCLUSIVE (조건을 확인할 수 없음), None (문제 없음)
+    """
+    # [원본 항목, 조인 방식, ON/USING 조건] 단위로 분리
+    sources = [[[], [], None]]
+    pending = []
+    for item in from_items:
+        if item == "," or (isinstance(item, str) and item.upper() in _JOIN_WORDS):
+            pending.append(item.upper())
+            if item == "," or item.upper() == "JOIN":
+                sources.append([[], pending, None])
+                pending = []
+        elif sources[-1][2] is not None:
+            sources[-1][2].append(item)
+        elif _is_word(item, "ON"):
+            sources[-1][2] = []
+        elif _is_word(item, "USING"):
+            sources[-1][1] = sources[-1][1] + ["USING"]
+            sources[-1][2] = []
+        else:
+            sources[-1][0].append(item)
+    if len(sources) < 2:
+        return None
+
+    qualifiers = []
+    plain = True
+    for source, _, _ in sources:
+        words = [item for item in source if not _is_word(item, "AS")]
+        if not words or isinstance(words[0], list) or _identifier(words[0]) != table_name.lower() or len(words) > 2:
+            plain = False
+        qualifiers.append(_identifier(words[-1]) if words and isinstance(words[-1], str) else "")
+
+    where_terms = _split_terms(where_items)
+    verdict = None
+    for index in range(1, len(sources)):
+        _, how, on_items = sources[index]
+        if "NATURAL" in how or "USING" in how:
+            continue
+        terms = _split_terms(on_items) + where_terms
+        earlier = set(qualifiers[:index])
+        if any(qualifiers[index] in used and used & earlier for used in map(_qualifiers, terms)):
+            continue
+        # 같은 테이블끼리의 조인은 컬럼을 별칭으로 구분해야 하므로 위에서 찾지 못했으면 조건 없음
+        if plain or not any(_references(term, names) for term in terms):
+            return INVALID
+        verdict = INCONCLUSIVE
+    return verdict
+
+
+def extract_sql(text: str) -> str:
+    """
+    LLM 이 자유 형식으로 답한 텍스트에서 첫 번째 SELECT/WITH 문 추출
+
+    코드 블록(```sql), "SQLQuery:" 접두어, 뒤따르는 "SQLResult:"/"Answer:" 부분과 설명 문장을 제거한다.
+
+    Returns:
+        SQL 문 (끝의 세미콜론 제외), 찾지 못하면 빈 문자열
+    """
+    fence = _FENCE_PATTERN.search(text)
+    if fence:
+        text = fence.group(1)
+    if "SQLQuery:" in text:
+        text = text.rsplit("SQLQuery:", 1)[1]
+    text = re.split(r"\n\s*(?:SQLResult|Answer):", text, maxsplit=1)[0]
+
+    start = _STATEMENT_START_PATTERN.search(text)
+    if start is None:
+        return ""
+    return _STATEMENT_PATTERN.match(text, start.start()).group(0).strip()
+
+
+def validate_sql(query: str, db_path: str, table_name: str, text_columns: Set[str] = frozenset()) -> ValidationResult:
+    """
+    SQLite 컴파일(EXPLAIN)과 authorizer 를 이용해 LLM 호출 없이 쿼리를 검증
+
+    Args:
+        query: 검증할 SQL 문
+        db_path: SQLite 데이터베이스 파일 경로
+        table_name: 허용할 테이블 이름
+        text_columns: 문자열 컬럼 이름 (이 컬럼만 읽는 쿼리는 판단 보류)
+
+    Returns:
+        ValidationResult
+        - INVALID: 문법 오류, 존재하지 않는 컬럼, 쓰기 작업, 다른 테이블 접근, 재귀 CTE,
+          조인 조건 없는 조인, 제한 없는 전체 조회 (컬럼을 참조하지 않는 WHERE 는 제한으로 보지 않음)
+        - VALID: 위 문제가 없고 대상 테이블의 영양소 컬럼을 읽는 SELECT 문
+        - INCONCLUSIVE: 알 수 없는 큰따옴표 식별자, 확인할 수 없는 조인 조건 등 (LLM 평가 필요)
+    """
+    sql = query.strip().rstrip(";").strip()
+    if not sql:
+        return {"verdict": INVALID, "reason": "빈 쿼리", "columns": []}
+
+    without_literals = _strip_literals(sql)
+    if ";" in without_literals:
+        return {"verdict": INVALID, "reason": "여러 개의 SQL 문", "columns": []}
+
+    denied = []
+    tables = set()
+    columns = []
+
+    def authorizer(action, arg1, arg2, db_name, trigger):
+        if action not in _ALLOWED_ACTIONS:
+            denied.append(action)
+            return sqlite3.SQLITE_DENY
+        if action == sqlite3.SQLITE_READ:
+            tables.add(arg1)
+            if arg2 and arg2 not in columns:
+                columns.append(arg2)
+        return sqlite3.SQLITE_OK
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        conn.set_authorizer(authorizer)
+        conn.execute(f"EXPLAIN {sql}").fetchall()
+    except sqlite3.Error as e:
+        if sqlite3.SQLITE_RECURSIVE in denied:
+            return {"verdict": INVALID, "reason": "재귀 CTE", "columns": columns}
+        if denied:
+            return {"verdict": INVALID, "reason": "읽기 전용 SELECT 문이 아님", "columns": columns}
+        return {"verdict": INVALID, "reason": f"SQL 오류: {e}", "columns": columns}
+    finally:
+        conn.close()
+
+    other_tables = tables - {table_name}
+    if other_tables:
+        return {"verdict": INVALID, "reason": f"허용되지 않은 테이블: {sorted(other_tables)}", "columns": columns}
+
+    # SQLite 는 존재하지 않는 "컬럼" 을 문자열 리터럴로 해석하므로 직접 확인
+    # (잘못된 컬럼인지 큰따옴표 문자열 값인지 구분할 수 없으므로 판단 보류)
+    aliases = {_identifier(alias) for alias in _ALIAS_PATTERN.findall(without_literals)}
+    aliases |= {_identifier(name) for name in _CTE_PATTERN.findall(without_literals)}
+    # rowid 는 authorizer 에 'ROWID' 로 보고되므로 이름은 모두 소문자로 비교
+    names = {column.lower() for column in columns} | aliases | ROWID_ALIASES
+    known = names | {table.lower() for table in tables} | {table_name.lower()}
+    for quoted in _QUOTED_PATTERN.findall(without_literals):
+        name = quoted.replace('""', '"')
+        if name.lower() not in known:
+            return {"verdict": INCONCLUSIVE, "reason": f"알 수 없는 식별자: {name}", "columns": columns}
+
+    groups = _parse_groups(_TOKEN_PATTERN.findall(without_literals))
+    if _recursive_ctes(groups):
+        return {"verdict": INVALID, "reason": "재귀 CTE", "columns": columns}
+
+    clauses = list(_select_clauses(groups))
+
+    # 조인마다 조인 조건(ON/USING/NATURAL 또는 두 원본을 함께 참조하는 조건) 확인
+    join_verdicts = {_join_problem(from_items, where_items, table_name, names) for from_items, where_items in clauses}
+    if INVALID in join_verdicts:
+        return {"verdict": INVALID, "reason": "조인 조건 없는 조인", "columns": columns}
+
+    # 조건/집계/LIMIT 이 없는 전체 조회 거부 (WHERE 1 처럼 컬럼을 참조하지 않는 조건은 제한이 아님)
+    upper = without_literals.upper()
+    bounded = (
+        re.search(r"\b(LIMIT|GROUP\s+BY)\b", upper) is not None
+        or _AGGREGATE_PATTERN.search(without_literals) is not None
+        or any(where_items and _references(_flatten(where_items), names) for _, where_items in clauses)
+    )
+    if not bounded:
+        return {"verdict": INVALID, "reason": "제한 없는 전체 조회", "columns": columns}
+
+    if INCONCLUSIVE in join_verdicts:
+        return {"verdict": INCONCLUSIVE, "reason": "조인 조건을 확인할 수 없음", "columns": columns}
+
+    if not columns or all(column in text_columns for column in columns):
+        return {"verdict": INCONCLUSIVE, "reason": "영양소 컬럼을 읽지 않음", "columns": columns}
+
+    return {"verdict": VALID, "reason": "정적 검증 통과", "columns": columns}
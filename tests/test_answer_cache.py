@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""answer_cache.SemanticAnswerCache 의 정규화/유사도 적중, 데이터 버전 무효화, TTL/LRU, 디스크 재로딩"""
+
+import os
+import re
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import answer_cache  # noqa: E402
+from answer_cache import SemanticAnswerCache, normalize_question  # noqa: E402
+
+
+class CharEmbedding:
+    """글자 단위 해시 임베딩 (글자 구성이 비슷하면 코사인 유사도가 높음), 호출 횟수 기록"""
+
+    def __init__(self, dims: int = 256):
+        self.dims = dims
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        vector = np.zeros(self.dims, dtype=np.float32)
+        for char in text.replace(" ", ""):
+            vector[zlib.crc32(char.encode("utf-8")) % self.dims] += 1.0
+        return vector.tolist()
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+def _numbers(key):
+    return re.findall(r"\d+", key)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(answer_cache, "time", clock)
+    return clock
+
+
+def _payload(answer):
+    return {"query": "SELECT 1", "result": "[]", "answer": answer}
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("  비타민C가  가장 많은 식품은? ", "비타민c가 가장 많은 식품은"),
+    ("ＶＩＴＡＭＩＮ Ｃ!!", "vitamin c"),
+    ("사과, 부사, 생것의 당류는?", "사과 부사 생것의 당류는"),
+])
+def test_normalize_question(question, expected):
+    assert normalize_question(question) == expected
+
+
+def test_normalized_question_hits_without_embedding(clock):
+    embed = CharEmbedding()
+    cache = SemanticAnswerCache(embed)
+    cache.store("비타민C가 가장 많은 식품은?", _payload("a"))
+    embed.calls.clear()
+
+    assert cache.lookup("  비타민c가 가장 많은 식품은!! ")["answer"] == "a"
+    assert embed.calls == []
+    assert cache.stats()["hits"] == 1
+
+
+def test_similar_question_hits_and_different_question_misses(clock):
+    cache = SemanticAnswerCache(CharEmbedding(), threshold=0.9)
+    cache.store("비타민C가 가장 많은 식품은?", _payload("a"))
+
+    assert cache.lookup("비타민C가 가장 많은 식품은 뭐야?")["answer"] == "a"
+    assert cache.lookup("오늘 날씨 어때?") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_similar_question_with_different_slots_misses(clock):
+    cache = SemanticAnswerCache(CharEmbedding(), threshold=0.9, slot_fn=_numbers)
+    cache.store("비타민C가 많은 식품 5개는?", _payload("five"))
+
+    assert cache.lookup("비타민C가 많은 식품 3개는?") is None
+    assert cache.lookup("비타민C가 많은 식품 5개는요?")["answer"] == "five"
+    assert cache.stats()["slot_mismatches"] == 1
+
+
+def test_data_version_change_invalidates(clock):
+    version = ["v1"]
+    cache = SemanticAnswerCache(CharEmbedding(), version_fn=lambda: version[0])
+    cache.store("질문", _payload("a"))
+    assert cache.lookup("질문")["answer"] == "a"
+
+    version[0] = "v2"
+    assert cache.lookup("질문") is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["invalidations"]) == (0, 1)
+
+    cache.store("질문", _payload("b"))
+    assert cache.lookup("질문")["answer"] == "b"
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = SemanticAnswerCache(CharEmbedding(), ttl=60)
+    cache.store("질문", _payload("a"))
+    clock.now += 59
+    assert cache.lookup("질문") is not None
+    clock.now += 2
+    assert cache.lookup("질문") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = SemanticAnswerCache(CharEmbedding(), max_entries=2, threshold=0.999)
+    cache.store("첫번째", _payload("1"))
+    cache.store("두번째", _payload("2"))
+    assert cache.lookup("첫번째") is not None  # 최근 사용으로 갱신
+    cache.store("세번째", _payload("3"))
+
+    assert cache.lookup("두번째") is None
+    assert cache.lookup("첫번째") is not None and cache.lookup("세번째") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_persisted_entries_are_reloaded(clock, tmp_path):
+    db_path = str(tmp_path / "answers.db")
+    version = ["v1"]
+    cache = SemanticAnswerCache(CharEmbedding(), db_path=db_path, version_fn=lambda: version[0], slot_fn=_numbers)
+    cache.store("비타민C가 많은 식품 5개는?", _payload("five"))
+    cache.store("오래된 질문", _payload("old"))
+    clock.now += 10
+    cache.store("최근 질문", _payload("recent"))
+
+    # 같은 버전이면 유사도 적중과 슬롯 비교까지 재시작 전과 같음
+    embed = CharEmbedding()
+    reloaded = SemanticAnswerCache(embed, db_path=db_path, threshold=0.9, version_fn=lambda: version[0],
+                                   slot_fn=_numbers)
+    assert reloaded.stats()["entries"] == 3
+    assert reloaded.lookup("비타민C가 많은 식품 5개는?")["answer"] == "five"
+    assert embed.calls == []
+    assert reloaded.lookup("비타민C가 많은 식품 5개는요?")["answer"] == "five"
+    assert reloaded.lookup("비타민C가 많은 식품 3개는?") is None
+
+    # max_entries 를 넘으면 최근 항목만, TTL 이 지난 항목은 로드하지 않음
+    newest = SemanticAnswerCache(CharEmbedding(), db_path=db_path, max_entries=1, version_fn=lambda: version[0])
+    assert newest.stats()["entries"] == 1
+    assert newest.lookup("최근 질문")["answer"] == "recent"
+    clock.now += 24 * 60 * 60 - 5
+    assert SemanticAnswerCache(CharEmbedding(), db_path=db_path, version_fn=lambda: version[0]).stats()["entries"] == 1
+
+    # 데이터 버전이 바뀌면 디스크 항목도 버림
+    version[0] = "v2"
+    assert SemanticAnswerCache(CharEmbedding(), db_path=db_path, version_fn=lambda: version[0]).stats()["entries"] == 0
+    version[0] = "v1"
+    assert SemanticAnswerCache(CharEmbedding(), db_path=db_path, version_fn=lambda: version[0]).stats()["entries"] == 0
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ColumnarStore 와 SQLite 의 결과 비교 (differential test)
+
+지원하는 쿼리 형태마다 같은 SQL 을 두 엔진에서 실행하여 컬럼 이름과 행이 같은지 확인한다.
+- 실수 집계(SUM/AVG)는 SQLite 의 누적 순서가 실행 계획(인덱스)에 따라 달라지므로 유효숫자 12자리까지 비교
+- ORDER BY 키가 같은 행들의 순서는 SQL 에서 정해지지 않으므로 집합으로 비교
+  (LIMIT 으로 잘린 마지막 동순위 묶음은 행 수만 비교)
+"""
+
+import math
+import os
+import sqlite3
+import sys
+from collections import Counter
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from columnar_store import ColumnarStore  # noqa: E402
+
+DB_PATH = os.path.join(ROOT, "data", "nutrition_data.db")
+TABLE = "nutrition_data"
+
+NAME = "가식부_100g_당_식품명"
+GROUP = "식품군"
+SOURCE = "출처"
+ENERGY = "일반성분_Proximates_에너지_kcal"
+PROTEIN = "일반성분_Proximates_단백질_g"
+FAT = "일반성분_Proximates_지방_g"
+SUGAR = "일반성분_Proximates_당류_g"
+SODIUM = "무기질_Minerals_나트륨_mg"
+VITAMIN_C = "비타민_Vitamins_비타민_C_mg"
+
+# (SQL, ORDER BY 키의 결과 컬럼 번호) - 키가 None 이면 순서 없이 비교
+SUPPORTED = [
+    # 컬럼 선택 / 별칭 / 따옴표 / 테이블 접두어
+    (f"SELECT * FROM {TABLE} WHERE {NAME} LIKE '%사과%'", None),
+    (f"SELECT {NAME}, {ENERGY} FROM {TABLE}", None),
+    (f'SELECT "{NAME}" AS 이름, {TABLE}.{ENERGY} 열량 FROM {TABLE} WHERE {GROUP} = \'과일류\'', None),
+    (f"SELECT {NAME} FROM {TABLE} WHERE {ENERGY} > 800;", None),
+    # 비교 연산자 / NULL / 3값 논리
+    (f"SELECT {NAME}, {PROTEIN} FROM {TABLE} WHERE {PROTEIN} >= 30", None),
+    (f"SELECT {NAME}, {FAT} FROM {TABLE} WHERE {FAT} <= 0.1 AND {GROUP} <> '음료류'", None),
+    (f"SELECT {NAME} FROM {TABLE} WHERE {SUGAR} != 0 AND {SUGAR} < 0.5", None),
+    (f"SELECT {NAME} FROM {TABLE} WHERE {FAT} == 0", None),
+    (f"SELECT {NAME} FROM {TABLE} WHERE {ENERGY} > -1 AND {FAT} IS NULL", None),
+    (f"SELECT {NAME} FROM {TABLE} WHERE {SUGAR} IS NOT NULL AND {SUGAR} > 40", None),
+    (f"SELECT {NAME} FROM {TABLE} WHERE NOT ({SUGAR} > 1)", None),
+    (f"SELECT {NAME} FROM {TABLE} WHERE NOT ({SUGAR} > 1 OR {ENERGY} > 100)", None),
+    (f"SELECT {NAME} FROM {TABLE} WHERE ({SUGAR} > 30 OR {VITAMIN_C} > 100) AND NOT {GROUP} = '채소류'", None),
+    (f"SELECT {NAME} FROM {TABLE} WHERE {GROUP} IN ('과일류', '버섯류') AND {VITAMIN_C} BETWEEN 10 AND 20", None),
+    (f"SELECT {NAME} FROM {TABLE} WHERE {GROUP} NOT IN ('과일류', '채소류') AND {VITAMIN_C} NOT BETWEEN 0 AND 50", None),
+    (f"SELECT {NAME} FROM {TABLE} WHERE {ENERGY} IN (0, 100, 200)", None),
+    # LIKE (부분/앞/뒤/전체 일치, _ 와일드카드, ASCII 대소문자 무시)
+    (f"SELECT {NAME} FROM {TABLE} WHERE {NAME} LIKE '김치%'", None),
+    (f"SELECT {NAME} FROM {TABLE} WHERE {NAME} LIKE '%볶음'", None),
+    (f"SELECT {NAME} FROM {TABLE} WHERE {NAME} LIKE '사과, 부사, 생것'", None),
+    (f"SELECT {NAME} FROM {TABLE} WHERE {NAME} LIKE '_과%'", None),
+    (f"SELECT {NAME}, {SOURCE} FROM {TABLE} WHERE {SOURCE} LIKE '%usda%'", None),
+    (f"SELECT {NAME} FROM {TABLE} WHERE {NAME} NOT LIKE '%,%'", None),
+    # 정렬 / LIMIT / OFFSET (NULL 은 가장 작은 값)
+    (f"SELECT {NAME}, {VITAMIN_C} FROM {TABLE} ORDER BY {VITAMIN_C} DESC LIMIT 10", [1]),
+    (f"SELECT {NAME}, {VITAMIN_C} FROM {TABLE} ORDER BY {VITAMIN_C} LIMIT 10", [1]),
+    (f"SELECT {NAME}, {SODIUM} FROM {TABLE} ORDER BY {SODIUM} DESC LIMIT 20", [1]),
+    (f"SELECT {NAME}, {SODIUM} FROM {TABLE} ORDER BY {SODIUM} DESC LIMIT 5 OFFSET 15", [1]),
+    (f"SELECT {NAME}, {ENERGY} FROM {TABLE} WHERE {GROUP} = '과일류' ORDER BY {ENERGY} DESC LIMIT 5", [1]),
+    (f"SELECT {GROUP}, {NAME}, {PROTEIN} FROM {TABLE} ORDER BY {GROUP}, {PROTEIN} DESC", [0, 2]),
+    (f"SELECT {NAME} AS 이름, {FAT} AS 지방 FROM {TABLE} WHERE {FAT} > 50 ORDER BY 지방 ASC", [1]),
+    (f"SELECT {NAME}, {SUGAR} FROM {TABLE} ORDER BY 2 DESC, 1 LIMIT 30", [1, 0]),
+    (f"SELECT {NAME}, {ENERGY} FROM {TABLE} ORDER BY {NAME} LIMIT 50", [0]),
+    # 집계 (GROUP BY 없음 / 있음, 빈 결과)
+    (f"SELECT COUNT(*) FROM {TABLE}", None),
+    (f"SELECT COUNT(*), COUNT({SUGAR}), SUM({ENERGY}), AVG({VITAMIN_C}), MIN({FAT}), MAX({FAT}) FROM {TABLE}", None),
+    (f"SELECT AVG({VITAMIN_C}) AS 평균 FROM {TABLE} WHERE {GROUP} = '과일류'", None),
+    (f"SELECT COUNT(*), AVG({ENERGY}), MAX({SUGAR}) FROM {TABLE} WHERE {ENERGY} > 100000", None),
+    (f"SELECT {GROUP}, AVG({VITAMIN_C}) FROM {TABLE} GROUP BY {GROUP}", None),
+    (f"SELECT {GROUP}, COUNT(*) AS n FROM {TABLE} GROUP BY {GROUP} ORDER BY n DESC", [1]),
+    (f"SELECT {GROUP}, MAX({PROTEIN}), MIN({PROTEIN}), SUM({SODIUM}) FROM {TABLE} GROUP BY {GROUP} ORDER BY MAX({PROTEIN}) DESC LIMIT 5", [1]),
+    (f"SELECT {GROUP}, AVG({SUGAR}) AS 평균_당류 FROM {TABLE} WHERE {SUGAR} IS NOT NULL GROUP BY {GROUP} ORDER BY 2", [1]),
+    (f"SELECT {GROUP}, COUNT({FAT}) FROM {TABLE} WHERE {ENERGY} > 100000 GROUP BY {GROUP}", None),
+]
+
+# 컬럼형 저장소가 처리하지 않고 SQLite 에 넘겨야 하는 쿼리
+UNSUPPORTED = [
+    f"SELECT DISTINCT {GROUP} FROM {TABLE}",
+    f"SELECT ROUND({ENERGY}) FROM {TABLE}",
+    f"SELECT {NAME} FROM {TABLE} WHERE {ENERGY} > (SELECT AVG({ENERGY}) FROM {TABLE})",
+    f"SELECT a.{NAME} FROM {TABLE} a JOIN {TABLE} b ON a.rowid = b.rowid",
+    f"SELECT {GROUP}, COUNT(*) FROM {TABLE} GROUP BY {GROUP} HAVING COUNT(*) > 10",
+    f"SELECT {NAME} FROM other_table",
+    f"SELECT {NAME} FROM {TABLE} WHERE {ENERGY} = '100'",
+    f"SELECT {NAME} FROM {TABLE} WHERE {ENERGY} LIKE '1%'",
+    f"SELECT *, COUNT(*) FROM {TABLE}",
+    f"SELECT {NAME}, MAX({ENERGY}) FROM {TABLE}",
+    f"SELECT {NAME}, COUNT(*) FROM {TABLE} GROUP BY {GROUP}",
+    f"SELECT {GROUP}, SUM({NAME}) FROM {TABLE} GROUP BY {GROUP}",
+    f"SELECT {NAME} FROM {TABLE} ORDER BY {ENERGY} + 1",
+    f"SELECT {NAME} FROM {TABLE} LIMIT 10; DELETE FROM {TABLE}",
+]
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    return ColumnarStore(DB_PATH, TABLE, str(tmp_path_factory.mktemp("columnar")))
+
+
+@pytest.fixture(scope="module")
+def conn():
+    connection = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    yield connection
+    connection.close()
+
+
+def _canonical(value):
+    """실수는 유효숫자 12자리로 맞춰 비교 (집계 누적 순서 차이 허용)"""
+    if isinstance(value, float) and math.isfinite(value):
+        return float(f"{value:.12g}")
+    return value
+
+
+def _rows(rows):
+    return [tuple(_canonical(value) for value in row) for row in rows]
+
+
+def _tie_groups(rows, keys):
+    """ORDER BY 키가 같은 연속된 행 묶음"""
+    groups = []
+    for row in rows:
+        key = tuple(row[i] for i in keys)
+        if groups and groups[-1][0] == key:
+            groups[-1][1].append(row)
+        else:
+            groups.append((key, [row]))
+    return groups
+
+
+@pytest.mark.parametrize("query, keys", SUPPORTED)
+def test_matches_sqlite(store, conn, query, keys):
+    executed = store.execute(query)
+    assert executed is not None, "컬럼형 저장소에서 처리해야 하는 쿼리"
+    columns, rows = executed
+
+    cursor = conn.execute(query)
+    expected_columns = [description[0] for description in cursor.description]
+    expected_rows = cursor.fetchall()
+
+    assert columns == expected_columns
+    assert len(rows) == len(expected_rows)
+    rows, expected_rows = _rows(rows), _rows(expected_rows)
+
+    if keys is None:
+        assert Counter(rows) == Counter(expected_rows)
+        return
+
+    groups, expected_groups = _tie_groups(rows, keys), _tie_groups(expected_rows, keys)
+    assert [key for key, _ in groups] == [key for key, _ in expected_groups]
+    truncated = " LIMIT " in query.upper()
+    for i, ((_, group), (_, expected_group)) in enumerate(zip(groups, expected_groups)):
+        if truncated and i == len(groups) - 1:
+            assert len(group) == len(expected_group)
+        else:
+            assert Counter(group) == Counter(expected_group)
+
+
+@pytest.mark.parametrize("query", UNSUPPORTED)
+def test_falls_back_to_sqlite(store, query):
+    assert store.execute(query) is None
+
+
+def test_rebuilds_when_database_changes(tmp_path):
+    db_path = tmp_path / "nutrition.db"
+    with sqlite3.connect(db_path) as connection:
+        connection.execute(f'CREATE TABLE {TABLE} ("{NAME}" TEXT, "{ENERGY}" REAL)')
+        connection.execute(f"INSERT INTO {TABLE} VALUES ('사과', 50.0)")
+    store = ColumnarStore(str(db_path), TABLE, str(tmp_path / "columnar"))
+    assert store.execute(f"SELECT COUNT(*) FROM {TABLE}") == (["COUNT(*)"], [(1,)])
+
+    with sqlite3.connect(db_path) as connection:
+        connection.execute(f"INSERT INTO {TABLE} VALUES ('배', 45.0), ('감', NULL)")
+    os.utime(db_path, ns=(os.stat(db_path).st_atime_ns, os.stat(db_path).st_mtime_ns + 1_000_000_000))
+    assert store.execute(f"SELECT COUNT(*), COUNT({ENERGY}) FROM {TABLE}") == (["COUNT(*)", f"COUNT({ENERGY})"], [(3, 2)])
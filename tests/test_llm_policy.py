@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""llm_policy.CallPolicy 의 hedge 콜백 전달, 지연 시간 표본, 노드 단위 제한 시간"""
+
+import asyncio
+import itertools
+import os
+import sys
+import threading
+import time
+from typing import Any, List
+
+import pytest
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableLambda
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_llm import FakeChatModel  # noqa: E402
+from llm_policy import CallPolicy, DeadlineExceeded  # noqa: E402
+
+RESPONSE = "SELECT 가식부_100g_당_식품명 FROM nutrition_data LIMIT 5"
+
+
+class ScriptedModel(FakeChatModel):
+    """호출 순서대로 delays 의 지연 시간을 사용하는 FakeChatModel (마지막 값은 이후 호출에도 사용)"""
+
+    delays: List[float] = []
+    _calls: Any = None
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        self._calls = itertools.count()
+
+    def sample_latency(self) -> float:
+        with self._rng_lock:
+            index = next(self._calls)
+        return self.delays[min(index, len(self.delays) - 1)]
+
+
+class Recorder(BaseCallbackHandler):
+    """부모 config 에 연결된 콜백 (UI 토큰 스트리밍/토큰 사용량 기록 역할)"""
+
+    def __init__(self):
+        self.starts = 0
+        self.ends = 0
+        self.tokens: List[str] = []
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, *args, **kwargs):
+        with self._lock:
+            self.starts += 1
+
+    def on_llm_new_token(self, token, **kwargs):
+        with self._lock:
+            self.tokens.append(token)
+
+    def on_llm_end(self, *args, **kwargs):
+        with self._lock:
+            self.ends += 1
+
+
+def _hedging_policy() -> CallPolicy:
+    # 표본 하나(50ms)로 바로 hedge 하도록 설정
+    policy = CallPolicy("test", deadline=5.0, hedge_min_samples=1, max_hedge_ratio=1.0, max_attempts=1)
+    policy.latencies.add(0.05)
+    return policy
+
+
+def _run(mode: str, policy: CallPolicy, model: FakeChatModel, recorder: Recorder) -> str:
+    """노드처럼 부모 config(콜백) 안에서 정책 호출"""
+    config = {"callbacks": [recorder]}
+    if mode == "invoke":
+        node = RunnableLambda(lambda _: policy.invoke(model, "질문").content)
+        return node.invoke(None, config=config)
+    if mode == "stream":
+        node = RunnableLambda(lambda _: "".join(chunk.content for chunk in policy.stream(model, "질문")))
+        return node.invoke(None, config=config)
+
+    async def ainvoke(_):
+        return (await policy.ainvoke(model, "질문")).content
+
+    async def astream(_):
+        return "".join([chunk.content async for chunk in policy.astream(model, "질문")])
+
+    node = RunnableLambda(lambda _: None, afunc=ainvoke if mode == "ainvoke" else astream)
+    return asyncio.run(node.ainvoke(None, config=config))
+
+
+@pytest.mark.parametrize("mode", ["invoke", "stream", "ainvoke", "astream"])
+def test_hedge_forwards_only_winning_callbacks(mode):
+    policy = _hedging_policy()
+    # 첫 시도는 느리고 hedge 시도는 바로 응답
+    model = ScriptedModel(canned={"질문": {"query": RESPONSE}}, delays=[0.4, 0.0])
+    recorder = Recorder()
+
+    assert _run(mode, policy, model, recorder) == RESPONSE
+    time.sleep(0.5)  # 늦은 시도가 끝난 뒤에도 이벤트가 전달되지 않는지 확인
+
+    stats = policy.stats()
+    assert (stats["hedges"], stats["hedge_wins"], stats["ok"]) == (1, 1, 1)
+    assert (recorder.starts, recorder.ends) == (1, 1)
+    if mode in ("stream", "astream"):
+        assert "".join(recorder.tokens) == RESPONSE
+
+
+@pytest.mark.parametrize("mode", ["invoke", "stream", "ainvoke", "astream"])
+def test_latency_window_records_only_winner(mode):
+    policy = _hedging_policy()
+    model = ScriptedModel(canned={"질문": {"query": RESPONSE}}, delays=[0.4, 0.0])
+
+    _run(mode, policy, model, Recorder())
+
+    # 초기 표본 + 승자 한 개 (늦은 시도의 경과 시간은 기록하지 않음)
+    assert len(policy.latencies) == 2
+    assert policy.latencies.quantile(1.0) < 0.2
+
+
+def test_without_hedge_callbacks_pass_through():
+    policy = CallPolicy("test", deadline=5.0, hedge=False)
+    model = ScriptedModel(canned={"질문": {"query": RESPONSE}}, delays=[0.0])
+    recorder = Recorder()
+
+    assert _run("stream", policy, model, recorder) == RESPONSE
+    assert (recorder.starts, recorder.ends) == (1, 1)
+    assert "".join(recorder.tokens) == RESPONSE
+
+
+def test_node_deadline_is_shared_across_calls():
+    policy = CallPolicy("test", deadline=0.5, hedge=False)
+    model = ScriptedModel(delays=[0.3])
+
+    # 호출마다 제한 시간을 새로 구하면 두 호출 모두 성공
+    policy.invoke(model, "질문")
+    policy.invoke(model, "질문")
+
+    deadline_at = policy.node_deadline()
+    started = time.monotonic()
+    policy.invoke(model, "질문", deadline_at=deadline_at)
+    with pytest.raises(DeadlineExceeded):
+        policy.invoke(model, "질문", deadline_at=deadline_at)
+    assert time.monotonic() - started < 0.45 + 0.1
+    assert policy.stats()["deadline_exceeded"] == 1
+
+
+def test_async_node_deadline_is_shared_across_calls():
+    policy = CallPolicy("test", deadline=0.5, hedge=False)
+    model = ScriptedModel(delays=[0.3])
+
+    async def scenario():
+        deadline_at = policy.node_deadline()
+        await policy.ainvoke(model, "질문", deadline_at=deadline_at)
+        await policy.ainvoke(model, "질문", deadline_at=deadline_at)
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(scenario())
+    assert time.monotonic() - started < 0.6
+
+
+@pytest.fixture
+def two_call_write_query(monkeypatch):
+    """write_query 가 gpt_sql 과 구조화 출력 모델을 차례로 호출하도록 설정 (각 0.3초, 노드 제한 0.5초)"""
+    monkeypatch.setenv("OPENAI_API_KEY", os.getenv("OPENAI_API_KEY", "test"))
+    import app
+
+    model = ScriptedModel(canned={"질문": {"query": RESPONSE}}, delays=[0.3])
+    monkeypatch.setattr(app, "SINGLE_PASS_SQL", False)
+    monkeypatch.setitem(app.llm_policies, "write_query", CallPolicy("write_query", deadline=0.5, hedge=False))
+    monkeypatch.setattr(app.context, "gpt_sql", app.create_query_chain(model, k=10), raising=False)
+    monkeypatch.setattr(app.context, "structured_query_llm",
+                        model.with_structured_output(app.QueryOutput, include_raw=True), raising=False)
+    return app
+
+
+def test_write_query_shares_deadline_between_its_calls(two_call_write_query):
+    app = two_call_write_query
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        app.write_query(app._initial_state("질문"), {})
+    assert time.monotonic() - started < 0.6
+
+
+def test_awrite_query_shares_deadline_between_its_calls(two_call_write_query):
+    app = two_call_write_query
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(app.awrite_query(app._initial_state("질문"), {}))
+    assert time.monotonic() - started < 0.6
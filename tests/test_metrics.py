@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""metrics.MetricsRegistry 의 Prometheus 텍스트 출력"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from metrics import MetricsRegistry  # noqa: E402
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.describe("test_total", "counter", "Test counter")
+    registry.inc("test_total", error='ValueError("C:\\tmp")\nline 2')
+
+    assert 'test_total{error="ValueError(\\"C:\\\\tmp\\")\\nline 2"} 1.0' in registry.render().splitlines()
+
+
+def test_histogram_series():
+    registry = MetricsRegistry()
+    registry.describe("test_seconds", "histogram", "Test histogram", buckets=(0.1, 1.0))
+    registry.observe("test_seconds", 0.5, node="write_query")
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP test_seconds Test histogram", "# TYPE test_seconds histogram"]
+    assert lines[2:] == [
+        'test_seconds_bucket{node="write_query",le="0.1"} 0',
+        'test_seconds_bucket{node="write_query",le="1.0"} 1',
+        'test_seconds_bucket{node="write_query",le="+Inf"} 1',
+        'test_seconds_sum{node="write_query"} 0.5',
+        'test_seconds_count{node="write_query"} 1',
+    ]
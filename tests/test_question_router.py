@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""question_router 의 질문 템플릿과 영양소 별칭"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from question_router import QuestionRouter, build_nutrient_aliases  # noqa: E402
+
+DB_PATH = os.path.join(ROOT, "data", "nutrition_data.db")
+TABLE = "nutrition_data"
+NAME = "가식부_100g_당_식품명"
+GROUP = "식품군"
+
+VITAMIN_C = "비타민_Vitamins_비타민_C_mg"
+SUGAR = "일반성분_Proximates_당류_g"
+ENERGY = "일반성분_Proximates_에너지_kcal"
+
+
+@pytest.fixture(scope="module")
+def router():
+    return QuestionRouter(DB_PATH, TABLE, NAME, GROUP)
+
+
+@pytest.fixture(scope="module")
+def conn():
+    connection = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    yield connection
+    connection.close()
+
+
+# (질문, 템플릿, 영양소 컬럼, 식품군, 개수 또는 식품명)
+MATCHES = [
+    ("비타민C가 가장 많은 식품 5개는?", "top_foods", VITAMIN_C, None, 5),
+    ("비타민 C가 가장 많은 식품은?", "top_foods", VITAMIN_C, None, 1),
+    ("칼슘이 풍부한 식품", "top_foods", "무기질_Minerals_칼슘_mg", None, 10),
+    ("상위 3개 단백질이 높은 식품은?", "top_foods", "일반성분_Proximates_단백질_g", None, 3),
+    ("칼로리가 제일 높은 음식 5가지 알려줘", "top_foods", ENERGY, None, 5),
+    ("protein 함량이 가장 높은 식품 3개", "top_foods", "일반성분_Proximates_단백질_g", None, 3),
+    ("철분이 많은 식품은?", "top_foods", "무기질_Minerals_철_mg", None, 10),
+    ("DHA가 가장 많은 식품 3개는?", "top_foods", "지방산_Fatty_acids_도코사_헥사에노산_22_6_n_3_mg", None, 3),
+    ("오메가3가 풍부한 식품은?", "top_foods", "지방산_Fatty_acids_오메가3_지방산_g", None, 10),
+    ("과일류 중 비타민C가 가장 많은 식품은?", "top_foods", VITAMIN_C, "과일류", 1),
+    ("과일류 중에서 당류가 높은 식품 3개는?", "top_foods", SUGAR, "과일류", 3),
+    ("과일류의 평균 당류 함량은?", "group_average", SUGAR, "과일류", None),
+    ("채소류 중 평균 비타민C는?", "group_average", VITAMIN_C, "채소류", None),
+    ("식품군별 평균 나트륨은?", "group_average", "무기질_Minerals_나트륨_mg", None, None),
+    ("사과, 부사, 생것에 들어있는 모든 영양소는?", "food_nutrients", None, None, "사과, 부사, 생것"),
+    ("사과에 들어있는 모든 영양소는?", "food_nutrients", None, None, "사과, 생것"),
+    ("우유의 영양성분은?", "food_nutrients", None, None, "우유"),
+]
+
+# 템플릿으로 답하면 안 되는 질문 (LLM 경로)
+NON_MATCHES = [
+    "칼슘이 풍부한 유제품 종류는?",
+    "통풍에 가장 안좋은 식품은?",
+    "짜장라면과 볶음라면의 당류 함량과 에너지 함량은?",
+    "행복이 가장 많은 식품은?",
+    "비타민C가 가장 많은 식품 500개는?",
+    "없는식품군 중 비타민C가 가장 많은 식품은?",
+    "없는식품군의 평균 당류는?",
+    "과일류의 평균 행복은?",
+    "존재하지않는음식에 들어있는 모든 영양소는?",
+    "비타민C가 많은 식품과 적은 식품을 비교해줘",
+]
+
+
+def _execute(conn, match):
+    cursor = conn.execute(match["sql"], match["params"])
+    return [description[0] for description in cursor.description], cursor.fetchall()
+
+
+@pytest.mark.parametrize("question, template, column, group, extra", MATCHES)
+def test_matches_template(router, question, template, column, group, extra):
+    match = router.match(question)
+    assert match is not None
+    assert (match["template"], match["group"]) == (template, group)
+    if template == "food_nutrients":
+        assert match["food"] == extra
+    else:
+        assert column in match["params"] or f'"{column}"' in match["sql"]
+    if template == "top_foods":
+        assert extra in match["params"] or (group is not None and extra == 1)
+
+
+@pytest.mark.parametrize("question", NON_MATCHES)
+def test_does_not_match(router, question):
+    assert router.match(question) is None
+
+
+@pytest.mark.parametrize("question, group, limit", [
+    ("비타민C가 가장 많은 식품 5개는?", None, 5),
+    ("과일류 중 비타민C가 가장 많은 식품은?", "과일류", 1),
+    ("과일류 중에서 비타민C가 높은 식품 3개는?", "과일류", 3),
+])
+def test_top_foods_match_base_table(router, conn, question, group, limit):
+    """상위 식품 테이블/요약 테이블 경로와 원본 테이블 쿼리의 결과가 같음"""
+    columns, rows = _execute(conn, router.match(question))
+    where = f"{VITAMIN_C} IS NOT NULL" + (f" AND {GROUP} = '{group}'" if group else "")
+    expected = conn.execute(
+        f"SELECT {NAME}, {GROUP}, {VITAMIN_C} FROM {TABLE} WHERE {where} ORDER BY {VITAMIN_C} DESC, rowid LIMIT {limit}"
+    ).fetchall()
+    assert columns == [NAME, GROUP, VITAMIN_C]
+    assert rows == expected
+
+
+def test_group_average_matches_base_table(router, conn):
+    _, rows = _execute(conn, router.match("과일류의 평균 당류 함량은?"))
+    expected = conn.execute(f"SELECT AVG({SUGAR}), COUNT({SUGAR}) FROM {TABLE} WHERE {GROUP} = '과일류'").fetchone()
+    assert rows[0][-1] == pytest.approx(expected[0])
+    assert rows[0][2] == expected[1]
+
+
+def test_render_answers(router, conn):
+    match = router.match("비타민C가 가장 많은 식품 3개는?")
+    columns, rows = _execute(conn, match)
+    answer = router.render_answer(match, columns, rows)
+    assert answer.startswith("비타민 C 함량이 가장 높은 식품 3개는")
+    assert f"1. {rows[0][0]}: {rows[0][-1]:g}mg" in answer
+
+    match = router.match("과일류의 평균 당류 함량은?")
+    answer = router.render_answer(match, *_execute(conn, match))
+    assert answer.startswith("과일류의 평균 당류 함량은 100g 당 ")
+
+    match = router.match("사과, 부사, 생것에 들어있는 모든 영양소는?")
+    answer = router.render_answer(match, *_execute(conn, match))
+    assert answer.startswith("사과, 부사, 생것의 100g 당 영양성분입니다.")
+    assert "- 에너지: " in answer
+
+    assert router.render_answer(match, [], []).startswith("죄송합니다")
+
+
+def test_display_sql_inlines_params(router):
+    match = router.match("과일류 중에서 당류가 높은 식품 3개는?")
+    sql = router.display_sql(match)
+    assert "?" not in sql and "'과일류'" in sql and "LIMIT 3" in sql
+
+
+def test_nutrient_aliases():
+    columns = {
+        NAME: "TEXT",
+        VITAMIN_C: "REAL",
+        "일반성분_Proximates_총_식이섬유_g": "REAL",
+        "지방산_Fatty_acids_리놀레산_18_2_n_6_mg": "REAL",
+        "지방산_Fatty_acids_오메가3_지방산_g": "REAL",
+        ENERGY: "REAL",
+        "column_87": "REAL",
+    }
+    aliases = build_nutrient_aliases(columns)
+    assert aliases["비타민c"] == VITAMIN_C
+    assert aliases["vitaminc"] == VITAMIN_C
+    assert aliases["총식이섬유"] == aliases["식이섬유"] == aliases["fiber"] == "일반성분_Proximates_총_식이섬유_g"
+    assert aliases["리놀레산"] == "지방산_Fatty_acids_리놀레산_18_2_n_6_mg"
+    assert aliases["오메가3"] == aliases["omega3"] == "지방산_Fatty_acids_오메가3_지방산_g"
+    assert aliases["칼로리"] == aliases["열량"] == aliases["kcal"] == ENERGY
+    # 문자열 컬럼, 이름 없는 컬럼, 스키마에 없는 영양소의 동의어는 제외
+    assert NAME not in aliases.values() and "column_87" not in aliases.values()
+    assert "철분" not in aliases
+
+
+def test_without_precomputed_tables(router, conn, tmp_path):
+    """요약 테이블이 없는 데이터베이스는 원본 테이블로 상위 식품을 구하고 평균 질문은 LLM 경로로 보냄"""
+    db_path = str(tmp_path / "base.db")
+    with sqlite3.connect(db_path) as connection:
+        connection.execute(f"ATTACH DATABASE 'file:{DB_PATH}?mode=ro' AS source")
+        connection.execute(f"CREATE TABLE {TABLE} AS SELECT * FROM source.{TABLE}")
+    base_router = QuestionRouter(db_path, TABLE, NAME, GROUP)
+    question = "비타민C가 가장 많은 식품 5개는?"
+
+    assert base_router.match("과일류의 평균 당류 함량은?") is None
+    match = base_router.match(question)
+    assert f'FROM "{TABLE}"' in match["sql"]
+    with sqlite3.connect(db_path) as connection:
+        _, rows = _execute(connection, match)
+    _, expected = _execute(conn, router.match(question))
+    assert [row[0] for row in rows] == [row[0] for row in expected]
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""request_gate 의 single-flight 와 입장 제어"""
+
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from request_gate import AdmissionController, AdmissionRejected, AsyncSingleFlight, SingleFlight  # noqa: E402
+
+##################################################################
+# SingleFlight
+##################################################################
+
+def _blocking_producer(release: threading.Event, calls: list, items=("a", "b", "c"), error=None):
+    def produce():
+        calls.append(1)
+        release.wait(5)
+        yield from items
+        if error is not None:
+            raise error
+    return produce
+
+
+def test_concurrent_callers_share_one_run():
+    flight, release, calls = SingleFlight(), threading.Event(), []
+    # 생산자가 release 를 기다리는 동안 같은 키로 합류
+    consumers = [flight.run("q", _blocking_producer(release, calls)) for _ in range(4)]
+    assert flight.stats() == {"in_flight": 1, "leaders": 1, "followers": 3}
+
+    release.set()
+    outputs = [list(consumer) for consumer in consumers]
+    assert len(calls) == 1
+    # 느린 소비자는 중간 출력을 건너뛸 수 있지만 마지막 출력은 모두 받음
+    assert all(output and output[-1] == "c" for output in outputs)
+    assert all(output == sorted(output) for output in outputs)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_different_keys_and_later_calls_run_separately():
+    flight, release, calls = SingleFlight(), threading.Event(), []
+    release.set()
+    assert list(flight.run("q1", _blocking_producer(release, calls)))[-1] == "c"
+    assert list(flight.run("q2", _blocking_producer(release, calls)))[-1] == "c"
+    assert list(flight.run("q1", _blocking_producer(release, calls)))[-1] == "c"
+    assert len(calls) == 3
+    assert flight.stats() == {"in_flight": 0, "leaders": 3, "followers": 0}
+
+
+def test_producer_error_reaches_every_waiter():
+    flight, release, calls = SingleFlight(), threading.Event(), []
+    error = ValueError("boom")
+    consumers = [flight.run("q", _blocking_producer(release, calls, error=error)) for _ in range(3)]
+    release.set()
+    for consumer in consumers:
+        with pytest.raises(ValueError) as raised:
+            list(consumer)
+        assert raised.value is error
+    assert len(calls) == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_async_concurrent_callers_share_one_run():
+    async def scenario():
+        flight, release, calls = AsyncSingleFlight(), asyncio.Event(), []
+
+        async def produce():
+            calls.append(1)
+            await release.wait()
+            for item in ("a", "b", "c"):
+                yield item
+
+        async def consume():
+            return [item async for item in flight.run("q", produce)]
+
+        tasks = [asyncio.ensure_future(consume()) for _ in range(4)]
+        await asyncio.sleep(0)
+        assert flight.stats() == {"in_flight": 1, "leaders": 1, "followers": 3}
+        release.set()
+        outputs = await asyncio.gather(*tasks)
+        return calls, outputs, flight.stats()
+
+    calls, outputs, stats = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(output and output[-1] == "c" for output in outputs)
+    assert stats["in_flight"] == 0
+
+
+def test_async_producer_error_reaches_every_waiter():
+    async def scenario():
+        flight, release = AsyncSingleFlight(), asyncio.Event()
+
+        async def produce():
+            await release.wait()
+            yield "a"
+            raise ValueError("boom")
+
+        async def consume():
+            return [item async for item in flight.run("q", produce)]
+
+        tasks = [asyncio.ensure_future(consume()) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert len(results) == 3
+    assert all(isinstance(result, ValueError) and str(result) == "boom" for result in results)
+
+##################################################################
+# AdmissionController
+##################################################################
+
+def test_rejects_when_queue_is_full():
+    controller = AdmissionController(max_active=1, max_queue=1, per_client=5, timeout=1.0)
+    active = controller.enter("a")
+    queued = controller.enter("b")
+    assert active.admitted and not queued.admitted and queued.position == 0
+
+    with pytest.raises(AdmissionRejected) as raised:
+        controller.enter("c")
+    assert raised.value.reason == "queue_full"
+
+    active.release()
+    assert queued.admitted
+    queued.wait()
+    queued.release()
+    stats = controller.stats()
+    assert (stats["active"], stats["queued"], stats["clients"]) == (0, 0, 0)
+    assert (stats["admitted"], stats["enqueued"], stats["queue_full"]) == (2, 1, 1)
+
+
+def test_zero_queue_rejects_immediately():
+    controller = AdmissionController(max_active=1, max_queue=0)
+    controller.enter("a")
+    with pytest.raises(AdmissionRejected) as raised:
+        controller.enter("b")
+    assert raised.value.reason == "queue_full"
+
+
+def test_per_client_limit():
+    controller = AdmissionController(max_active=4, max_queue=4, per_client=2)
+    first, second = controller.enter("a"), controller.enter("a")
+    with pytest.raises(AdmissionRejected) as raised:
+        controller.enter("a")
+    assert raised.value.reason == "client_limit"
+    assert controller.enter("b").admitted
+
+    # 반납하면 다시 입장 가능 (두 번 반납해도 한 번만 반영)
+    first.release()
+    first.release()
+    assert controller.enter("a").admitted
+    assert controller.stats()["active"] == 3
+    second.release()
+
+
+def test_free_slots_rotate_between_waiting_clients():
+    controller = AdmissionController(max_active=1, max_queue=10, per_client=10, timeout=1.0)
+    running = controller.enter("a")
+    waiting = [("a", controller.enter("a")), ("a", controller.enter("a")), ("a", controller.enter("a")),
+               ("b", controller.enter("b")), ("c", controller.enter("c"))]
+    assert [ticket.position for _, ticket in waiting] == [0, 1, 2, 3, 4]
+
+    order = []
+    while True:
+        running.release()
+        granted = [(client, ticket) for client, ticket in waiting if ticket.admitted and not ticket.released]
+        if not granted:
+            break
+        assert len(granted) == 1
+        order.append(granted[0][0])
+        running = granted[0][1]
+    # 클라이언트 a 가 먼저 대기열에 여러 개를 넣었어도 b, c 와 번갈아 배정
+    assert order == ["a", "b", "c", "a", "a"]
+
+
+def test_waiting_ticket_times_out():
+    controller = AdmissionController(max_active=1, max_queue=1, timeout=0.01)
+    active = controller.enter("a")
+    queued = controller.enter("b")
+    with pytest.raises(AdmissionRejected) as raised:
+        queued.wait()
+    assert raised.value.reason == "timeout"
+    stats = controller.stats()
+    assert (stats["queued"], stats["timeout"], stats["clients"]) == (0, 1, 1)
+
+    # 시간 초과된 입장권은 빈 자리를 받지 않음
+    active.release()
+    assert not queued.admitted
+    assert controller.stats()["active"] == 0
+
+
+def test_wait_async_is_granted_by_release_from_another_thread():
+    controller = AdmissionController(max_active=1, max_queue=1, timeout=5.0)
+    active = controller.enter("a")
+    queued = controller.enter("b")
+
+    async def scenario():
+        waiter = asyncio.ensure_future(queued.wait_async())
+        await asyncio.sleep(0)
+        threading.Thread(target=active.release).start()
+        await waiter
+
+    asyncio.run(scenario())
+    assert queued.admitted
+    queued.release()
+    assert controller.stats()["active"] == 0
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""result_cache.SQLResultCache 의 정규화 적중, 파일 변경 무효화, 바이트 기준 LRU 제거"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from result_cache import META_TABLE, SQLResultCache, current_data_version, normalize_sql  # noqa: E402
+
+
+def _write_version(db_path, version):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute(f"INSERT OR REPLACE INTO {META_TABLE} (key, value) VALUES ('data_version', ?)", (version,))
+    conn.close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "data.db")
+    _write_version(path, "v1")
+    return path
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("SELECT a\n  FROM t\tWHERE b = 1 ;", "SELECT a FROM t WHERE b = 1"),
+    ("  SELECT a FROM t WHERE b = 'x   y';;", "SELECT a FROM t WHERE b = 'x   y'"),
+    ("SELECT a FROM t WHERE b = 'it''s  ok'", "SELECT a FROM t WHERE b = 'it''s  ok'"),
+])
+def test_normalize_sql(query, expected):
+    assert normalize_sql(query) == expected
+
+
+def test_normalized_query_hits(db_path):
+    cache = SQLResultCache(db_path)
+    cache.put("SELECT a FROM t WHERE b = 1;", "[(1,)]")
+
+    assert cache.get("SELECT a\n FROM t  WHERE b = 1") == "[(1,)]"
+    # 리터럴 내부 공백과 식별자 대소문자는 다른 쿼리
+    assert cache.get("select a from t where b = 1") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["data_version"]) == (1, 1, "v1")
+
+
+def test_database_change_invalidates(db_path):
+    cache = SQLResultCache(db_path)
+    cache.put("SELECT 1", "[(1,)]")
+    assert cache.get("SELECT 1") == "[(1,)]"
+
+    _write_version(db_path, "v2")
+    assert cache.get("SELECT 1") is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["invalidations"], stats["data_version"]) == (0, 0, 1, "v2")
+
+
+def test_least_recently_used_results_are_evicted_by_bytes(db_path):
+    cache = SQLResultCache(db_path, max_bytes=30, max_entry_bytes=30)
+    cache.put("SELECT 1", "a" * 10)
+    cache.put("SELECT 2", "b" * 10)
+    assert cache.get("SELECT 1") is not None  # 최근 사용으로 갱신
+    cache.put("SELECT 3", "c" * 12)
+
+    assert cache.get("SELECT 2") is None
+    assert cache.get("SELECT 1") == "a" * 10 and cache.get("SELECT 3") == "c" * 12
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 22, 1)
+
+
+def test_sizes_are_utf8_bytes_and_replacements_are_counted_once(db_path):
+    cache = SQLResultCache(db_path, max_bytes=100, max_entry_bytes=30)
+    cache.put("SELECT 1", "사과" * 5)  # 30 bytes
+    assert cache.stats()["bytes"] == 30
+    cache.put("SELECT 1", "사과")
+    assert cache.stats()["bytes"] == 6
+
+    # 한 항목 최대 크기를 넘는 결과는 저장하지 않음
+    cache.put("SELECT 2", "사과" * 6)
+    assert cache.get("SELECT 2") is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_current_data_version(db_path, tmp_path):
+    assert current_data_version(db_path) == "v1"
+    _write_version(db_path, "v2")
+    assert current_data_version(db_path) == "v2"
+
+    # 메타데이터 테이블이 없으면 파일 fingerprint
+    plain = str(tmp_path / "plain.db")
+    sqlite3.connect(plain).close()
+    assert current_data_version(plain).startswith("(")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""sql_validator.validate_sql 규칙별 검증 결과"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sql_validator import INCONCLUSIVE, INVALID, VALID, extract_sql, validate_sql  # noqa: E402
+
+DB_PATH = os.path.join(ROOT, "data", "nutrition_data.db")
+TABLE = "nutrition_data"
+TEXT_COLUMNS = {"식품군", "가식부_100g_당_식품명", "출처"}
+
+NAME = "가식부_100g_당_식품명"
+GROUP = "식품군"
+SUGAR = "일반성분_Proximates_당류_g"
+ENERGY = "일반성분_Proximates_에너지_kcal"
+
+
+def _validate(query):
+    return validate_sql(query, DB_PATH, TABLE, TEXT_COLUMNS)
+
+
+# (SQL, 기대 판정, 기대 사유 접두어)
+CASES = [
+    # 문장 구성
+    ("", INVALID, "빈 쿼리"),
+    ("  ; ", INVALID, "빈 쿼리"),
+    (f"SELECT {NAME}, {SUGAR} FROM {TABLE} LIMIT 5; DROP TABLE {TABLE}", INVALID, "여러 개의 SQL 문"),
+    (f"SELECT {NAME}, {SUGAR} FROM {TABLE} WHERE {NAME} = 'a;b' LIMIT 3;", VALID, "정적 검증 통과"),
+    # 컴파일 오류
+    (f"SELEC {NAME} FROM {TABLE}", INVALID, "SQL 오류"),
+    (f"SELECT 없는컬럼 FROM {TABLE} LIMIT 5", INVALID, "SQL 오류"),
+    # authorizer (읽기 전용 SELECT 만 허용, 다른 테이블 거부)
+    (f"DELETE FROM {TABLE} WHERE rowid = 1", INVALID, "읽기 전용 SELECT 문이 아님"),
+    (f"UPDATE {TABLE} SET {SUGAR} = 0 WHERE rowid = 1", INVALID, "읽기 전용 SELECT 문이 아님"),
+    (f"INSERT INTO {TABLE} ({NAME}) VALUES ('x')", INVALID, "읽기 전용 SELECT 문이 아님"),
+    (f"DROP TABLE {TABLE}", INVALID, "읽기 전용 SELECT 문이 아님"),
+    (f"PRAGMA table_info({TABLE})", INVALID, "읽기 전용 SELECT 문이 아님"),
+    ("ATTACH DATABASE 'other.db' AS other", INVALID, "읽기 전용 SELECT 문이 아님"),
+    ("SELECT name FROM sqlite_master", INVALID, "허용되지 않은 테이블"),
+    # 큰따옴표 식별자 / 별칭 / CTE 이름
+    (f'SELECT {NAME}, {SUGAR} FROM {TABLE} WHERE "{GROUP}" = \'과일류\'', VALID, "정적 검증 통과"),
+    (f'SELECT {NAME}, "없는컬럼" FROM {TABLE} LIMIT 5', INCONCLUSIVE, "알 수 없는 식별자"),
+    (f'SELECT {NAME}, {SUGAR} FROM {TABLE} WHERE {GROUP} = "과일류"', INCONCLUSIVE, "알 수 없는 식별자"),
+    (f'SELECT {GROUP}, AVG({SUGAR}) AS "평균 당류" FROM {TABLE} GROUP BY {GROUP} ORDER BY "평균 당류" DESC LIMIT 5',
+     VALID, "정적 검증 통과"),
+    (f"WITH \"과일\" AS (SELECT {NAME}, {SUGAR} FROM {TABLE} WHERE {GROUP} = '과일류') "
+     f'SELECT * FROM "과일" ORDER BY {SUGAR} DESC LIMIT 5', VALID, "정적 검증 통과"),
+    # 재귀 CTE (RECURSIVE 키워드 유무, 사용 여부와 관계없이)
+    (f"WITH RECURSIVE r(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM r WHERE n < 5) "
+     f"SELECT {NAME}, {SUGAR} FROM {TABLE} WHERE rowid IN (SELECT n FROM r)", INVALID, "재귀 CTE"),
+    (f"WITH r(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM r) SELECT {NAME}, {SUGAR} FROM {TABLE} LIMIT 3",
+     INVALID, "재귀 CTE"),
+    # 조인 조건
+    (f"SELECT a.{NAME}, b.{SUGAR} FROM {TABLE} a, {TABLE} b LIMIT 5", INVALID, "조인 조건 없는 조인"),
+    (f"SELECT a.{NAME}, b.{SUGAR} FROM {TABLE} a CROSS JOIN {TABLE} b LIMIT 5", INVALID, "조인 조건 없는 조인"),
+    (f"SELECT a.{NAME}, b.{SUGAR} FROM {TABLE} a JOIN {TABLE} b ON 1 LIMIT 5", INVALID, "조인 조건 없는 조인"),
+    (f"SELECT a.{NAME} FROM {TABLE} a, {TABLE} b WHERE a.rowid < 3", INVALID, "조인 조건 없는 조인"),
+    (f"SELECT a.{NAME}, b.{SUGAR} FROM {TABLE} a JOIN {TABLE} b ON a.{GROUP} = b.{GROUP} WHERE a.rowid = 1",
+     VALID, "정적 검증 통과"),
+    (f"SELECT a.{NAME}, b.{SUGAR} FROM {TABLE} a, {TABLE} b WHERE a.{GROUP} = b.{GROUP} AND a.rowid = 1",
+     VALID, "정적 검증 통과"),
+    (f"SELECT a.{NAME}, b.{SUGAR} FROM {TABLE} AS a INNER JOIN {TABLE} AS b ON A.rowid = B.ROWID "
+     f"WHERE a.{GROUP} = '과일류'", VALID, "정적 검증 통과"),
+    (f"SELECT a.{NAME}, b.{SUGAR} FROM {TABLE} a JOIN {TABLE} b USING ({NAME}) LIMIT 5", VALID, "정적 검증 통과"),
+    (f"SELECT {NAME}, {SUGAR} FROM {TABLE} NATURAL JOIN {TABLE} LIMIT 5", VALID, "정적 검증 통과"),
+    (f"SELECT a.{NAME}, m FROM {TABLE} a JOIN (SELECT {GROUP}, MAX({SUGAR}) AS m FROM {TABLE} GROUP BY {GROUP}) s "
+     f"ON a.{SUGAR} = m LIMIT 5", INCONCLUSIVE, "조인 조건을 확인할 수 없음"),
+    # 제한 없는 전체 조회 (WHERE/LIMIT/GROUP BY/집계)
+    (f"SELECT {NAME}, {SUGAR} FROM {TABLE}", INVALID, "제한 없는 전체 조회"),
+    (f"SELECT {NAME}, {SUGAR} FROM {TABLE} WHERE 1", INVALID, "제한 없는 전체 조회"),
+    (f"SELECT {NAME}, {SUGAR} FROM {TABLE} WHERE 1 = 1 OR 'a' = 'a'", INVALID, "제한 없는 전체 조회"),
+    (f"SELECT {NAME}, {SUGAR} FROM {TABLE} ORDER BY {SUGAR} DESC LIMIT 10", VALID, "정적 검증 통과"),
+    (f"SELECT {GROUP}, AVG({SUGAR}) FROM {TABLE} GROUP BY {GROUP}", VALID, "정적 검증 통과"),
+    (f"SELECT MAX({ENERGY}) FROM {TABLE}", VALID, "정적 검증 통과"),
+    (f"SELECT {NAME}, {SUGAR} FROM {TABLE} WHERE {SUGAR} > 10", VALID, "정적 검증 통과"),
+    (f"SELECT {NAME}, {SUGAR} FROM {TABLE} WHERE {NAME} IN (SELECT {NAME} FROM {TABLE} WHERE {ENERGY} > 500)",
+     VALID, "정적 검증 통과"),
+    # rowid 조건 (food_resolver.format_food_hint 가 안내하는 형식 포함)
+    (f"SELECT {NAME}, {SUGAR} FROM {TABLE} WHERE {TABLE}.rowid IN (1,2,3)", VALID, "정적 검증 통과"),
+    (f"SELECT {NAME}, {SUGAR}, {ENERGY} FROM {TABLE} WHERE ROWID IN (1, 2)", VALID, "정적 검증 통과"),
+    (f"SELECT {NAME}, {SUGAR} FROM {TABLE} WHERE _rowid_ = 4", VALID, "정적 검증 통과"),
+    (f'SELECT {NAME}, {SUGAR} FROM {TABLE} WHERE "{TABLE}".oid = 4', VALID, "정적 검증 통과"),
+    (f"SELECT {NAME}, {SUGAR} FROM {TABLE} WHERE Rowid BETWEEN 1 AND 3", VALID, "정적 검증 통과"),
+    # 영양소 컬럼을 읽지 않는 쿼리
+    (f"SELECT {NAME}, {GROUP} FROM {TABLE} WHERE {NAME} LIKE '%사과%'", INCONCLUSIVE, "영양소 컬럼을 읽지 않음"),
+    (f"SELECT COUNT(*) FROM {TABLE}", INCONCLUSIVE, "영양소 컬럼을 읽지 않음"),
+]
+
+
+@pytest.mark.parametrize("query, verdict, reason", CASES)
+def test_validate_sql(query, verdict, reason):
+    result = _validate(query)
+    assert (result["verdict"], result["reason"][:len(reason)]) == (verdict, reason)
+
+
+def test_reports_columns_read():
+    result = _validate(f"SELECT {NAME}, {SUGAR} FROM {TABLE} WHERE {GROUP} = '과일류'")
+    assert set(result["columns"]) == {NAME, SUGAR, GROUP}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("SQLQuery: SELECT a FROM t WHERE b = ';' ;\nSQLResult: x", "SELECT a FROM t WHERE b = ';'"),
+    ("다음과 같습니다.\n```sql\nSELECT 1;\n```\n설명", "SELECT 1"),
+    ("WITH x AS (SELECT 1) SELECT * FROM x; Answer: 1", "WITH x AS (SELECT 1) SELECT * FROM x"),
+    ("쿼리를 만들 수 없습니다.", ""),
+])
+def test_extract_sql(text, expected):
+    assert extract_sql(text) == expected